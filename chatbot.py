@@ -1,47 +1,366 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def cache_nbytes(past_key_values):
+    """Memory held by a KV cache, in bytes"""
+    if past_key_values is None:
+        return 0
+    if hasattr(past_key_values, "to_legacy_cache"):
+        past_key_values = past_key_values.to_legacy_cache()
+    return sum(t.numel() * t.element_size() for layer in past_key_values for t in layer)
+
+def crop_cache(past_key_values, length):
+    """Keep the first length positions of a KV cache"""
+    if hasattr(past_key_values, "crop"):
+        past_key_values.crop(length)
+        return past_key_values
+    # Legacy caches hold (batch, heads, positions, head_dim) tensors per layer
+    return tuple(tuple(t[..., :length, :] for t in layer) for layer in past_key_values)
+
+class ChatSession:
+    """Token history of one conversation and the KV cache computed for it"""
+
+    def __init__(self, prefix_ids):
+        # Tokens the conversation starts with (BOS), kept when old turns are dropped
+        self.prefix_length = len(prefix_ids)
+        self.token_ids = list(prefix_ids)
+        self.turn_lengths = []
+        self.past_key_values = None
+        self.cache_bytes = 0
+
+    def drop_cache(self):
+        self.past_key_values = None
+        self.cache_bytes = 0
 
 class Chatbot:
-    def __init__(self, model_name="facebook/opt-350m"):
+    def __init__(self, model_name="facebook/opt-350m", max_context_tokens=1024,
+                 cache_budget_bytes=1 << 30, max_sessions=1000):
+        """
+        max_context_tokens: Tokens of history a conversation keeps; older
+            turns are dropped once it would grow past this
+        cache_budget_bytes: Memory the KV caches of all conversations may
+            hold; least recently used conversations lose theirs first
+        max_sessions: Conversations remembered at all
+        """
         print("Initializing chatbot... This might take a moment.")
+        # torch and transformers are only needed where the model runs, not by
+        # --server clients or the batching logic
+        from transformers import AutoModelForCausalLM, AutoTokenizer
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Decoder-only models continue from the last token, so batches are padded on the left
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model = AutoModelForCausalLM.from_pretrained(model_name)
+        self.model.eval()
+        self.max_context_tokens = max_context_tokens
+        self.cache_budget_bytes = cache_budget_bytes
+        self.max_sessions = max_sessions
+        # Conversations by session ID, least recently used first
+        self.sessions = OrderedDict()
+        # The batcher and conversations share the model; one generate at a time
+        self._lock = threading.Lock()
         print("Chatbot is ready!")
 
     def generate_response(self, user_input, max_length=100):
-        # Prepare the input
-        inputs = self.tokenizer(f"User: {user_input}\nBot:", return_tensors="pt", return_token_type_ids=False)
-        
-        # Generate response
-        with torch.no_grad():
+        return self.generate_responses([user_input], max_length)[0]
+
+    def generate_responses(self, user_inputs, max_length=100):
+        import torch
+        # Prepare the inputs as one padded batch
+        prompts = [f"User: {user_input}\nBot:" for user_input in user_inputs]
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, return_token_type_ids=False)
+
+        # Generate all responses with a single call; max_length budgets the
+        # longest prompt, so no response is longer than it would be alone
+        with self._lock, torch.no_grad():
             generated_ids = self.model.generate(
                 inputs.input_ids,
-                max_length=max_length,
+                attention_mask=inputs.attention_mask,
+                max_new_tokens=max(1, max_length - inputs.input_ids.shape[1]),
                 num_return_sequences=1,
                 no_repeat_ngram_size=2,
                 do_sample=True,
                 temperature=0.7,
                 top_k=50,
                 top_p=0.95,
-                pad_token_id=self.tokenizer.eos_token_id
+                pad_token_id=self.tokenizer.pad_token_id
             )
-        
-        # Decode and return the response
-        response = self.tokenizer.decode(generated_ids[0], skip_special_tokens=True)
-        return response.split("Bot:")[-1].strip()
+
+        # Decode and return the responses
+        responses = self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+        return [response.split("Bot:")[-1].strip() for response in responses]
+
+    def chat(self, session_id, user_input, max_length=100):
+        """
+        Answer user_input as the next turn of a conversation. Only the new
+        turn is run through the model; the earlier turns come from the
+        session's KV cache, so a turn costs the same however long the
+        conversation has been.
+        """
+        import torch
+        with self._lock:
+            session = self._session(session_id)
+            prefix = "\n" if session.turn_lengths else ""
+            turn_ids = self.tokenizer(f"{prefix}User: {user_input}\nBot:",
+                                      add_special_tokens=False).input_ids
+            max_new_tokens = max(1, max_length - len(turn_ids))
+            # Leave room for the prompt of a single over-long message
+            room = self.max_context_tokens - max_new_tokens - session.prefix_length
+            turn_ids = turn_ids[-max(1, room):]
+            self._fit_window(session, len(turn_ids) + max_new_tokens)
+
+            input_ids = torch.tensor([session.token_ids + turn_ids])
+            try:
+                with torch.no_grad():
+                    output = self.model.generate(
+                        input_ids,
+                        attention_mask=torch.ones_like(input_ids),
+                        past_key_values=session.past_key_values,
+                        max_new_tokens=max_new_tokens,
+                        num_return_sequences=1,
+                        do_sample=True,
+                        temperature=0.7,
+                        top_k=50,
+                        top_p=0.95,
+                        pad_token_id=self.tokenizer.pad_token_id,
+                        return_dict_in_generate=True
+                    )
+            except BaseException:
+                # generate extends the cache in place; after a failure it may
+                # cover tokens that never made it into the history
+                session.drop_cache()
+                raise
+
+            new_ids = output.sequences[0, input_ids.shape[1]:].tolist()
+            new_ids = new_ids[:self._response_length(new_ids)]
+            session.token_ids += turn_ids + new_ids
+            session.turn_lengths.append(len(turn_ids) + len(new_ids))
+            # The cache may run past the kept response; it must not cover
+            # tokens that aren't in the history
+            session.past_key_values = crop_cache(output.past_key_values, len(session.token_ids))
+            session.cache_bytes = cache_nbytes(session.past_key_values)
+            self._evict()
+            return self.tokenizer.decode(new_ids, skip_special_tokens=True).strip()
+
+    def end_session(self, session_id):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def _session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = ChatSession(self.tokenizer("").input_ids)
+            self.sessions[session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _fit_window(self, session, needed):
+        """Drop the oldest turns so the history and needed more tokens fit the context"""
+        if len(session.token_ids) + needed <= self.max_context_tokens:
+            return
+        # Positions are absolute, so the cache can't be shifted along with
+        # the window and has to be rebuilt; trimming to half the context
+        # does that once every few turns instead of on every turn
+        target = max(self.max_context_tokens // 2, session.prefix_length + needed)
+        start = session.prefix_length
+        while session.turn_lengths and len(session.token_ids) + needed > target:
+            length = session.turn_lengths.pop(0)
+            del session.token_ids[start:start + length]
+        session.drop_cache()
+
+    def _response_length(self, new_ids):
+        """Tokens of new_ids up to an end of sequence or the model starting the user's next turn"""
+        if self.tokenizer.eos_token_id in new_ids:
+            new_ids = new_ids[:new_ids.index(self.tokenizer.eos_token_id)]
+        text = self.tokenizer.decode(new_ids, skip_special_tokens=True)
+        cut = text.find("User:")
+        if cut < 0:
+            return len(new_ids)
+        length = 0
+        while length < len(new_ids) and len(self.tokenizer.decode(
+                new_ids[:length + 1], skip_special_tokens=True).rstrip()) <= cut:
+            length += 1
+        return length
+
+    def _evict(self):
+        """Drop KV caches, least recently used first, until they fit the budget"""
+        total = sum(session.cache_bytes for session in self.sessions.values())
+        # The most recent conversation keeps its cache for its next turn
+        for session in list(self.sessions.values())[:-1]:
+            if total <= self.cache_budget_bytes:
+                break
+            total -= session.cache_bytes
+            session.drop_cache()
+
+class RequestBatcher:
+    """Collects concurrent requests into batches answered by one generate call each"""
+
+    def __init__(self, chatbot, max_batch_size=16, batch_window=0.02):
+        self.chatbot = chatbot
+        self.max_batch_size = max_batch_size
+        # Seconds the first request of a batch waits for others to join it
+        self.batch_window = batch_window
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="chatbot-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, user_input, max_length=100):
+        """Queue a request; returns a Future resolving to the response"""
+        future = Future()
+        self._requests.put((user_input, max_length, future))
+        return future
+
+    def generate_response(self, user_input, max_length=100):
+        return self.submit(user_input, max_length).result()
+
+    def _collect(self):
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Requests only share a generate call if they share its settings
+            groups = {}
+            for user_input, max_length, future in batch:
+                groups.setdefault(max_length, []).append((user_input, future))
+            for max_length, requests in groups.items():
+                try:
+                    responses = self.chatbot.generate_responses(
+                        [user_input for user_input, _ in requests], max_length)
+                except Exception as e:
+                    for _, future in requests:
+                        future.set_exception(e)
+                    continue
+                for (_, future), response in zip(requests, responses):
+                    future.set_result(response)
+
+def make_handler(batcher):
+    class ChatHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/generate":
+                self.send_error(404)
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                user_input = request["message"]
+                max_length = int(request.get("max_length", 100))
+                session_id = request.get("session")
+            except (ValueError, KeyError, TypeError):
+                self.send_error(400, "Expected JSON with a 'message'")
+                return
+            try:
+                # Conversations continue from their own cache; single questions are batched
+                if session_id is not None:
+                    response = batcher.chatbot.chat(session_id, user_input, max_length)
+                else:
+                    response = batcher.generate_response(user_input, max_length)
+                body = {"response": response}
+                status = 200
+            except Exception as e:
+                body = {"error": str(e)}
+                status = 500
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ChatHandler
+
+def serve(host="127.0.0.1", port=8000, max_batch_size=16, batch_window=0.02, chatbot=None):
+    """
+    Load the model once and answer POST /generate requests until interrupted.
+    Requests with a "session" continue that conversation.
+    """
+    batcher = RequestBatcher(chatbot or Chatbot(), max_batch_size, batch_window)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    print(f"Serving on http://{host}:{port}/generate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+class RemoteChatbot:
+    """Chatbot answered by a running server, so the model isn't loaded again"""
+
+    def __init__(self, url="http://127.0.0.1:8000/generate"):
+        self.url = url
+
+    def generate_response(self, user_input, max_length=100):
+        return self._post({"message": user_input, "max_length": max_length})
+
+    def chat(self, session_id, user_input, max_length=100):
+        return self._post({"message": user_input, "max_length": max_length, "session": session_id})
+
+    def _post(self, body):
+        data = json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.url, data=data, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())["response"]
 
 def main():
+    parser = argparse.ArgumentParser(description="Chat with a local language model.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Keep the model loaded and answer HTTP requests in batches")
+    parser.add_argument("--server", help="Chat through a running server at this URL")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--batch-window", type=float, default=0.02,
+                        help="Seconds a request waits for others to share its batch")
+    parser.add_argument("--context-tokens", type=int, default=1024,
+                        help="Tokens of conversation history kept per session")
+    parser.add_argument("--cache-budget-mb", type=int, default=1024,
+                        help="Memory for the KV caches of all conversations")
+    args = parser.parse_args()
+
     print("Starting the chatbot...")
-    chatbot = Chatbot()
-    
+    if args.server and not args.serve:
+        chatbot = RemoteChatbot(args.server)
+    else:
+        chatbot = Chatbot(max_context_tokens=args.context_tokens,
+                          cache_budget_bytes=args.cache_budget_mb << 20)
+    if args.serve:
+        serve(args.host, args.port, args.max_batch_size, args.batch_window, chatbot)
+        return
+    session_id = uuid.uuid4().hex
+
     print("\nChat with the bot! (type 'quit' to exit)")
     while True:
         user_input = input("\nYou: ")
         if user_input.lower() in ['quit', 'exit', 'bye']:
             print("Goodbye!")
             break
-        
-        response = chatbot.generate_response(user_input)
+
+        response = chatbot.chat(session_id, user_input)
         print(f"Bot: {response}")
 
 if __name__ == "__main__":
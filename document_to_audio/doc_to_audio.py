@@ -39,11 +39,8 @@ class DocumentToAudio:
 
     def extract_text_from_pdf(self, pdf_path):
         """Extract text from PDF file"""
-        text = ""
         reader = PdfReader(pdf_path)
-        for page in reader.pages:
-            text += page.extract_text()
-        return text
+        return "".join(page.extract_text() for page in reader.pages)
 
     def extract_text_from_docx(self, docx_path):
         """Extract text from DOCX file"""
@@ -71,14 +68,14 @@ class DocumentToAudio:
         service = build('docs', 'v1', credentials=self.credentials)
         doc = service.documents().get(documentId=doc_id).execute()
         
-        text = ''
+        parts = []
         for content in doc.get('body').get('content'):
             if 'paragraph' in content:
                 for element in content.get('paragraph').get('elements'):
                     if 'textRun' in element:
-                        text += element.get('textRun').get('content')
+                        parts.append(element.get('textRun').get('content'))
         
-        return text
+        return ''.join(parts)
 
     def get_google_doc_id_from_url(self, url):
         """Extract Google Doc ID from URL"""
@@ -12,6 +12,14 @@ setup(
         'PyPDF2',
         'python-docx',
     ],
+    extras_require={
+        'local-tts': ['transformers', 'torch', 'lameenc'],
+    },
+    entry_points={
+        'console_scripts': [
+            'doc-to-audio=src.cli:main',
+        ],
+    },
     author="Your Name",
     author_email="your.email@example.com",
     description="A tool to convert documents to audio and save them to Google Drive",
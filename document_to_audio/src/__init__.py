@@ -1,7 +1,27 @@
 """
 Main entry point for the document to audio converter.
 """
-from .core.converter import DocumentToAudio
+import importlib
+
+# The converters are imported on first access, so tools that only need a
+# submodule don't pay for the whole conversion stack
+_LAZY_ATTRIBUTES = {
+    'DocumentToAudio': '.core.converter',
+    'AsyncDocumentToAudio': '.core.async_converter',
+}
 
 # For easier imports
-__all__ = ['DocumentToAudio']
+__all__ = ['DocumentToAudio', 'AsyncDocumentToAudio']
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,156 @@
+"""
+Command-line entry point for batch document to audio conversion.
+"""
+import argparse
+import json
+import sys
+from .core.batch import collect_inputs
+from .core.converter import DocumentToAudio
+from .core.jobs import JobQueue, queue_needs_google
+from .utils.instrumentation import Instrumentation, to_json, to_prometheus
+from .utils.storage.local_storage import LocalStorage
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='doc-to-audio',
+        description="Convert PDF, DOCX and Google Docs documents to audio."
+    )
+    parser.add_argument('sources', nargs='*',
+                        help="Documents, directories, glob patterns or manifest files "
+                             "listing one path or Google Docs URL per line")
+    parser.add_argument('--storage-dir', help="Directory the audio files are stored in")
+    parser.add_argument('--language', default='en', help="Language of the generated audio")
+    parser.add_argument('--save-to-drive', action='store_true',
+                        help="Upload each audio file to Google Drive")
+    parser.add_argument('--chunk-workers', type=int, default=None,
+                        help="Text chunks synthesized concurrently per document")
+    parser.add_argument('--tts-backend', default='gtts', choices=['gtts', 'transformers'],
+                        help="Text-to-speech engine; 'transformers' synthesizes offline in "
+                             "batches (needs the local-tts extra)")
+    parser.add_argument('--tts-rate', type=float, default=None,
+                        help="Maximum text-to-speech requests per second; throttled requests "
+                             "are retried and concurrency adapts to the service")
+    parser.add_argument('--docx-backend', default='python-docx',
+                        choices=['python-docx', 'xml', 'auto'],
+                        help="DOCX parser; 'xml' streams large files and includes tables, "
+                             "headers, footers and notes")
+    parser.add_argument('--normalize', action='store_true',
+                        help="Drop page numbers, running headers and line-break hyphens "
+                             "and synthesize whole sentences")
+    parser.add_argument('--extract-workers', type=int, default=2)
+    parser.add_argument('--synthesize-workers', type=int, default=2)
+    parser.add_argument('--store-workers', type=int, default=1)
+    parser.add_argument('--upload-workers', type=int, default=2)
+    parser.add_argument('--force', action='store_true',
+                        help="Re-convert Google Docs even if they haven't changed")
+    parser.add_argument('--refresh-google-docs', action='store_true',
+                        help="Re-convert every stored Google Doc that changed since it was converted")
+    parser.add_argument('--queue', action='store_true',
+                        help="Run the sources through the durable job queue, which resumes "
+                             "conversions interrupted by a crash; with no sources, finish "
+                             "the jobs already queued")
+    parser.add_argument('--priority', type=int, default=0,
+                        help="Priority of the queued sources; higher runs first")
+    parser.add_argument('--queue-workers', type=int, default=2,
+                        help="Jobs converted concurrently by the queue")
+    parser.add_argument('--report', help="Write the per-document results as JSON to this file")
+    parser.add_argument('--metrics',
+                        help="Write stage timings and counters to this file; Prometheus text "
+                             "format if it ends in .prom, JSON otherwise")
+    parser.add_argument('--rebuild-index', action='store_true',
+                        help="Reconcile the storage index with the files on disk and exit")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.rebuild_index:
+        storage = LocalStorage(args.storage_dir)
+        counts = storage.reconcile_index()
+        print(f"Index updated: {counts['added']} added, {counts['removed']} removed")
+        return 0
+    if not args.sources and not args.refresh_google_docs and not args.queue:
+        parser.error("at least one source is required")
+
+    needs_google = (args.save_to_drive or args.refresh_google_docs
+                    or any('/document/d/' in s for s in args.sources))
+    if args.queue and not needs_google:
+        # Jobs queued by an earlier run may convert Google Docs or upload
+        needs_google = queue_needs_google(LocalStorage(args.storage_dir).base_dir)
+    instrumentation = Instrumentation() if args.metrics else None
+    converter = DocumentToAudio(
+        storage_dir=args.storage_dir,
+        use_google_services=needs_google,
+        max_workers=args.chunk_workers,
+        instrumentation=instrumentation,
+        docx_backend=args.docx_backend,
+        normalize_text=args.normalize,
+        tts_backend=args.tts_backend,
+        tts_rate_limit=args.tts_rate
+    )
+
+    stage_workers = {
+        'extract_workers': args.extract_workers,
+        'synthesize_workers': args.synthesize_workers,
+        'store_workers': args.store_workers,
+        'upload_workers': args.upload_workers
+    }
+    try:
+        results = []
+        if args.refresh_google_docs:
+            results += converter.refresh_google_docs(
+                language=args.language,
+                save_to_drive=args.save_to_drive,
+                force=args.force,
+                **stage_workers
+            )
+        if args.queue:
+            jobs = JobQueue(converter, workers=args.queue_workers)
+            for input_path in collect_inputs(args.sources):
+                jobs.submit(input_path, language=args.language, save_to_drive=args.save_to_drive,
+                            force=args.force, priority=args.priority)
+            results += jobs.run()
+        elif args.sources:
+            results += converter.process_batch(
+                args.sources,
+                language=args.language,
+                save_to_drive=args.save_to_drive,
+                force=args.force,
+                **stage_workers
+            )
+    except ValueError as e:
+        print(f"An error occurred: {str(e)}", file=sys.stderr)
+        return 2
+
+    for result in results:
+        if result['status'] == 'ok':
+            print(f"OK     {result['input']} -> {result['audio_path']}")
+        elif result['status'] == 'unchanged':
+            print(f"SKIP   {result['input']} unchanged -> {result['audio_path']}")
+        elif result['status'] == 'queued':
+            print(f"RETRY  {result['input']}: {result['error']}")
+        else:
+            print(f"FAILED {result['input']} ({result['failed_stage']}): {result['error']}")
+
+    failed = sum(1 for result in results if result['status'] in ('error', 'queued'))
+    unchanged = sum(1 for result in results if result['status'] == 'unchanged')
+    print(f"\n{len(results) - failed - unchanged} converted, {unchanged} unchanged, "
+          f"{failed} failed")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+
+    if args.metrics:
+        export = to_prometheus if args.metrics.endswith('.prom') else to_json
+        with open(args.metrics, 'w') as f:
+            f.write(export(instrumentation))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
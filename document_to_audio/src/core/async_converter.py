@@ -0,0 +1,190 @@
+"""
+Asyncio front end for the document to audio converter.
+"""
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from ..utils import audio_utils, text_normalization
+from ..utils.mp3_assembly import strip_id3_tags
+from .converter import DocumentToAudio
+
+# Marks the end of the chunk stream in the producer queue
+_END = object()
+
+
+class AsyncDocumentToAudio:
+    def __init__(self, converter=None, max_concurrent_chunks=4, queue_size=8,
+                 max_chunk_chars=audio_utils.DEFAULT_CHUNK_CHARS, **converter_options):
+        """
+        Initialize the async converter
+        Args:
+            converter: DocumentToAudio providing storage, backend and Google services;
+                built from converter_options when omitted. Its normalize_text
+                setting applies here too; incremental conversion isn't supported.
+            max_concurrent_chunks: Chunks of one document synthesized concurrently
+            queue_size: Extracted chunks buffered ahead of synthesis; extraction
+                pauses when the buffer is full
+            max_chunk_chars: Maximum characters sent to the backend per request
+        """
+        self.converter = converter or DocumentToAudio(**converter_options)
+        if self.converter.incremental:
+            raise ValueError("AsyncDocumentToAudio doesn't support incremental conversion")
+        self.max_concurrent_chunks = max_concurrent_chunks
+        self.queue_size = queue_size
+        self.max_chunk_chars = max_chunk_chars
+
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    async def extract(self, input_path, is_google_doc=False):
+        """Extract the full text of a document"""
+        pieces = await self._run_blocking(
+            self.converter.iter_document_text, input_path, is_google_doc
+        )
+        return await self._run_blocking("".join, pieces)
+
+    async def _produce_chunks(self, text, chunk_queue, first_chunk_chars=None):
+        """Parse text into chunks in the background and feed the queue"""
+        try:
+            # Chunked like the synchronous converter, so both make the same audio
+            if self.converter.normalize_text:
+                chunks = text_normalization.iter_sentence_chunks(
+                    text, self.max_chunk_chars, first_chunk_chars)
+            else:
+                chunks = audio_utils.iter_text_chunks(text, self.max_chunk_chars, first_chunk_chars)
+            while True:
+                chunk = await self._run_blocking(next, chunks, _END)
+                await chunk_queue.put(chunk)
+                if chunk is _END:
+                    return
+        except Exception as e:
+            # Hand the failure to the consumer instead of leaving it waiting
+            await chunk_queue.put(e)
+
+    async def _synthesize_chunk(self, chunk, language):
+        backend = self.converter.tts_backend
+        cache = self.converter.tts_cache
+        if cache is None:
+            return await backend.synthesize_async(chunk, language)
+
+        key = cache.make_key(chunk, language, backend)
+        audio = await self._run_blocking(cache.get, key)
+        if audio is None:
+            audio = await backend.synthesize_async(chunk, language)
+            await self._run_blocking(cache.put, key, audio)
+        return audio
+
+    async def _iter_segments(self, text, language, first_chunk_chars=None):
+        """
+        Yield audio segments in order while extraction runs ahead through a
+        bounded queue; closing the generator stops extraction and synthesis
+        """
+        chunk_queue = asyncio.Queue(self.queue_size)
+        producer = asyncio.ensure_future(
+            self._produce_chunks(text, chunk_queue, first_chunk_chars)
+        )
+        pending = deque()
+
+        try:
+            while True:
+                chunk = await chunk_queue.get()
+                if chunk is _END:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                pending.append(asyncio.ensure_future(self._synthesize_chunk(chunk, language)))
+                if len(pending) >= self.max_concurrent_chunks:
+                    audio = await pending[0]
+                    pending.popleft()
+                    yield audio
+            while pending:
+                audio = await pending[0]
+                pending.popleft()
+                yield audio
+        finally:
+            producer.cancel()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(producer, *pending, return_exceptions=True)
+
+    async def synthesize(self, text, output_path, language='en'):
+        """
+        Convert text, or an iterable of text pieces, to an MP3 file.
+        Extraction, synthesis and writing overlap; cancelling the call stops
+        all three and removes the partial output.
+        """
+        segments = self._iter_segments(text, language)
+        instrumentation = self.converter.instrumentation
+        written = 0
+        # Spans track nesting per thread, which concurrent tasks would
+        # interleave, so the stage is timed by hand
+        start = time.perf_counter()
+
+        try:
+            with open(output_path, 'wb') as f:
+                async for audio in segments:
+                    await self._run_blocking(f.write, strip_id3_tags(audio))
+                    written += 1
+            if not written:
+                raise ValueError("No text to convert to audio")
+            instrumentation.observe('synthesize', time.perf_counter() - start, language=language)
+            instrumentation.count('tts_chunks', written)
+        except BaseException:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        finally:
+            await segments.aclose()
+
+        return output_path
+
+    async def stream_document(self, input_path, language='en', is_google_doc=False):
+        """Yield the MP3 bytes of a document segment by segment as they are synthesized"""
+        text = await self._run_blocking(
+            self.converter.iter_document_text, input_path, is_google_doc
+        )
+        segments = self._iter_segments(
+            text, language, first_chunk_chars=audio_utils.DEFAULT_FIRST_CHUNK_CHARS
+        )
+        try:
+            async for audio in segments:
+                yield strip_id3_tags(audio)
+        finally:
+            await segments.aclose()
+
+    async def store(self, temp_audio_path, input_path, is_google_doc=False, revision_id=None):
+        """Move synthesized audio into local storage"""
+        return await self._run_blocking(
+            self.converter.store, temp_audio_path, input_path, is_google_doc, revision_id
+        )
+
+    async def upload(self, stored_path):
+        """Upload stored audio to Google Drive and return the file ID"""
+        return await self._run_blocking(self.converter.upload, stored_path)
+
+    async def process_document(self, input_path, output_path=None, language='en',
+                               is_google_doc=False, save_to_drive=False, force=False):
+        """Process document and convert to audio, skipping unchanged Google Docs"""
+        if is_google_doc and not force and self.converter.google_services:
+            stored = await self._run_blocking(self.converter.check_google_doc, input_path)
+            if stored is not None:
+                return stored
+
+        text, revision_id = await self._run_blocking(
+            self.converter.read_document, input_path, is_google_doc
+        )
+
+        if output_path is None:
+            output_path = self.converter.default_output_path(input_path, is_google_doc)
+
+        temp_audio_path = await self.synthesize(text, output_path, language)
+        result = await self.store(temp_audio_path, input_path, is_google_doc, revision_id)
+
+        if save_to_drive and self.converter.google_services:
+            result['drive_file_id'] = await self.upload(result['audio_path'])
+
+        return result
@@ -0,0 +1,212 @@
+"""
+Batch conversion of many documents through overlapping pipeline stages.
+"""
+import glob
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+GOOGLE_DOC_MARKER = '/document/d/'
+
+# Sentinel telling stage workers that no more jobs will arrive
+_DONE = object()
+
+
+def _is_supported(path):
+    return path.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def _read_manifest(manifest_path):
+    """Read one path or Google Docs URL per line, ignoring blanks and # comments"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    inputs = []
+    with open(manifest_path, 'r') as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith('#'):
+                continue
+            if GOOGLE_DOC_MARKER not in entry and not os.path.isabs(entry):
+                entry = os.path.join(base_dir, entry)
+            inputs.append(entry)
+    return inputs
+
+
+def collect_inputs(sources):
+    """
+    Expand directories, glob patterns and manifest files into a list of
+    document paths and Google Docs URLs
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+
+    inputs = []
+    for source in sources:
+        if GOOGLE_DOC_MARKER in source:
+            inputs.append(source)
+        elif os.path.isdir(source):
+            for root, _, filenames in os.walk(source):
+                inputs.extend(
+                    os.path.join(root, filename)
+                    for filename in sorted(filenames)
+                    if _is_supported(filename)
+                )
+        elif os.path.isfile(source):
+            inputs.extend([source] if _is_supported(source) else _read_manifest(source))
+        else:
+            matches = sorted(glob.glob(source, recursive=True))
+            if not matches:
+                raise ValueError(f"No documents found for: {source}")
+            inputs.extend(path for path in matches if _is_supported(path))
+
+    # Keep the first occurrence of anything listed twice
+    return list(dict.fromkeys(inputs))
+
+
+class BatchPipeline:
+    def __init__(self, converter, extract_workers=2, synthesize_workers=2,
+                 store_workers=1, upload_workers=2, queue_size=4):
+        """
+        Initialize the pipeline
+        Args:
+            converter: DocumentToAudio instance providing the stage operations
+            extract_workers: Documents extracted concurrently
+            synthesize_workers: Documents synthesized concurrently
+            store_workers: Documents moved into storage concurrently
+            upload_workers: Documents uploaded to Google Drive concurrently
+            queue_size: Documents waiting between two stages before the
+                earlier stage blocks, which bounds memory held by extracted text
+        """
+        self.converter = converter
+        self.workers = {
+            'extract': extract_workers,
+            'synthesize': synthesize_workers,
+            'store': store_workers,
+            'upload': upload_workers
+        }
+        self.queue_size = queue_size
+
+    def _extract(self, job):
+        if job['is_google_doc'] and not job['force'] and self.converter.google_services:
+            stored = self.converter.check_google_doc(job['input'])
+            if stored is not None:
+                # Nothing changed; the later stages skip jobs that aren't pending
+                job['status'] = 'unchanged'
+                job['audio_path'] = stored['audio_path']
+                job['metadata'] = stored['metadata']
+                return
+        # Keep the pages/paragraphs apart; incremental mode chunks them separately
+        text, job['revision_id'] = self.converter.read_document(
+            job['input'], job['is_google_doc']
+        )
+        job['text'] = list(text)
+
+    def _synthesize(self, job):
+        output_dir = os.path.join(job['temp_dir'], str(job['index']))
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = self.converter.default_output_path(
+            job['input'], job['is_google_doc'], output_dir
+        )
+        try:
+            job['temp_audio_path'] = self.converter.synthesize(
+                job['text'], output_path, job['language'], job['input']
+            )
+        finally:
+            # The text isn't needed past this stage; don't hold it until the end
+            del job['text']
+
+    def _store(self, job):
+        stored = self.converter.store(
+            job.pop('temp_audio_path'), job['input'], job['is_google_doc'], job['revision_id']
+        )
+        job['audio_path'] = stored['audio_path']
+        job['metadata'] = stored['metadata']
+
+    def _upload(self, job):
+        job['drive_file_id'] = self.converter.upload(job['audio_path'])
+
+    def _run_stage(self, name, func, in_queue, out_queue):
+        while True:
+            job = in_queue.get()
+            if job is _DONE:
+                # Let the other workers of this stage see the sentinel too
+                in_queue.put(_DONE)
+                return
+            if job['status'] == 'pending':
+                try:
+                    func(job)
+                except Exception as e:
+                    job['status'] = 'error'
+                    job['failed_stage'] = name
+                    job['error'] = str(e)
+                job['elapsed'] = time.perf_counter() - job['started']
+            out_queue.put(job)
+
+    def run(self, inputs, language='en', save_to_drive=False, force=False):
+        """
+        Convert every input and return a result dict per document, in input
+        order, with 'status' set to 'ok', 'unchanged' (a Google Doc whose
+        revision matches its stored audio, unless force is set) or 'error'
+        """
+        stages = [('extract', self._extract), ('synthesize', self._synthesize),
+                  ('store', self._store)]
+        if save_to_drive and self.converter.google_services:
+            stages.append(('upload', self._upload))
+
+        queues = [queue.Queue(self.queue_size) for _ in stages]
+        results = queue.Queue()
+        queues.append(results)
+
+        temp_dir = tempfile.mkdtemp(prefix='doc_to_audio_batch_')
+        try:
+            threads = []
+            for position, (name, func) in enumerate(stages):
+                stage_threads = [
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(name, func, queues[position], queues[position + 1]),
+                        name=f"batch-{name}-{i}",
+                        daemon=True
+                    )
+                    for i in range(max(1, self.workers[name]))
+                ]
+                for thread in stage_threads:
+                    thread.start()
+                threads.append(stage_threads)
+
+            for index, input_path in enumerate(inputs):
+                queues[0].put({
+                    'index': index,
+                    'input': input_path,
+                    'is_google_doc': GOOGLE_DOC_MARKER in input_path,
+                    'language': language,
+                    'force': force,
+                    'temp_dir': temp_dir,
+                    'status': 'pending',
+                    'started': time.perf_counter()
+                })
+            queues[0].put(_DONE)
+
+            # Once a stage has drained, tell the next one nothing else is coming
+            for position, stage_threads in enumerate(threads):
+                for thread in stage_threads:
+                    thread.join()
+                queues[position + 1].put(_DONE)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        report = []
+        while True:
+            job = results.get()
+            if job is _DONE:
+                break
+            for key in ('started', 'text', 'temp_audio_path', 'temp_dir', 'force'):
+                job.pop(key, None)
+            if job['status'] == 'pending':
+                job['status'] = 'ok'
+            report.append(job)
+
+        return sorted(report, key=lambda job: job['index'])
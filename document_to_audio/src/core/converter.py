@@ -3,80 +3,345 @@ Core document to audio conversion functionality.
 """
 import os
 from datetime import datetime
-from ..utils import document_utils, audio_utils
+from ..utils import document_utils, audio_utils, text_normalization
+from ..utils.instrumentation import NULL_INSTRUMENTATION
 from ..utils.storage.local_storage import LocalStorage
-from ..services.google_services import GoogleServices
+from ..utils.storage.tts_cache import TTSCache, DEFAULT_MAX_BYTES
+from ..utils.storage.segments import PreviousSegments, SEGMENTS_SUFFIX
+from ..services.tts_backends import GTTSBackend, create_backend
+from ..services.tts_scheduler import ScheduledTTSBackend
+from .batch import BatchPipeline, collect_inputs
 
 class DocumentToAudio:
-    def __init__(self, storage_dir=None, use_google_services=False):
+    def __init__(self, storage_dir=None, use_google_services=False,
+                 tts_backend=None, max_workers=None, use_tts_cache=True,
+                 tts_cache_max_bytes=DEFAULT_MAX_BYTES, pdf_workers=1,
+                 pdf_parallel_min_pages=document_utils.PDF_PARALLEL_MIN_PAGES,
+                 incremental=False, instrumentation=None, docx_backend='python-docx',
+                 docx_workers=1, normalize_text=False, tts_rate_limit=None):
         """
         Initialize the converter
         Args:
             storage_dir: Custom storage directory for audio files
             use_google_services: Whether to enable Google Services integration
+            tts_backend: Text-to-speech backend, or the name of one in
+                tts_backends.BACKENDS (e.g. 'transformers' for offline
+                synthesis); defaults to gTTS
+            max_workers: Number of text chunks synthesized concurrently
+            use_tts_cache: Whether to reuse audio synthesized for identical text
+            tts_cache_max_bytes: Size cap of the synthesized audio cache
+            pdf_workers: Number of processes extracting PDF pages
+            pdf_parallel_min_pages: Page count from which PDFs are extracted in parallel
+            incremental: Re-synthesize only the pages/paragraphs that changed since
+                the document was last converted, reusing the stored audio for the rest
+            instrumentation: Instrumentation receiving per-stage timings and
+                counters; nothing is recorded by default
+            docx_backend: 'python-docx', 'xml' (streaming, includes tables,
+                headers, footers and notes) or 'auto' (xml for large files)
+            docx_workers: DOCX parts parsed at once by the xml backend
+            normalize_text: Clean the extracted text up for speech (line-break
+                hyphens, whitespace, PDF page numbers and running headers and
+                footers) and synthesize it in whole-sentence chunks
+            tts_rate_limit: Requests per second sent to the TTS backend; the
+                backend is then shared through a ScheduledTTSBackend that also
+                adapts concurrency and retries throttled requests
         """
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
         self.storage = LocalStorage(storage_dir)
-        self.google_services = GoogleServices() if use_google_services else None
+        self.google_services = None
+        if use_google_services:
+            # The Google client libraries are slow to import; only load them when asked to
+            from ..services.google_services import GoogleServices
+            self.google_services = GoogleServices(instrumentation=self.instrumentation)
+        if isinstance(tts_backend, str):
+            tts_backend = create_backend(tts_backend)
+        self.tts_backend = tts_backend or GTTSBackend()
+        if tts_rate_limit:
+            self.tts_backend = ScheduledTTSBackend(self.tts_backend, rate=tts_rate_limit,
+                                                   instrumentation=self.instrumentation)
+        self.max_workers = max_workers
+        self.pdf_workers = pdf_workers
+        self.pdf_parallel_min_pages = pdf_parallel_min_pages
+        self.incremental = incremental
+        self.docx_backend = docx_backend
+        self.docx_workers = docx_workers
+        self.normalize_text = normalize_text
+        self.tts_cache = None
+        if use_tts_cache:
+            self.tts_cache = TTSCache(
+                os.path.join(self.storage.base_dir, '.tts_cache'),
+                max_bytes=tts_cache_max_bytes,
+                instrumentation=self.instrumentation
+            )
 
-    def process_document(self, input_path, output_path=None, language='en', 
-                        is_google_doc=False, save_to_drive=False):
-        """Process document and convert to audio"""
-        # Extract text based on input type
+    def iter_document_text(self, input_path, is_google_doc=False):
+        """
+        Return the document text as an iterable of pieces.
+        Local files are parsed lazily so synthesis can start on the first
+        pages while later ones are still being extracted.
+        """
+        return self.read_document(input_path, is_google_doc)[0]
+
+    def read_document(self, input_path, is_google_doc=False):
+        """
+        Return the document text as an iterable of pieces, together with
+        the revisionId of a Google Doc (None for local files) to pass to store().
+        """
+        revision_id = None
         if is_google_doc:
             if not self.google_services:
                 raise ValueError("Google Services not enabled. Initialize with use_google_services=True")
             try:
                 doc_id = document_utils.get_google_doc_id_from_url(input_path)
                 docs_service = self.google_services.get_docs_service()
-                text = document_utils.extract_text_from_google_doc(docs_service, doc_id)
+                with self.instrumentation.span('fetch'):
+                    document = document_utils.fetch_google_doc(docs_service, doc_id)
+                text = document_utils.google_doc_text(document)
+                revision_id = document.get('revisionId')
+                # One piece per paragraph keeps incremental segments stable
+                pieces = text.splitlines(keepends=True)
             except Exception as e:
                 raise ValueError(f"Error processing Google Doc: {str(e)}")
+
+        # Handle local files
+        elif input_path.lower().endswith('.pdf'):
+            pieces = document_utils.iter_pdf_pages(
+                input_path,
+                workers=self.pdf_workers,
+                parallel_min_pages=self.pdf_parallel_min_pages
+            )
+        elif input_path.lower().endswith('.docx'):
+            pieces = document_utils.iter_docx_paragraphs(
+                input_path,
+                backend=self.docx_backend,
+                workers=self.docx_workers
+            )
         else:
-            # Handle local files
-            if input_path.lower().endswith('.pdf'):
-                text = document_utils.extract_text_from_pdf(input_path)
-            elif input_path.lower().endswith('.docx'):
-                text = document_utils.extract_text_from_docx(input_path)
-            else:
-                raise ValueError("Unsupported file format. Please use PDF, DOCX, or Google Docs URL.")
+            raise ValueError("Unsupported file format. Please use PDF, DOCX, or Google Docs URL.")
 
-        # Generate temporary output path if not provided
-        if output_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            if is_google_doc:
-                doc_id = document_utils.get_google_doc_id_from_url(input_path)
-                output_path = f"google_doc_{doc_id}_{timestamp}.mp3"
-            else:
-                base_name = os.path.splitext(os.path.basename(input_path))[0]
-                output_path = f"{base_name}_{timestamp}.mp3"
+        # Extraction runs as synthesis consumes the pieces, so it is timed per piece
+        pieces = self.instrumentation.timed_iter('extract', pieces, count_name='extracted_chars')
+        if self.normalize_text:
+            pieces = text_normalization.normalize_pieces(
+                pieces,
+                pages=not is_google_doc and input_path.lower().endswith('.pdf')
+            )
+        return pieces, revision_id
 
-        # Convert to audio
-        temp_audio_path = audio_utils.convert_text_to_audio(text, output_path, language)
+    def default_output_path(self, input_path, is_google_doc=False, output_dir=None):
+        """Build a timestamped temporary MP3 path for a document"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if is_google_doc:
+            doc_id = document_utils.get_google_doc_id_from_url(input_path)
+            filename = f"google_doc_{doc_id}_{timestamp}.mp3"
+        else:
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+            filename = f"{base_name}_{timestamp}.mp3"
+        return os.path.join(output_dir, filename) if output_dir else filename
 
-        # Save to local storage
+    def check_google_doc(self, input_path):
+        """
+        Return the stored result for a Google Doc whose revision hasn't
+        changed since its audio was made, or None if it needs converting.
+        Only the revisionId is fetched.
+        """
+        entry = self.storage.latest_entry(input_path)
+        if entry is None or not entry['revision_id'] or not os.path.exists(entry['path']):
+            return None
+
+        try:
+            doc_id = document_utils.get_google_doc_id_from_url(input_path)
+            with self.instrumentation.span('revision_check'):
+                revision_id = document_utils.get_google_doc_revision(
+                    self.google_services.get_docs_service(), doc_id
+                )
+        except Exception as e:
+            raise ValueError(f"Error processing Google Doc: {str(e)}")
+        if revision_id != entry['revision_id']:
+            return None
+
+        self.instrumentation.count('google_docs_unchanged')
+        return {
+            'audio_path': entry['path'],
+            'original_document': input_path,
+            'metadata': self.storage.get_file_info(entry['path']),
+            'unchanged': True
+        }
+
+    def _previous_segments(self, input_path):
+        """Find the segments of the latest stored conversion of input_path"""
+        for stored_path in reversed(self.storage.list_files(original_doc=input_path)):
+            previous = PreviousSegments.from_stored_audio(stored_path, fallback=self.tts_cache)
+            if previous is not None:
+                return previous
+        return None
+
+    def synthesize(self, text, output_path, language='en', input_path=None, checkpoints=None):
+        """
+        Convert extracted text to an MP3 file
+        Args:
+            checkpoints: Optional JobCheckpoints consulted before the caches and
+                recording every chunk synthesized, so an interrupted conversion
+                can resume
+        """
+        cache = self.tts_cache
+        manifest_path = None
+        if self.incremental:
+            manifest_path = output_path + SEGMENTS_SUFFIX
+            if input_path is not None:
+                cache = self._previous_segments(input_path) or cache
+        if checkpoints is not None:
+            checkpoints.fallback = cache
+            cache = checkpoints
+
+        tags = None
+        if input_path is not None and os.path.isfile(input_path):
+            tags = {'title': os.path.splitext(os.path.basename(input_path))[0]}
+
+        with self.instrumentation.span('synthesize', language=language):
+            audio_utils.convert_text_to_audio(
+                text,
+                output_path,
+                language,
+                backend=self.tts_backend,
+                max_workers=self.max_workers,
+                cache=cache,
+                manifest_path=manifest_path,
+                tags=tags,
+                instrumentation=self.instrumentation,
+                sentence_chunks=self.normalize_text
+            )
+        if self.instrumentation.enabled and self.tts_cache is not None:
+            self.instrumentation.gauge('tts_cache_hit_ratio', self.tts_cache.stats()['hit_ratio'])
+        return output_path
+
+    def store(self, temp_audio_path, input_path, is_google_doc=False, revision_id=None):
+        """
+        Move synthesized audio into local storage and describe the result.
+
+        Args:
+            revision_id: revisionId of the Google Doc the audio was made from,
+                as returned by read_document()
+        """
         doc_type = 'google_docs' if is_google_doc else os.path.splitext(input_path)[1][1:]
-        stored_path = self.storage.save_file(
-            temp_audio_path,
-            original_doc_path=input_path,
-            doc_type=doc_type
-        )
+        with self.instrumentation.span('store', doc_type=doc_type):
+            # The temporary file is moved into storage rather than copied
+            stored_path = self.storage.save_file(
+                temp_audio_path,
+                original_doc_path=input_path,
+                doc_type=doc_type,
+                move=True,
+                revision_id=revision_id
+            )
 
-        # Clean up temporary file if it's different from the stored path
-        if temp_audio_path != stored_path and os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
+            # Keep the segment fingerprints next to the audio they describe
+            manifest_path = temp_audio_path + SEGMENTS_SUFFIX
+            if os.path.exists(manifest_path):
+                os.replace(manifest_path, stored_path + SEGMENTS_SUFFIX)
+        if self.instrumentation.enabled:
+            self.instrumentation.count('stored_bytes', os.path.getsize(stored_path))
 
-        result = {
+        return {
             'audio_path': stored_path,
             'original_document': input_path,
             'metadata': self.storage.get_file_info(stored_path)
         }
 
-        # Optionally upload to Google Drive
-        if save_to_drive and self.google_services:
-            file_id = self.google_services.upload_file(
+    def upload(self, stored_path):
+        """Upload stored audio to Google Drive and return the file ID"""
+        with self.instrumentation.span('upload'):
+            return self.google_services.upload_file(
                 stored_path,
                 os.path.basename(stored_path)
             )
-            result['drive_file_id'] = file_id
+
+    def process_document(self, input_path, output_path=None, language='en', 
+                        is_google_doc=False, save_to_drive=False, force=False):
+        """
+        Process document and convert to audio. A Google Doc that hasn't
+        changed since it was last converted isn't converted again unless
+        force is set; its stored result is returned with 'unchanged' set.
+        """
+        with self.instrumentation.span('process_document', input=input_path):
+            if is_google_doc and not force and self.google_services:
+                stored = self.check_google_doc(input_path)
+                if stored is not None:
+                    return stored
+            return self._process_document(input_path, output_path, language,
+                                          is_google_doc, save_to_drive)
+
+    def _process_document(self, input_path, output_path, language, is_google_doc,
+                          save_to_drive):
+        # Extract text based on input type
+        text, revision_id = self.read_document(input_path, is_google_doc)
+
+        # Generate temporary output path if not provided
+        if output_path is None:
+            output_path = self.default_output_path(input_path, is_google_doc)
+
+        # Convert to audio
+        temp_audio_path = self.synthesize(text, output_path, language, input_path)
+
+        # Save to local storage
+        result = self.store(temp_audio_path, input_path, is_google_doc, revision_id)
+
+        # Optionally upload to Google Drive
+        if save_to_drive and self.google_services:
+            result['drive_file_id'] = self.upload(result['audio_path'])
 
         return result
+
+    def stream_document(self, input_path, language='en', is_google_doc=False,
+                        output_path=None):
+        """
+        Convert a document and yield its MP3 bytes segment by segment as soon
+        as each is synthesized, instead of waiting for the whole file.
+        With output_path, the segments are also appended to a growing file.
+        The streamed audio is not added to local storage.
+        """
+        text = self.iter_document_text(input_path, is_google_doc)
+        return audio_utils.stream_text_to_audio(
+            text,
+            language,
+            backend=self.tts_backend,
+            max_workers=self.max_workers,
+            cache=self.tts_cache,
+            output_path=output_path,
+            sentence_chunks=self.normalize_text
+        )
+
+    def process_batch(self, sources, language='en', save_to_drive=False, force=False,
+                      **stage_workers):
+        """
+        Convert many documents with overlapping extract, synthesize, store
+        and upload stages
+        Args:
+            sources: Directory, glob pattern or manifest file, or a list of them
+            language: Language of the generated audio
+            save_to_drive: Whether to upload each stored file to Google Drive
+            force: Re-convert Google Docs even if their revision is unchanged
+            stage_workers: Per-stage concurrency, e.g. synthesize_workers=4
+        Returns a result dict per document, in input order
+        """
+        pipeline = BatchPipeline(self, **stage_workers)
+        return pipeline.run(
+            collect_inputs(sources),
+            language=language,
+            save_to_drive=save_to_drive,
+            force=force
+        )
+
+    def refresh_google_docs(self, language='en', save_to_drive=False, force=False,
+                            **stage_workers):
+        """
+        Re-convert every Google Doc in storage that changed since its audio
+        was made; unchanged docs cost one revision lookup each and are
+        reported with status 'unchanged'. With force, every tracked doc is
+        re-converted.
+        """
+        if not self.google_services:
+            raise ValueError("Google Services not enabled. Initialize with use_google_services=True")
+        tracked = self.storage.original_documents(doc_type='google_docs')
+        if not tracked:
+            return []
+        return self.process_batch(tracked, language, save_to_drive, force, **stage_workers)
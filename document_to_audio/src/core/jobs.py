@@ -0,0 +1,206 @@
+"""
+Durable, crash-resumable conversion jobs.
+
+Submissions are kept in a SQLite queue next to the audio storage and run by
+a pool of worker threads. Every synthesized chunk is checkpointed to disk
+before it counts as done, so a conversion interrupted by a crash or a kill
+resumes from the chunks it had finished instead of starting over.
+"""
+import os
+import shutil
+import socket
+import threading
+import uuid
+from .batch import GOOGLE_DOC_MARKER
+from ..utils.storage.job_store import JobStore, JobCheckpoints
+
+JOBS_DB_FILENAME = 'jobs.sqlite3'
+JOBS_DIR = '.jobs'
+# A running job whose worker hasn't renewed its lease for this long is
+# taken over by another worker
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def queue_needs_google(base_dir):
+    """
+    Whether the unfinished jobs queued in the storage at base_dir need
+    Google services, so a converter resuming them can be set up for it
+    """
+    db_path = os.path.join(base_dir, JOBS_DB_FILENAME)
+    if not os.path.exists(db_path):
+        return False
+    store = JobStore(db_path)
+    try:
+        return store.pending_needs_google()
+    finally:
+        store.close()
+
+
+class JobQueue:
+    def __init__(self, converter, db_path=None, workers=2, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, poll_interval=0.5):
+        """
+        Initialize the queue
+        Args:
+            converter: DocumentToAudio instance running the conversions
+            db_path: Job database, defaults to jobs.sqlite3 in the converter's storage
+            workers: Jobs converted concurrently
+            lease_seconds: Time without a heartbeat after which a running job
+                is considered abandoned and claimed again
+            max_attempts: Runs of a failing job before it is marked failed
+            poll_interval: Seconds between checks for new jobs when waiting
+        """
+        self.converter = converter
+        base_dir = converter.storage.base_dir
+        self.store = JobStore(db_path or os.path.join(base_dir, JOBS_DB_FILENAME))
+        self.jobs_dir = os.path.join(base_dir, JOBS_DIR)
+        self.workers = max(1, workers)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def submit(self, input_path, language='en', save_to_drive=False, force=False, priority=0):
+        """
+        Queue a document and return its job ID; identical submissions share
+        one job. Jobs with a higher priority run first.
+        """
+        return self.store.submit(
+            input_path,
+            GOOGLE_DOC_MARKER in input_path,
+            language=language,
+            save_to_drive=save_to_drive,
+            force=force,
+            priority=priority
+        )
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def list_jobs(self, status=None):
+        return self.store.list_jobs(status)
+
+    def cancel(self, job_id):
+        return self.store.cancel(job_id)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, str(job_id))
+
+    def _convert(self, job):
+        converter = self.converter
+        input_path = job['input']
+        is_google_doc = job['is_google_doc']
+        if (is_google_doc or job['save_to_drive']) and not converter.google_services:
+            # Finishing without the upload would mark the job done for good
+            raise ValueError("Google Services not enabled. Initialize with use_google_services=True")
+        if is_google_doc and not job['force'] and converter.google_services:
+            stored = converter.check_google_doc(input_path)
+            if stored is not None:
+                return stored
+
+        job_dir = self._job_dir(job['id'])
+        checkpoints = JobCheckpoints(self.store, job['id'], job_dir)
+        text, revision_id = converter.read_document(input_path, is_google_doc)
+        # The output is assembled in the job directory, not the working directory
+        output_path = converter.default_output_path(input_path, is_google_doc, job_dir)
+        converter.synthesize(text, output_path, job['language'], input_path,
+                             checkpoints=checkpoints)
+        result = converter.store(output_path, input_path, is_google_doc, revision_id)
+        result['resumed_chunks'] = checkpoints.resumed
+        converter.instrumentation.count('job_chunks_resumed', checkpoints.resumed)
+
+        if job['save_to_drive']:
+            result['drive_file_id'] = converter.upload(result['audio_path'])
+        return result
+
+    def _run_job(self, job):
+        with self._active_lock:
+            self._active.add(job['id'])
+        try:
+            with self.converter.instrumentation.span('job', job_id=job['id']):
+                result = self._convert(job)
+        except Exception as e:
+            retry = job['attempts'] < self.max_attempts
+            self.store.fail(job['id'], self.worker_id, str(e), retry=retry)
+        else:
+            # A worker that lost its lease leaves the job directory to the new one
+            if self.store.finish(job['id'], self.worker_id, result):
+                shutil.rmtree(self._job_dir(job['id']), ignore_errors=True)
+        finally:
+            with self._active_lock:
+                self._active.discard(job['id'])
+        return job['id']
+
+    def _work(self, wait, finished):
+        while not self._stop.is_set():
+            job = self.store.claim(self.worker_id, self.lease_seconds, self.max_attempts)
+            if job is None:
+                if not wait:
+                    return
+                self._stop.wait(self.poll_interval)
+                continue
+            finished.append(self._run_job(job))
+
+    def _heartbeat(self):
+        # Renew well within the lease, without spinning on very short ones
+        while not self._stop.wait(max(self.lease_seconds / 3, 0.1)):
+            with self._active_lock:
+                active = list(self._active)
+            if active:
+                self.store.heartbeat(active, self.worker_id)
+
+    def run(self, wait=False):
+        """
+        Run queued jobs on the worker pool, resuming any left unfinished by
+        a crashed worker once their lease has expired. Returns when nothing
+        is left to claim, or with wait, once stop() is called.
+        Returns a result dict per job run, as from process_batch, with the
+        job's 'job_id' and a status of 'ok', 'unchanged', 'error' or, for a
+        job that will be retried, 'queued'.
+        """
+        self._stop.clear()
+        finished = []
+        heartbeat = threading.Thread(target=self._heartbeat, name='jobs-heartbeat', daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._work, args=(wait, finished),
+                             name=f"jobs-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop.set()
+            heartbeat.join()
+
+        return [self.report(job_id) for job_id in dict.fromkeys(finished)]
+
+    def stop(self):
+        """Let the workers finish their current job and return"""
+        self._stop.set()
+
+    def report(self, job_id):
+        """Describe a job the way process_batch describes a document"""
+        job = self.store.get(job_id)
+        report = {'job_id': job['id'], 'input': job['input'], 'attempts': job['attempts']}
+        if job['status'] == 'done':
+            result = job['result']
+            report['status'] = 'unchanged' if result.get('unchanged') else 'ok'
+            report.update(result)
+            report.pop('unchanged', None)
+            report.pop('original_document', None)
+        elif job['status'] == 'failed':
+            report.update(status='error', failed_stage='job', error=job['error'])
+        else:
+            report.update(status=job['status'], error=job['error'])
+        return report
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,132 @@
+"""
+Concurrent, resumable Google Drive uploads.
+"""
+import os
+import random
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+from ..utils.instrumentation import NULL_INSTRUMENTATION
+
+# Drive requires resumable chunks to be a multiple of 256 KiB
+CHUNK_SIZE_UNIT = 256 * 1024
+DEFAULT_CHUNK_SIZE = 32 * CHUNK_SIZE_UNIT
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DriveUploadManager:
+    def __init__(self, google_services, max_concurrent=4, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_retries=5, backoff_base=1.0, backoff_max=32.0, instrumentation=None):
+        """
+        Initialize the upload manager
+        Args:
+            google_services: GoogleServices (or compatible) providing the Drive service
+            max_concurrent: Number of files uploaded at the same time
+            chunk_size: Bytes sent per resumable request, a multiple of 256 KiB
+            max_retries: Consecutive failures tolerated before an upload is abandoned
+            backoff_base: First retry delay in seconds, doubled on each retry
+            backoff_max: Upper bound for a single retry delay
+            instrumentation: Receives retry and uploaded byte counts
+        """
+        if chunk_size <= 0 or chunk_size % CHUNK_SIZE_UNIT:
+            raise ValueError("chunk_size must be a positive multiple of 256 KiB")
+        self.google_services = google_services
+        self.max_concurrent = max_concurrent
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+
+    def _is_retryable(self, error):
+        if isinstance(error, HttpError):
+            return error.resp.status in RETRYABLE_STATUSES
+        return isinstance(error, (socket.error, httplib2.HttpLib2Error))
+
+    def _backoff(self, attempt):
+        """Sleep for an exponentially growing, jittered delay"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        time.sleep(random.uniform(0, delay))
+
+    def upload(self, file_path, file_name=None, mimetype='audio/mpeg'):
+        """
+        Upload one file in resumable chunks. After a failed chunk the next
+        attempt asks Drive how many bytes it committed and continues from there.
+        Returns the file ID, byte count, retry count and throughput.
+        """
+        service = self.google_services.get_drive_service()
+        media = MediaFileUpload(
+            file_path,
+            mimetype=mimetype,
+            chunksize=self.chunk_size,
+            resumable=True
+        )
+        request = service.files().create(
+            body={'name': file_name or os.path.basename(file_path)},
+            media_body=media,
+            fields='id'
+        )
+
+        start = time.perf_counter()
+        response = None
+        attempt = 0
+        retries = 0
+        while response is None:
+            try:
+                _, response = request.next_chunk()
+                attempt = 0
+            except Exception as e:
+                attempt += 1
+                if not self._is_retryable(e) or attempt > self.max_retries:
+                    raise
+                retries += 1
+                self.instrumentation.count('drive_upload_retries', status=getattr(
+                    getattr(e, 'resp', None), 'status', None))
+                self._backoff(attempt)
+
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(file_path)
+        self.instrumentation.count('drive_upload_bytes', size)
+        return {
+            'file_path': file_path,
+            'file_id': response.get('id'),
+            'bytes': size,
+            'seconds': elapsed,
+            'retries': retries,
+            'throughput': size / elapsed if elapsed else 0.0
+        }
+
+    def _upload_safely(self, file_path, file_name):
+        try:
+            result = self.upload(file_path, file_name)
+            result['status'] = 'ok'
+        except Exception as e:
+            result = {'file_path': file_path, 'status': 'error', 'error': str(e)}
+        return result
+
+    def upload_many(self, files):
+        """
+        Upload many files concurrently
+        Args:
+            files: Paths, or (path, drive_name) pairs
+        Returns the per-file results in input order and aggregate throughput
+        """
+        entries = [(f, None) if isinstance(f, str) else tuple(f) for f in files]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            uploads = list(executor.map(lambda entry: self._upload_safely(*entry), entries))
+        elapsed = time.perf_counter() - start
+
+        total_bytes = sum(u.get('bytes', 0) for u in uploads if u['status'] == 'ok')
+        return {
+            'uploads': uploads,
+            'failed': sum(1 for u in uploads if u['status'] != 'ok'),
+            'retries': sum(u.get('retries', 0) for u in uploads),
+            'bytes': total_bytes,
+            'seconds': elapsed,
+            'throughput': total_bytes / elapsed if elapsed else 0.0
+        }
@@ -3,20 +3,57 @@ Google services authentication and interaction module.
 """
 import os
 import pickle
+import threading
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import build_http
+from .drive_uploader import DriveUploadManager
+
+class ThreadLocalHttp:
+    """
+    httplib2-compatible transport that gives every thread its own authorized
+    connection, so one service object can be shared across threads
+    """
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._local = threading.local()
+
+    def get_http(self):
+        """Return the authorized transport owned by the calling thread"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            # build_http sets the client's default timeout and stops httplib2
+            # from treating the 308s of resumable uploads as redirects
+            http = AuthorizedHttp(self.credentials, http=build_http())
+            self._local.http = http
+        return http
+
+    def request(self, *args, **kwargs):
+        return self.get_http().request(*args, **kwargs)
+
+    def close(self):
+        """Close the calling thread's connection"""
+        http = getattr(self._local, 'http', None)
+        if http is not None:
+            http.close()
+            self._local.http = None
+
 
 class GoogleServices:
-    def __init__(self, scopes=None):
+    def __init__(self, scopes=None, instrumentation=None):
         self.SCOPES = scopes or [
             'https://www.googleapis.com/auth/drive.file',
             'https://www.googleapis.com/auth/docs.readonly',
             'https://www.googleapis.com/auth/drive.readonly'
         ]
         self.credentials = None
+        self._services = {}
+        self._services_lock = threading.Lock()
+        self._http = None
+        self.instrumentation = instrumentation
 
     def authenticate(self):
         """Authenticate with Google services"""
@@ -37,26 +74,41 @@ class GoogleServices:
 
         return self.credentials
 
-    def get_drive_service(self):
-        """Get Google Drive service"""
+    def _get_service(self, api, version):
+        """
+        Build a service once per credentials and scope set and reuse it.
+        Requests go through a per-thread transport, so the shared service
+        object is safe to use from several threads.
+        """
         if not self.credentials:
             self.authenticate()
-        return build('drive', 'v3', credentials=self.credentials)
+
+        with self._services_lock:
+            if self._http is None or self._http.credentials is not self.credentials:
+                # New credentials invalidate every service built with the old ones
+                self._http = ThreadLocalHttp(self.credentials)
+                self._services = {}
+
+            key = (api, version, tuple(self.SCOPES))
+            service = self._services.get(key)
+            if service is None:
+                service = build(api, version, http=self._http)
+                self._services[key] = service
+            return service
+
+    def get_drive_service(self):
+        """Get Google Drive service"""
+        return self._get_service('drive', 'v3')
 
     def get_docs_service(self):
         """Get Google Docs service"""
-        if not self.credentials:
-            self.authenticate()
-        return build('docs', 'v1', credentials=self.credentials)
+        return self._get_service('docs', 'v1')
+
+    def get_upload_manager(self, **options):
+        """Get a DriveUploadManager using this instance's Drive service"""
+        options.setdefault('instrumentation', self.instrumentation)
+        return DriveUploadManager(self, **options)
 
     def upload_file(self, file_path, file_name):
         """Upload file to Google Drive"""
-        service = self.get_drive_service()
-        file_metadata = {'name': file_name}
-        media = MediaFileUpload(file_path, resumable=True)
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
-        return file.get('id')
+        return self.get_upload_manager().upload(file_path, file_name)['file_id']
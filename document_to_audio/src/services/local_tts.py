@@ -0,0 +1,124 @@
+"""
+Offline text-to-speech with Hugging Face transformers.
+
+TransformersTTSBackend runs a VITS model (Meta's MMS-TTS by default)
+locally: many sentences are padded into one batch and synthesized with a
+single forward pass, and loaded models stay in memory for the life of the
+process, so every later document skips the load. A seeded backend gives up
+batching to make every sentence reproducible on its own.
+
+Needs the optional dependencies torch, transformers and lameenc
+(pip install document_to_audio[local-tts]).
+"""
+import threading
+from .tts_backends import TTSBackend
+
+DEFAULT_MODEL_TEMPLATE = 'facebook/mms-tts-{language}'
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_BIT_RATE = 64
+
+# MMS models are named by ISO 639-3 code
+ISO_639_3 = {
+    'en': 'eng', 'fr': 'fra', 'de': 'deu', 'es': 'spa', 'it': 'ita', 'pt': 'por',
+    'nl': 'nld', 'ru': 'rus', 'pl': 'pol', 'tr': 'tur', 'vi': 'vie', 'hi': 'hin',
+}
+
+# Loaded (model, tokenizer) pairs by (model name, device), shared by every backend
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def load_model(model_name, device='cpu'):
+    """Return the (model, tokenizer) for model_name, loading it on first use"""
+    key = (model_name, device)
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            from transformers import AutoTokenizer, VitsModel
+            model = VitsModel.from_pretrained(model_name).to(device)
+            model.eval()
+            _MODELS[key] = (model, AutoTokenizer.from_pretrained(model_name))
+        return _MODELS[key]
+
+
+def unload_models():
+    """Free every loaded model"""
+    with _MODELS_LOCK:
+        _MODELS.clear()
+
+
+def encode_mp3(samples, sample_rate, bit_rate=DEFAULT_BIT_RATE):
+    """Encode mono 16-bit PCM bytes as MP3"""
+    import lameenc
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(bit_rate)
+    encoder.set_in_sample_rate(sample_rate)
+    encoder.set_channels(1)
+    encoder.set_quality(2)
+    return encoder.encode(samples) + encoder.flush()
+
+
+class TransformersTTSBackend(TTSBackend):
+    """Local VITS text-to-speech, synthesizing chunks in padded batches"""
+    name = 'transformers'
+
+    def __init__(self, model_template=DEFAULT_MODEL_TEMPLATE, device='cpu',
+                 batch_size=DEFAULT_BATCH_SIZE, bit_rate=DEFAULT_BIT_RATE, seed=None):
+        """
+        Args:
+            model_template: Model name, with {language} replaced by the
+                ISO 639-3 code of the requested language
+            device: Torch device the model runs on, e.g. 'cuda'
+            batch_size: Chunks synthesized per forward pass
+            bit_rate: MP3 bit rate in kbps
+            seed: Seed of the model's noise. The noise of a batched text
+                depends on the rest of its batch, so with a seed every
+                text is synthesized in a pass of its own and always gives
+                the same audio; batch_size is then ignored
+        """
+        self.model_template = model_template
+        self.device = device
+        self.max_batch_size = batch_size
+        self.bit_rate = bit_rate
+        self.seed = seed
+        # Forward passes share the model; one at a time keeps memory bounded
+        self._lock = threading.Lock()
+
+    def settings(self):
+        return {'model_template': self.model_template, 'bit_rate': self.bit_rate,
+                'seed': self.seed}
+
+    def model_name(self, language):
+        code = ISO_639_3.get(language, language)
+        if len(code) != 3:
+            raise ValueError(f"No ISO 639-3 code known for language: {language}")
+        return self.model_template.format(language=code)
+
+    def warm_up(self, language='en'):
+        """Load the model for language ahead of the first document"""
+        load_model(self.model_name(language), self.device)
+
+    def synthesize(self, text, language='en'):
+        return self.synthesize_batch([text], language)[0]
+
+    def synthesize_batch(self, texts, language='en'):
+        """Synthesize texts with one forward pass per batch_size texts, or per text if seeded"""
+        import torch
+        model, tokenizer = load_model(self.model_name(language), self.device)
+        sample_rate = model.config.sampling_rate
+        batch_size = self.max_batch_size if self.seed is None else 1
+
+        audio = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            inputs = tokenizer(batch, return_tensors='pt', padding=True).to(self.device)
+            with self._lock, torch.inference_mode():
+                if self.seed is not None:
+                    torch.manual_seed(self.seed)
+                output = model(**inputs)
+            # Padding makes every waveform as long as the longest; trim each
+            # to its own length before encoding
+            pcm = (output.waveform.clamp(-1, 1) * 32767).to(torch.int16).cpu()
+            for samples, length in zip(pcm, output.sequence_lengths.tolist()):
+                audio.append(encode_mp3(samples[:length].numpy().tobytes(), sample_rate,
+                                        self.bit_rate))
+        return audio
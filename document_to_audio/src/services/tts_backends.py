@@ -0,0 +1,144 @@
+"""
+Text-to-speech backends used by the audio conversion utilities.
+"""
+import io
+import threading
+import time
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo, no CRC, no padding
+_MP3_FRAME_HEADER = b'\xff\xfb\x90\x64'
+_MP3_FRAME_SIZE = 417
+# Side information for a joint stereo frame; all zeros means a silent frame
+_MP3_SIDE_INFO_SIZE = 32
+# ID3v2.3 tag holding only padding, and an empty ID3v1 trailer, as some
+# encoders wrap every file they produce
+_ID3V2_STUB = b'ID3\x03\x00\x00\x00\x00\x00\x10' + bytes(16)
+_ID3V1_STUB = b'TAG' + bytes(125)
+
+
+class TTSBackend:
+    """Base class for text-to-speech backends"""
+    name = 'base'
+    # Chunks worth handing to synthesize_batch at once; 1 for request-per-chunk services
+    max_batch_size = 1
+
+    def settings(self):
+        """Return the backend settings that affect the generated audio"""
+        return {}
+
+    def synthesize(self, text, language='en'):
+        """Synthesize text and return the MP3 audio as bytes"""
+        raise NotImplementedError
+
+    def synthesize_batch(self, texts, language='en'):
+        """Synthesize several texts; returns their MP3 audio in the same order"""
+        return [self.synthesize(text, language) for text in texts]
+
+    async def synthesize_async(self, text, language='en'):
+        """Synthesize text without blocking the event loop"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.synthesize, text, language)
+
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech backend"""
+    name = 'gtts'
+
+    def __init__(self, tld='com', slow=False):
+        self.tld = tld
+        self.slow = slow
+
+    def settings(self):
+        return {'tld': self.tld, 'slow': self.slow}
+
+    def synthesize(self, text, language='en'):
+        """Synthesize text using gTTS"""
+        # Imported on first use so offline backends never load gTTS
+        from gtts import gTTS
+        tts = gTTS(text=text, lang=language, tld=self.tld, slow=self.slow)
+        buffer = io.BytesIO()
+        tts.write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class LocalTTSBackend(TTSBackend):
+    """
+    Offline stand-in backend that produces silent MP3 frames.
+
+    The text is carried in the ancillary data of the frames so tests can
+    check which chunk ended up where in the assembled output.
+    """
+    name = 'local'
+
+    def __init__(self, latency=0.0, id3_tags=False):
+        """
+        Args:
+            latency: Seconds to sleep per call to simulate a remote service
+            id3_tags: Wrap every segment in ID3 tags like a tagging encoder
+        """
+        self.latency = latency
+        self.id3_tags = id3_tags
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def settings(self):
+        return {'id3_tags': self.id3_tags}
+
+    def synthesize(self, text, language='en'):
+        """Return silent MP3 frames embedding the language and text"""
+        self._count_call()
+        if self.latency:
+            time.sleep(self.latency)
+        return self._encode(text, language)
+
+    async def synthesize_async(self, text, language='en'):
+        """Like synthesize, but simulates latency without blocking the event loop"""
+        self._count_call()
+        if self.latency:
+            import asyncio
+            await asyncio.sleep(self.latency)
+        return self._encode(text, language)
+
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def _encode(self, text, language):
+        payload = f"{language}:{text}".encode('utf-8')
+        capacity = _MP3_FRAME_SIZE - len(_MP3_FRAME_HEADER) - _MP3_SIDE_INFO_SIZE
+        frames = []
+        for start in range(0, max(len(payload), 1), capacity):
+            data = payload[start:start + capacity]
+            frames.append(
+                _MP3_FRAME_HEADER
+                + bytes(_MP3_SIDE_INFO_SIZE)
+                + data.ljust(capacity, b'\x00')
+            )
+        if self.id3_tags:
+            frames = [_ID3V2_STUB] + frames + [_ID3V1_STUB]
+        return b''.join(frames)
+
+
+# Backends selectable by name; the values are module paths relative to
+# this package so that heavy engines are only imported when chosen
+BACKENDS = {
+    'gtts': ('.tts_backends', 'GTTSBackend'),
+    'local': ('.tts_backends', 'LocalTTSBackend'),
+    'transformers': ('.local_tts', 'TransformersTTSBackend'),
+}
+
+
+def create_backend(name, **options):
+    """
+    Create a backend by name
+    Args:
+        name: One of BACKENDS
+        options: Keyword arguments for the backend class
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    import importlib
+    module_name, class_name = BACKENDS[name]
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, class_name)(**options)
@@ -0,0 +1,303 @@
+"""
+Rate-limit-aware scheduling of text-to-speech requests.
+
+ScheduledTTSBackend wraps another backend and is shared by every thread
+synthesizing chunks, so its limits hold across documents and batch stages:
+
+- a token bucket keeps the request rate under the service quota
+- an AIMD limiter adapts the number of requests in flight, growing it by
+  one per window of fast successes and halving it on throttling, errors
+  or latency above the target
+- throttled and failed requests are retried after a jittered exponential
+  delay, or after the server's Retry-After
+- a circuit breaker fails fast while the service keeps failing, then lets
+  a single probe through to test whether it has recovered
+"""
+import random
+import threading
+import time
+from .tts_backends import TTSBackend
+from ..utils.instrumentation import NULL_INSTRUMENTATION
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+THROTTLED_STATUSES = {429}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend that keeps failing"""
+    def __init__(self, retry_in):
+        super().__init__(f"TTS backend unavailable; retrying in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+def _response_of(error):
+    # gTTS keeps the response as rsp, requests as response and
+    # googleapiclient as resp; urllib's HTTPError is the response itself
+    for attribute in ('rsp', 'response', 'resp'):
+        response = getattr(error, attribute, None)
+        if response is not None:
+            return response
+    return error
+
+
+def error_status(error):
+    """Return the HTTP status behind a backend error, or None"""
+    response = _response_of(error)
+    for attribute in ('status_code', 'status', 'code'):
+        status = getattr(response, attribute, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def retry_after(error):
+    """Return the Retry-After delay in seconds sent with a backend error, or None"""
+    headers = getattr(_response_of(error), 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        # HTTP dates are rare for TTS services; fall back to the backoff
+        return None
+
+
+def is_retryable(error):
+    """Whether a backend error is a throttling, server or network error worth retrying"""
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        from requests import exceptions
+    except ImportError:
+        pass
+    else:
+        # requests' ConnectionError isn't the builtin one
+        if isinstance(error, (exceptions.ConnectionError, exceptions.Timeout)):
+            return True
+    # gTTS raises its own error, without a response, from the network error
+    cause = error.__cause__ or error.__context__
+    return cause is not None and is_retryable(cause)
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts up to capacity"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Hold every request back for seconds, e.g. as asked by Retry-After"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted by additive increase, multiplicative decrease
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, latency_target=None,
+                 decrease_factor=0.5):
+        """
+        Args:
+            initial: Requests in flight to start with
+            minimum: Lowest the limit is decreased to
+            maximum: Highest the limit is increased to
+            latency_target: Seconds above which a successful request counts
+                as a congestion signal; None adapts to errors only
+            decrease_factor: Factor the limit is multiplied by on congestion
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, congested):
+        """
+        Free the slot of a request started at started and adapt the limit
+        Args:
+            started: Value returned by acquire
+            congested: Whether the request was throttled or failed
+        """
+        now = time.monotonic()
+        latency = now - started
+        if self.latency_target is not None and latency > self.latency_target:
+            congested = True
+        with self._condition:
+            self.in_flight -= 1
+            if congested:
+                # Requests in flight when the limit dropped report the same
+                # congestion; count it once per round trip
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                # One more request in flight per limit's worth of successes
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_timeout lets one probe through"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == 'open' and remaining <= 0:
+                # Only the probe goes through until its outcome is known
+                self.state = 'half-open'
+                return
+            raise CircuitOpenError(max(0.0, remaining))
+
+    def record(self, success):
+        with self._lock:
+            if success:
+                self.state = 'closed'
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class ScheduledTTSBackend(TTSBackend):
+    """
+    Backend wrapper applying a rate limit, adaptive concurrency, retries and
+    a circuit breaker. Its name and settings are those of the wrapped
+    backend, so synthesized audio stays cached under the same keys.
+    """
+
+    def __init__(self, backend, rate=None, burst=None, initial_concurrency=4,
+                 max_concurrency=16, latency_target=None, max_retries=5,
+                 backoff_base=0.5, backoff_max=30.0, failure_threshold=5,
+                 reset_timeout=30.0, instrumentation=None):
+        """
+        Args:
+            backend: Backend the requests are sent to
+            rate: Requests per second allowed on average; None for no limit
+            burst: Requests that may be sent at once after an idle period
+            initial_concurrency: Requests in flight to start with
+            max_concurrency: Upper bound for the adaptive concurrency limit
+            latency_target: Seconds per request above which concurrency is reduced
+            max_retries: Retries of a throttled or failed request
+            backoff_base: First retry delay in seconds, doubled on each retry
+            backoff_max: Upper bound for a single retry delay
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+            instrumentation: Receives throttling, retry and limit metrics
+        """
+        self.backend = backend
+        self.name = backend.name
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.limiter = AdaptiveLimiter(initial_concurrency, maximum=max_concurrency,
+                                       latency_target=latency_target)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+
+    def settings(self):
+        return self.backend.settings()
+
+    def _backoff(self, attempt, error):
+        """Seconds to wait before the next attempt: full jitter, or Retry-After"""
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        return delay
+
+    @property
+    def max_batch_size(self):
+        return self.backend.max_batch_size
+
+    def synthesize(self, text, language='en'):
+        return self._schedule(self.backend.synthesize, text, language)
+
+    def synthesize_batch(self, texts, language='en'):
+        """A batch is scheduled as a single request"""
+        return self._schedule(self.backend.synthesize_batch, texts, language)
+
+    def _schedule(self, request, *args):
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if self.bucket is not None:
+                self.bucket.acquire()
+            started = self.limiter.acquire()
+            try:
+                audio = request(*args)
+            except Exception as e:
+                retryable = is_retryable(e)
+                throttled = error_status(e) in THROTTLED_STATUSES
+                self.limiter.release(started, congested=retryable)
+                # Throttled or rejected requests mean the service is up;
+                # only failures worth retrying trip the breaker
+                self.breaker.record(success=throttled or not retryable)
+                self.instrumentation.gauge('tts_concurrency_limit', self.limiter.limit)
+                attempt += 1
+                if not retryable or attempt > self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                if throttled:
+                    self.instrumentation.count('tts_throttled')
+                    if self.bucket is not None:
+                        # Everyone waits, not only the request that was refused
+                        self.bucket.pause(delay)
+                self.instrumentation.count('tts_retries', status=error_status(e))
+                time.sleep(delay)
+                continue
+
+            self.limiter.release(started, congested=False)
+            self.breaker.record(success=True)
+            self.instrumentation.gauge('tts_concurrency_limit', self.limiter.limit)
+            return audio
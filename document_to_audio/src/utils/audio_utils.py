@@ -1,10 +1,332 @@
 """
 Audio conversion utilities.
 """
-from gtts import gTTS
+import itertools
+import os
+import re
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from ..services.tts_backends import GTTSBackend
+from .instrumentation import NULL_INSTRUMENTATION
+from .mp3_assembly import assemble_segments, build_id3v2_tag, strip_id3_tags
+from .storage.segments import write_manifest
+from .storage.tts_cache import make_cache_key
+from .text_normalization import iter_sentence_chunks
+
+# Characters per synthesis request; large enough to keep request overhead
+# low, small enough that a long document fans out across the workers
+DEFAULT_CHUNK_CHARS = 1500
+DEFAULT_MAX_WORKERS = 4
+# A short first chunk gets the first audio to a streaming listener sooner
+DEFAULT_FIRST_CHUNK_CHARS = 200
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s')
+_WHITESPACE = re.compile(r'\s')
+
+
+def _find_chunk_boundary(window, max_chars):
+    """Return the index at which to cut window so the head fits in max_chars"""
+    # Prefer paragraph breaks, then sentence ends, then any whitespace, as
+    # long as the cut doesn't leave a uselessly small chunk behind
+    for pattern, min_cut in ((_PARAGRAPH_BREAK, max_chars // 2),
+                             (_SENTENCE_END, max_chars // 4),
+                             (_WHITESPACE, 1)):
+        cut = None
+        for match in pattern.finditer(window):
+            cut = match.end()
+        if cut is not None and cut >= min_cut:
+            return cut
+
+    return max_chars
+
+
+def iter_text_chunks(text, max_chars=DEFAULT_CHUNK_CHARS, first_chunk_chars=None):
+    """
+    Yield chunks of at most max_chars characters, split at paragraph and
+    sentence boundaries where possible.
+
+    Args:
+        text: A string, or an iterable of strings (e.g. one per page)
+        max_chars: Maximum length of a single chunk
+        first_chunk_chars: Smaller limit for the first chunk only
+    """
+    pieces = [text] if isinstance(text, str) else text
+    limit = first_chunk_chars or max_chars
+    buffer = ''
+    for piece in pieces:
+        buffer = buffer + piece if buffer else piece
+        start = 0
+        while len(buffer) - start > limit:
+            window = buffer[start:start + limit + 1]
+            cut = start + _find_chunk_boundary(window, limit)
+            chunk = buffer[start:cut].strip()
+            start = cut
+            while start < len(buffer) and buffer[start].isspace():
+                start += 1
+            if chunk:
+                limit = max_chars
+                yield chunk
+        buffer = buffer[start:]
+
+    chunk = buffer.strip()
+    if chunk:
+        yield chunk
+
+
+def split_text(text, max_chars=DEFAULT_CHUNK_CHARS):
+    """Split text into a list of synthesis-sized chunks"""
+    return list(iter_text_chunks(text, max_chars))
+
+
+def synthesize_chunk(chunk, backend, language='en', cache=None):
+    """Synthesize a single chunk, going through the cache when one is given"""
+    if cache is None:
+        return backend.synthesize(chunk, language)
+
+    key = cache.make_key(chunk, language, backend)
+    audio = cache.get(key)
+    if audio is None:
+        audio = backend.synthesize(chunk, language)
+        cache.put(key, audio)
+    return audio
+
+
+def synthesize_chunk_to_file(chunk, backend, language, cache, spool_path):
+    """
+    Make the audio for chunk available on disk and return its
+    (path, offset, length). Fresh audio is written to spool_path; cache hits
+    are referenced where they are instead of being read.
+    """
+    key = None
+    if cache is not None:
+        key = cache.make_key(chunk, language, backend)
+        byte_range = cache.get_range(key, spool_path)
+        if byte_range is not None:
+            return byte_range
+
+    audio = backend.synthesize(chunk, language)
+    with open(spool_path, 'wb') as f:
+        f.write(audio)
+    if cache is not None:
+        cache.put(key, audio)
+    return spool_path, 0, len(audio)
+
+
+def synthesize_chunk_batch(chunks, backend, language='en', cache=None, spool_paths=None):
+    """
+    Synthesize several chunks with one synthesize_batch call for the cache
+    misses. Returns the audio of each chunk, or with spool_paths its
+    (path, offset, length) as from synthesize_chunk_to_file.
+    """
+    results = [None] * len(chunks)
+    keys = [None] * len(chunks)
+    if cache is not None:
+        for i, chunk in enumerate(chunks):
+            keys[i] = cache.make_key(chunk, language, backend)
+            if spool_paths is None:
+                results[i] = cache.get(keys[i])
+            else:
+                results[i] = cache.get_range(keys[i], spool_paths[i])
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+    audio = backend.synthesize_batch([chunks[i] for i in missing], language)
+    for i, data in zip(missing, audio):
+        if spool_paths is None:
+            results[i] = data
+        else:
+            with open(spool_paths[i], 'wb') as f:
+                f.write(data)
+            results[i] = (spool_paths[i], 0, len(data))
+        if cache is not None:
+            cache.put(keys[i], data)
+    return results
+
+
+def _batched(chunks, size):
+    iterator = iter(chunks)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_piece_chunks(text, max_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Chunk every piece (page, paragraph) on its own, so an edit to one piece
+    never shifts the chunk boundaries of the others
+    """
+    pieces = [text] if isinstance(text, str) else text
+    for piece in pieces:
+        yield from iter_text_chunks(piece, max_chars)
+
+
+def _iter_synthesized(chunks, backend, language, max_workers, cache, spool_dir=None):
+    """
+    Yield (chunk, audio) pairs in chunk order from a bounded worker pool.
+    With a spool_dir, audio is a (path, offset, length) file range instead
+    of bytes.
+    """
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    max_in_flight = max_workers * 2
+    # Backends that synthesize several chunks per call get them in batches
+    batch_size = getattr(backend, 'max_batch_size', 1)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            index = 0
+            for batch in _batched(chunks, batch_size):
+                spool_paths = None
+                if spool_dir is not None:
+                    spool_paths = [os.path.join(spool_dir, f"{index + i:06d}.mp3")
+                                   for i in range(len(batch))]
+                index += len(batch)
+                if batch_size > 1:
+                    future = executor.submit(synthesize_chunk_batch, batch, backend,
+                                             language, cache, spool_paths)
+                elif spool_paths is None:
+                    future = executor.submit(synthesize_chunk, batch[0], backend, language, cache)
+                else:
+                    future = executor.submit(synthesize_chunk_to_file, batch[0], backend,
+                                             language, cache, spool_paths[0])
+                pending.append((batch, future))
+                if len(pending) >= max_in_flight:
+                    yield from _batch_results(*pending.popleft(), batch_size)
+            while pending:
+                yield from _batch_results(*pending.popleft(), batch_size)
+        finally:
+            # Don't keep synthesizing if the caller failed or stopped early
+            for _, future in pending:
+                future.cancel()
+
+
+def _batch_results(batch, future, batch_size):
+    results = future.result()
+    return zip(batch, results if batch_size > 1 else [results])
+
+
+def iter_synthesized_segments(chunks, backend, language='en', max_workers=None,
+                              cache=None):
+    """
+    Synthesize chunks on a bounded worker pool and yield the audio segments
+    in the same order as the chunks.
+
+    Only a small window of chunks is in flight at any time, so chunks can
+    come from a generator that is still producing text.
+    """
+    for _, audio in _iter_synthesized(chunks, backend, language, max_workers, cache):
+        yield audio
+
+
+def stream_text_to_audio(text, language='en', backend=None, max_workers=None,
+                         max_chunk_chars=DEFAULT_CHUNK_CHARS, cache=None, output_path=None,
+                         first_chunk_chars=DEFAULT_FIRST_CHUNK_CHARS, sentence_chunks=False):
+    """
+    Yield MP3 bytes segment by segment, in order, as soon as each one is
+    synthesized. ID3 tags are stripped from the segments so they
+    concatenate into a playable MP3, and the generator can be handed to an
+    HTTP response for chunked delivery.
+
+    Args:
+        text: Text to convert, or an iterable of text pieces
+        output_path: If given, each segment is also appended and flushed to
+            this file, so it can be played while it grows
+        first_chunk_chars: Size of the first chunk, kept small so the
+            first audio arrives quickly
+        (other arguments as for convert_text_to_audio)
+    """
+    backend = backend or GTTSBackend()
+    if sentence_chunks:
+        chunks = iter_sentence_chunks(text, max_chunk_chars, first_chunk_chars)
+    else:
+        chunks = iter_text_chunks(text, max_chunk_chars, first_chunk_chars)
+    segments = (strip_id3_tags(audio) for audio in
+                iter_synthesized_segments(chunks, backend, language, max_workers, cache))
+
+    if output_path is None:
+        yield from segments
+        return
+
+    with open(output_path, 'wb') as f:
+        for audio in segments:
+            f.write(audio)
+            f.flush()
+            yield audio
+
+
+def convert_text_to_audio(text, output_path, language='en', backend=None,
+                          max_workers=None, max_chunk_chars=DEFAULT_CHUNK_CHARS,
+                          cache=None, manifest_path=None, tags=None, instrumentation=None,
+                          sentence_chunks=False):
+    """
+    Convert text to audio, synthesizing chunks in parallel.
+
+    Segments are spooled to disk next to output_path (cache hits are linked
+    rather than copied) and assembled once synthesis finishes, with in-kernel
+    copies into a preallocated file, so memory use stays flat however long
+    the document is. Needs free disk space for about twice the audio.
+
+    Args:
+        text: Text to convert, or an iterable of text pieces
+        output_path: Path of the MP3 file to write
+        language: Language code understood by the backend
+        backend: TTSBackend instance, defaults to gTTS
+        max_workers: Number of chunks synthesized concurrently
+        max_chunk_chars: Maximum characters sent to the backend per request
+        cache: Optional TTSCache reused for chunks synthesized before
+        manifest_path: If given, chunk each piece separately and write the
+            fingerprint and byte range of every segment to this file, so a
+            later conversion can reuse unchanged segments
+        tags: ID3 text fields for the whole file ('title', 'artist', 'album');
+            the ID3 tags of individual segments are always dropped
+        instrumentation: Receives chunk and byte counts and the assembly time
+        sentence_chunks: Pack whole sentences into chunks, recognizing
+            abbreviations and initials, instead of cutting at the last
+            sentence-like break in each window
+    """
+    backend = backend or GTTSBackend()
+    instrumentation = instrumentation or NULL_INSTRUMENTATION
+    if sentence_chunks:
+        chunks = iter_sentence_chunks(text, max_chunk_chars, per_piece=bool(manifest_path))
+    elif manifest_path:
+        chunks = iter_piece_chunks(text, max_chunk_chars)
+    else:
+        chunks = iter_text_chunks(text, max_chunk_chars)
+    ranges = []
+    fingerprints = []
+    spool_dir = tempfile.mkdtemp(prefix='.segments-',
+                                 dir=os.path.dirname(os.path.abspath(output_path)))
+
+    try:
+        for chunk, byte_range in _iter_synthesized(chunks, backend, language, max_workers,
+                                                   cache, spool_dir):
+            ranges.append(byte_range)
+            if manifest_path:
+                fingerprints.append(make_cache_key(chunk, language, backend))
+        if not ranges:
+            raise ValueError("No text to convert to audio")
+
+        with instrumentation.span('assemble'):
+            layout = assemble_segments(ranges, output_path, build_id3v2_tag(**(tags or {})))
+        instrumentation.count('tts_chunks', len(ranges))
+        # The synthesized audio, not counting the file's ID3 tag
+        instrumentation.count('audio_bytes', sum(length for _, length in layout))
+        if manifest_path:
+            write_manifest(manifest_path, [
+                {'offset': offset, 'length': length, 'fingerprint': fingerprint}
+                for (offset, length), fingerprint in zip(layout, fingerprints)
+            ])
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
 
-def convert_text_to_audio(text, output_path, language='en'):
-    """Convert text to audio using gTTS"""
-    tts = gTTS(text=text, lang=language)
-    tts.save(output_path)
     return output_path
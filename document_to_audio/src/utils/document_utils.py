@@ -1,34 +1,168 @@
 """
 Document processing utilities for different file formats.
+
+The parsing libraries are imported by the functions that need them, so
+importing this module doesn't pay for formats that are never converted.
 """
-from PyPDF2 import PdfReader
-from docx import Document
+import os
+from collections import deque
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF file"""
-    text = ""
+# Below this many pages, process start-up costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 50
+PDF_TASKS_PER_WORKER = 4
+# DOCX extraction backends: python-docx reads body paragraphs from the full
+# document model; 'xml' streams every part including tables and notes;
+# 'auto' streams files of at least DOCX_STREAMING_MIN_BYTES
+DOCX_BACKENDS = ('python-docx', 'xml', 'auto')
+DOCX_STREAMING_MIN_BYTES = 5 * 1024 * 1024
+
+def _extract_pdf_page_range(pdf_path, start, stop):
+    """Extract the text of pages start..stop-1; runs in a worker process"""
+    from PyPDF2 import PdfReader
     reader = PdfReader(pdf_path)
+    return [reader.pages[index].extract_text() for index in range(start, stop)]
+
+def _iter_pdf_pages_parallel(pdf_path, page_count, workers):
+    """Extract page ranges in a process pool and yield pages in order"""
+    # Several ranges per worker keeps the pool busy when page complexity
+    # varies, and lets the first pages come back before the last are done
+    from concurrent.futures import ProcessPoolExecutor
+    pages_per_task = max(1, -(-page_count // (workers * PDF_TASKS_PER_WORKER)))
+    ranges = deque(
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    )
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < workers * 2:
+                    start, stop = ranges.popleft()
+                    pending.append(executor.submit(_extract_pdf_page_range, pdf_path, start, stop))
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def iter_pdf_pages(pdf_path, workers=1, parallel_min_pages=PDF_PARALLEL_MIN_PAGES):
+    """
+    Yield the text of each PDF page, in page order, as soon as it is parsed
+    Args:
+        pdf_path: Path of the PDF file
+        workers: Number of processes extracting pages; 1 keeps extraction in-process
+        parallel_min_pages: Minimum page count before the process pool is used
+    """
+    from PyPDF2 import PdfReader
+    reader = PdfReader(pdf_path)
+    page_count = len(reader.pages)
+    if workers > 1 and page_count >= parallel_min_pages:
+        yield from _iter_pdf_pages_parallel(pdf_path, page_count, workers)
+        return
+
     for page in reader.pages:
-        text += page.extract_text()
-    return text
+        yield page.extract_text()
 
-def extract_text_from_docx(docx_path):
-    """Extract text from DOCX file"""
+def extract_text_from_pdf(pdf_path, workers=1, parallel_min_pages=PDF_PARALLEL_MIN_PAGES):
+    """Extract text from PDF file"""
+    return "".join(iter_pdf_pages(pdf_path, workers, parallel_min_pages))
+
+def _iter_python_docx_paragraphs(docx_path):
+    from docx import Document
     doc = Document(docx_path)
-    return " ".join([paragraph.text for paragraph in doc.paragraphs])
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+
+def iter_docx_paragraphs(docx_path, backend='python-docx', workers=1):
+    """
+    Yield the text of each DOCX paragraph, space separated
+    Args:
+        docx_path: Path of the DOCX file
+        backend: One of DOCX_BACKENDS
+        workers: Parts the 'xml' backend parses at once
+    """
+    if backend not in DOCX_BACKENDS:
+        raise ValueError(f"Unknown DOCX backend: {backend}")
+    if backend == 'auto':
+        backend = 'xml' if os.path.getsize(docx_path) >= DOCX_STREAMING_MIN_BYTES else 'python-docx'
+
+    if backend == 'xml':
+        from .docx_xml import iter_docx_text
+        paragraphs = iter_docx_text(docx_path, workers=workers)
+    else:
+        paragraphs = _iter_python_docx_paragraphs(docx_path)
+    for index, text in enumerate(paragraphs):
+        yield f" {text}" if index else text
+
+def extract_text_from_docx(docx_path, backend='python-docx'):
+    """Extract text from DOCX file"""
+    return "".join(iter_docx_paragraphs(docx_path, backend))
+
+def _google_doc_content_mask(depth):
+    """Field mask for a list of structural elements, following nested tables depth levels"""
+    fields = "paragraph(elements(textRun/content,footnoteReference/footnoteId))"
+    if depth:
+        fields += f",table/tableRows/tableCells/content({_google_doc_content_mask(depth - 1)})"
+    return fields
+
+# Tables nested deeper than this are not requested
+GOOGLE_DOC_TABLE_DEPTH = 3
+# Only the text-bearing parts of the document; styles, lists and inline
+# objects make up most of a full Docs response
+GOOGLE_DOC_FIELDS = (
+    "documentId,title,revisionId,"
+    f"body/content({_google_doc_content_mask(GOOGLE_DOC_TABLE_DEPTH)}),"
+    "headers,footers,footnotes"
+)
+
+def fetch_google_doc(service, doc_id, fields=GOOGLE_DOC_FIELDS):
+    """Fetch the text-bearing fields of a Google Doc"""
+    return service.documents().get(documentId=doc_id, fields=fields).execute()
+
+def get_google_doc_revision(service, doc_id):
+    """Return the current revisionId of a Google Doc without fetching its content"""
+    return fetch_google_doc(service, doc_id, fields='revisionId').get('revisionId')
+
+def _collect_google_doc_text(content, parts, footnote_ids):
+    """Append the text of structural elements to parts, in reading order"""
+    for element in content or ():
+        if 'paragraph' in element:
+            for item in element['paragraph'].get('elements', ()):
+                if 'textRun' in item:
+                    parts.append(item['textRun'].get('content', ''))
+                elif 'footnoteReference' in item:
+                    footnote_ids.append(item['footnoteReference'].get('footnoteId'))
+        elif 'table' in element:
+            for row in element['table'].get('tableRows', ()):
+                for cell in row.get('tableCells', ()):
+                    _collect_google_doc_text(cell.get('content'), parts, footnote_ids)
+
+def google_doc_text(document, include_headers_footers=True, include_footnotes=True):
+    """
+    Return the text of a Google Docs document resource: headers, then the
+    body including table cells, then footers, then footnotes in the order
+    they are referenced. Text is collected in a list and joined once.
+    """
+    parts = []
+    footnote_ids = []
+    if include_headers_footers:
+        for header in document.get('headers', {}).values():
+            _collect_google_doc_text(header.get('content'), parts, footnote_ids)
+    _collect_google_doc_text(document.get('body', {}).get('content'), parts, footnote_ids)
+    if include_headers_footers:
+        for footer in document.get('footers', {}).values():
+            _collect_google_doc_text(footer.get('content'), parts, footnote_ids)
+    if include_footnotes:
+        footnotes = document.get('footnotes', {})
+        for footnote_id in footnote_ids:
+            footnote = footnotes.get(footnote_id)
+            if footnote is not None:
+                _collect_google_doc_text(footnote.get('content'), parts, [])
+    return "".join(parts)
 
 def extract_text_from_google_doc(service, doc_id):
     """Extract text from Google Doc using its ID"""
-    doc = service.documents().get(documentId=doc_id).execute()
-    
-    text = ''
-    for content in doc.get('body').get('content'):
-        if 'paragraph' in content:
-            for element in content.get('paragraph').get('elements'):
-                if 'textRun' in element:
-                    text += element.get('textRun').get('content')
-    
-    return text
+    return google_doc_text(fetch_google_doc(service, doc_id))
 
 def get_google_doc_id_from_url(url):
     """Extract Google Doc ID from URL"""
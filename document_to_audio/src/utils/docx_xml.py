@@ -0,0 +1,167 @@
+"""
+Streaming DOCX text extraction straight from the WordprocessingML parts.
+
+Unlike python-docx, which loads the whole document model, the parts are
+parsed incrementally and each paragraph is discarded once its text has
+been yielded, so memory stays bounded however large the document is.
+Table cells, headers, footers, footnotes and endnotes are included.
+"""
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+DOCUMENT_PART = 'word/document.xml'
+_HEADER_PART = re.compile(r'word/header(\d*)\.xml$')
+_FOOTER_PART = re.compile(r'word/footer(\d*)\.xml$')
+_NOTE_PARTS = (('word/footnotes.xml', 'footnote'), ('word/endnotes.xml', 'endnote'))
+
+# Run-level elements that stand for characters
+_SPECIAL_CHARACTERS = {
+    _W + 'tab': '\t',
+    _W + 'br': '\n',
+    _W + 'cr': '\n',
+    _W + 'noBreakHyphen': '-',
+}
+_NOTE_REFERENCES = {
+    _W + 'footnoteReference': 'footnote',
+    _W + 'endnoteReference': 'endnote',
+}
+
+
+def iter_part_paragraphs(docx_path, part_name, note_tag=None, note_references=None):
+    """
+    Yield the text of each paragraph of one XML part, in document order.
+    Table cells are yielded row by row, and text boxes before the
+    paragraph that anchors them.
+
+    Args:
+        docx_path: Path of the DOCX file
+        part_name: Name of the part inside the zip, e.g. 'word/document.xml'
+        note_tag: 'footnote' or 'endnote' to yield (note_id, text) pairs
+            for a notes part instead, skipping the separator notes
+        note_references: List to append ('footnote'|'endnote', note_id) to
+            for every note referenced, in order
+    """
+    with zipfile.ZipFile(docx_path) as archive, archive.open(part_name) as stream:
+        stack = []
+        paragraphs = []
+        fallback_depth = 0
+        note_id = None
+        skip_note = False
+
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                stack.append(element)
+                if tag == _MC_FALLBACK:
+                    # The fallback repeats the content of the preferred choice
+                    fallback_depth += 1
+                elif tag == _W + 'p' and not fallback_depth:
+                    paragraphs.append([])
+                elif note_tag and tag == _W + note_tag:
+                    note_id = element.get(_W + 'id')
+                    skip_note = element.get(_W + 'type') in ('separator', 'continuationSeparator',
+                                                            'continuationNotice')
+                continue
+
+            stack.pop()
+            if tag == _MC_FALLBACK:
+                fallback_depth -= 1
+            elif fallback_depth or skip_note:
+                pass
+            elif tag == _W + 't' and paragraphs:
+                paragraphs[-1].append(element.text or '')
+            elif tag in _SPECIAL_CHARACTERS and paragraphs:
+                paragraphs[-1].append(_SPECIAL_CHARACTERS[tag])
+            elif tag in _NOTE_REFERENCES and note_references is not None:
+                note_references.append((_NOTE_REFERENCES[tag], element.get(_W + 'id')))
+            elif tag == _W + 'p':
+                text = ''.join(paragraphs.pop())
+                element.clear()
+                yield (note_id, text) if note_tag else text
+
+            # Drop finished content; the body or notes element would otherwise
+            # keep every paragraph alive until the end of the part
+            if len(stack) <= 2:
+                element.clear()
+                if stack:
+                    stack[-1].clear()
+
+
+def _part_names(docx_path):
+    with zipfile.ZipFile(docx_path) as archive:
+        names = archive.namelist()
+
+    def numbered(pattern):
+        found = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1) or 0), name))
+        return [name for _, name in sorted(found)]
+
+    notes = [(part, tag) for part, tag in _NOTE_PARTS if part in names]
+    return numbered(_HEADER_PART), numbered(_FOOTER_PART), notes
+
+
+def _read_paragraphs(docx_path, part_name):
+    return [text for text in iter_part_paragraphs(docx_path, part_name) if text.strip()]
+
+
+def _read_notes(docx_path, part_name, note_tag):
+    notes = {}
+    for note_id, text in iter_part_paragraphs(docx_path, part_name, note_tag):
+        if text.strip():
+            notes.setdefault(note_id, []).append(text)
+    return notes
+
+
+def iter_docx_text(docx_path, include_headers_footers=True, include_notes=True, workers=1):
+    """
+    Yield the paragraphs holding text of a DOCX file in reading order: headers,
+    the body including tables, footers, then footnotes and endnotes in the
+    order they are referenced.
+
+    Args:
+        docx_path: Path of the DOCX file
+        include_headers_footers: Whether to read the header and footer parts
+        include_notes: Whether to read the footnote and endnote parts
+        workers: Parts parsed at once; beyond the first, threads parse the
+            header, footer and note parts while the body streams
+    """
+    headers, footers, notes = _part_names(docx_path)
+    if not include_headers_footers:
+        headers, footers = [], []
+    if not include_notes:
+        notes = []
+
+    executor = ThreadPoolExecutor(max_workers=workers - 1) if workers > 1 else None
+    try:
+        def submit(func, *args):
+            if executor is None:
+                return lambda: func(*args)
+            return executor.submit(func, *args).result
+
+        header_results = [submit(_read_paragraphs, docx_path, part) for part in headers]
+        footer_results = [submit(_read_paragraphs, docx_path, part) for part in footers]
+        note_results = [(tag, submit(_read_notes, docx_path, part, tag)) for part, tag in notes]
+
+        references = []
+        for result in header_results:
+            yield from result()
+        for text in iter_part_paragraphs(docx_path, DOCUMENT_PART, note_references=references):
+            if text.strip():
+                yield text
+        for result in footer_results:
+            yield from result()
+
+        texts = {tag: result() for tag, result in note_results}
+        for tag, note_id in references:
+            yield from texts.get(tag, {}).get(note_id, ())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+"""
+Timers, counters and tracing hooks for the conversion pipeline.
+
+Components take an optional instrumentation object and default to
+NULL_INSTRUMENTATION, whose methods do nothing, so an uninstrumented
+conversion only pays for a few no-op calls per stage.
+"""
+import json
+import threading
+import time
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullInstrumentation:
+    """Instrumentation that records nothing"""
+    enabled = False
+
+    def span(self, name, **attributes):
+        """Context manager timing the enclosed block as the named stage"""
+        return _NULL_SPAN
+
+    def observe(self, name, seconds, **attributes):
+        """Record a duration measured outside a span"""
+
+    def count(self, name, value=1, **attributes):
+        """Add value to the named counter"""
+
+    def gauge(self, name, value, **attributes):
+        """Set the named gauge to value"""
+
+    def timed_iter(self, name, iterable, count_name=None, measure=len):
+        """
+        Return iterable, timing the time spent producing its items as the
+        named stage and adding measure(item) of every item to count_name
+        """
+        return iterable
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class _Span:
+    __slots__ = ('instrumentation', 'name', 'attributes', 'parent', 'start')
+
+    def __init__(self, instrumentation, name, attributes):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.attributes = attributes
+        self.parent = None
+        self.start = None
+
+    def __enter__(self):
+        stack = self.instrumentation._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.instrumentation._stack().pop()
+        self.instrumentation._record_span(self, seconds, error=exc_type is not None)
+        return False
+
+    def set(self, **attributes):
+        """Attach attributes to the span, e.g. sizes known only at the end"""
+        self.attributes.update(attributes)
+
+
+class Instrumentation(NullInstrumentation):
+    """
+    Aggregates span timings, counters and gauges in memory and forwards
+    every event to the sinks
+    """
+    enabled = True
+
+    def __init__(self, sinks=()):
+        """
+        Args:
+            sinks: Callables receiving each event as a dict with 'type'
+                ('span', 'counter' or 'gauge'), 'name' and 'attributes', plus
+                'seconds', 'parent' and 'error' for spans or 'value' otherwise
+        """
+        self.sinks = list(sinks)
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _emit(self, event):
+        for sink in self.sinks:
+            sink(event)
+
+    def _record_span(self, span, seconds, error=False):
+        self._add_timing(span.name, seconds)
+        if self.sinks:
+            self._emit({'type': 'span', 'name': span.name, 'seconds': seconds,
+                        'parent': span.parent, 'error': error,
+                        'attributes': span.attributes})
+
+    def _add_timing(self, name, seconds):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = {'count': 0, 'total_seconds': 0.0,
+                                               'max_seconds': 0.0}
+            timing['count'] += 1
+            timing['total_seconds'] += seconds
+            timing['max_seconds'] = max(timing['max_seconds'], seconds)
+
+    def span(self, name, **attributes):
+        return _Span(self, name, attributes)
+
+    def observe(self, name, seconds, **attributes):
+        self._add_timing(name, seconds)
+        if self.sinks:
+            stack = self._stack()
+            self._emit({'type': 'span', 'name': name, 'seconds': seconds,
+                        'parent': stack[-1].name if stack else None, 'error': False,
+                        'attributes': attributes})
+
+    def count(self, name, value=1, **attributes):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.sinks:
+            self._emit({'type': 'counter', 'name': name, 'value': value,
+                        'attributes': attributes})
+
+    def gauge(self, name, value, **attributes):
+        with self._lock:
+            self.gauges[name] = value
+        if self.sinks:
+            self._emit({'type': 'gauge', 'name': name, 'value': value,
+                        'attributes': attributes})
+
+    def timed_iter(self, name, iterable, count_name=None, measure=len):
+        iterator = iter(iterable)
+        elapsed = 0.0
+        total = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                if count_name:
+                    total += measure(item)
+                yield item
+        finally:
+            self.observe(name, elapsed)
+            if count_name:
+                self.count(count_name, total)
+
+    def snapshot(self):
+        """Return a copy of the aggregated counters, gauges and timings"""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'timings': {name: dict(timing) for name, timing in self.timings.items()}
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
+
+
+def to_json(instrumentation, **kwargs):
+    """Export the aggregated metrics as a JSON document"""
+    return json.dumps(instrumentation.snapshot(), sort_keys=True, **kwargs)
+
+
+def to_prometheus(instrumentation, prefix='doc_to_audio'):
+    """Export the aggregated metrics in the Prometheus text exposition format"""
+    snapshot = instrumentation.snapshot()
+    lines = []
+    for name, value in sorted(snapshot['counters'].items()):
+        metric = f"{prefix}_{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, value in sorted(snapshot['gauges'].items()):
+        metric = f"{prefix}_{name}"
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    if snapshot['timings']:
+        metric = f"{prefix}_stage_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, timing in sorted(snapshot['timings'].items()):
+            lines.append(f'{metric}_sum{{stage="{name}"}} {timing["total_seconds"]}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {timing["count"]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,179 @@
+"""
+Assembly of MP3 segments into a single file without routing the audio
+through Python memory.
+"""
+import errno
+import mmap
+import os
+
+ID3V2_HEADER_SIZE = 10
+ID3V1_TAG_SIZE = 128
+_COPY_BLOCK_SIZE = 1024 * 1024
+
+# Errors meaning "this copy primitive can't handle these files"; the next
+# strategy is tried instead
+_UNSUPPORTED_COPY_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                            errno.EOPNOTSUPP, errno.ENOTSUP}
+
+
+def _syncsafe_to_int(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _int_to_syncsafe(value):
+    return bytes(((value >> 21) & 0x7f, (value >> 14) & 0x7f, (value >> 7) & 0x7f, value & 0x7f))
+
+
+def id3v2_length(header):
+    """Return the full length of the ID3v2 tag starting header, or 0 if none"""
+    if len(header) < ID3V2_HEADER_SIZE or header[:3] != b'ID3':
+        return 0
+    length = ID3V2_HEADER_SIZE + _syncsafe_to_int(header[6:10])
+    if header[5] & 0x10:
+        # A footer repeats the header at the end of the tag
+        length += ID3V2_HEADER_SIZE
+    return length
+
+
+def strip_id3_tags(audio):
+    """Return MP3 bytes without a leading ID3v2 tag or trailing ID3v1 tag"""
+    start = id3v2_length(audio[:ID3V2_HEADER_SIZE])
+    end = len(audio)
+    if end - start >= ID3V1_TAG_SIZE and audio[end - ID3V1_TAG_SIZE:end - ID3V1_TAG_SIZE + 3] == b'TAG':
+        end -= ID3V1_TAG_SIZE
+    if start == 0 and end == len(audio):
+        return audio
+    return audio[start:end]
+
+
+def audio_range(path, offset=0, length=None):
+    """
+    Return (offset, length) of the MP3 frames within a byte range of a file,
+    excluding any ID3 tags. Only the tag headers are read.
+    """
+    if length is None:
+        length = os.path.getsize(path) - offset
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        skip = min(id3v2_length(f.read(ID3V2_HEADER_SIZE)), length)
+        end = offset + length
+        if length - skip >= ID3V1_TAG_SIZE:
+            f.seek(end - ID3V1_TAG_SIZE)
+            if f.read(3) == b'TAG':
+                end -= ID3V1_TAG_SIZE
+    return offset + skip, end - offset - skip
+
+
+def build_id3v2_tag(title=None, artist=None, album=None):
+    """Build a minimal ID3v2.3 tag with the given text frames"""
+    frames = b''
+    for frame_id, value in ((b'TIT2', title), (b'TPE1', artist), (b'TALB', album)):
+        if not value:
+            continue
+        # Encoding byte 1 = UTF-16 with BOM, the Unicode option ID3v2.3 has
+        payload = b'\x01' + str(value).encode('utf-16')
+        frames += frame_id + len(payload).to_bytes(4, 'big') + b'\x00\x00' + payload
+    if not frames:
+        return b''
+    return b'ID3\x03\x00\x00' + _int_to_syncsafe(len(frames)) + frames
+
+
+def _copy_with_read(src_fd, dst_fd, offset, count, dst_offset):
+    """Copy through a read-only memory map in bounded blocks"""
+    with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            while count:
+                block = min(count, _COPY_BLOCK_SIZE)
+                written = os.pwrite(dst_fd, view[offset:offset + block], dst_offset)
+                offset += written
+                dst_offset += written
+                count -= written
+        finally:
+            view.release()
+
+
+def copy_range(src_fd, dst_fd, offset, count, dst_offset):
+    """
+    Copy count bytes from src_fd at offset to dst_fd at dst_offset, using
+    copy_file_range or sendfile so the data stays in the kernel, and a
+    memory map where neither is available
+    """
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range is not None:
+        try:
+            while count:
+                copied = copy_file_range(src_fd, dst_fd, count, offset, dst_offset)
+                if not copied:
+                    break
+                offset += copied
+                dst_offset += copied
+                count -= copied
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_COPY_ERRORS:
+                raise
+        if not count:
+            return
+
+    if hasattr(os, 'sendfile'):
+        try:
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            while count:
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+                if not sent:
+                    break
+                offset += sent
+                dst_offset += sent
+                count -= sent
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_COPY_ERRORS:
+                raise
+        if not count:
+            return
+
+    _copy_with_read(src_fd, dst_fd, offset, count, dst_offset)
+
+
+def assemble_segments(segments, output_path, tag=b''):
+    """
+    Join MP3 segments into output_path. Each segment's own ID3 tags are
+    dropped and tag, if given, is written once at the start. The output is
+    preallocated and filled with in-kernel copies, so memory use doesn't
+    grow with the length of the audio.
+
+    Args:
+        segments: (path, offset, length) byte ranges in playback order
+        output_path: File to write
+        tag: Encoded ID3v2 tag for the whole file, e.g. from build_id3v2_tag
+    Returns the (offset, length) of every segment within the output
+    """
+    ranges = [(path,) + audio_range(path, offset, length) for path, offset, length in segments]
+    total = len(tag) + sum(length for _, _, length in ranges)
+
+    layout = []
+    fd = os.open(output_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if total and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, total)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_COPY_ERRORS:
+                    raise
+        if tag:
+            os.pwrite(fd, tag, 0)
+
+        position = len(tag)
+        for path, offset, length in ranges:
+            src_fd = os.open(path, os.O_RDONLY)
+            try:
+                copy_range(src_fd, fd, offset, length, position)
+            finally:
+                os.close(src_fd)
+            layout.append((position, length))
+            position += length
+
+        os.ftruncate(fd, total)
+    finally:
+        os.close(fd)
+
+    return layout
@@ -0,0 +1,346 @@
+"""
+SQLite-backed queue of conversion jobs and their per-chunk checkpoints.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from .tts_cache import make_cache_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL,
+    input TEXT NOT NULL,
+    is_google_doc INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    save_to_drive INTEGER NOT NULL,
+    force INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    heartbeat REAL,
+    created TEXT NOT NULL,
+    finished TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, id);
+CREATE INDEX IF NOT EXISTS jobs_dedup_key ON jobs (dedup_key, status);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    fingerprint TEXT NOT NULL,
+    path TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (job_id, fingerprint)
+);
+"""
+
+# Jobs in these states absorb identical submissions; failed and cancelled
+# jobs are queued again, keeping the chunks they had finished
+ACTIVE_STATUSES = ('queued', 'running', 'done')
+# A Google Doc can change under the same URL, so a done job is run again
+# and the conversion skips the doc if its revision is unchanged
+GOOGLE_DOC_ACTIVE_STATUSES = ('queued', 'running')
+
+
+def submission_key(input_path, is_google_doc, language, save_to_drive, force):
+    """
+    Fingerprint of a submission. Local files are identified by path, size
+    and modification time, so a file edited after it was queued is new work.
+    """
+    if is_google_doc:
+        identity = [input_path]
+    else:
+        stat = os.stat(input_path)
+        identity = [os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns]
+    payload = json.dumps([identity, language, bool(save_to_drive), bool(force)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _row_to_job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    for key in ('is_google_doc', 'save_to_drive', 'force'):
+        job[key] = bool(job[key])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+class JobStore:
+    def __init__(self, db_path):
+        """Open (and create if needed) the job database at db_path"""
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Several processes may share the queue; wait for their writes
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+
+    def submit(self, input_path, is_google_doc, language='en', save_to_drive=False,
+               force=False, priority=0):
+        """
+        Queue a conversion and return its job ID. A submission identical to
+        a job that is queued, running or done returns that job's ID instead;
+        one identical to a failed or cancelled job queues that job again, as
+        does one identical to a done Google Doc job.
+        """
+        active = GOOGLE_DOC_ACTIVE_STATUSES if is_google_doc else ACTIVE_STATUSES
+        dedup_key = submission_key(input_path, is_google_doc, language, save_to_drive, force)
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes
+            # can't both find no duplicate and insert one each
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, status FROM jobs WHERE dedup_key = ? ORDER BY id DESC LIMIT 1",
+                    (dedup_key,)
+                ).fetchone()
+                if row is not None and row['status'] in active:
+                    job_id = row['id']
+                    # A duplicate at a higher priority moves the queued job up
+                    self._conn.execute(
+                        "UPDATE jobs SET priority = MAX(priority, ?) "
+                        "WHERE id = ? AND status = 'queued'",
+                        (priority, job_id)
+                    )
+                elif row is not None:
+                    job_id = row['id']
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'queued', priority = ?, attempts = 0, "
+                        "worker = NULL, finished = NULL, result = NULL WHERE id = ?",
+                        (priority, job_id)
+                    )
+                else:
+                    job_id = self._conn.execute(
+                        "INSERT INTO jobs (dedup_key, input, is_google_doc, language, "
+                        "save_to_drive, force, priority, status, created) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+                        (dedup_key, input_path, int(is_google_doc), language,
+                         int(save_to_drive), int(force), priority,
+                         datetime.now().isoformat())
+                    ).lastrowid
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return job_id
+
+    def claim(self, worker, lease_seconds, max_attempts=None):
+        """
+        Mark the next job running for worker and return it, or None if there
+        is none. Jobs run by priority, then in submission order; a running
+        job whose heartbeat is older than lease_seconds was abandoned by a
+        crashed worker and is claimed again, unless it has already been run
+        max_attempts times, in which case it is marked failed.
+        """
+        now = time.time()
+        expired = now - lease_seconds
+        with self._lock:
+            # As in submit, the write lock is held from the SELECT to the UPDATE
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if max_attempts is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', finished = ?, "
+                        "error = 'Worker stopped responding on the last attempt' "
+                        "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                        (datetime.now().isoformat(), expired, max_attempts)
+                    )
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND heartbeat < ?) "
+                    "ORDER BY priority DESC, id LIMIT 1",
+                    (expired,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, heartbeat = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (worker, now, row['id'])
+                    )
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE id = ?", (row['id'],)
+                    ).fetchone()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return _row_to_job(row)
+
+    def heartbeat(self, job_ids, worker):
+        """Extend the lease of the running jobs of worker"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                [(time.time(), job_id, worker) for job_id in job_ids]
+            )
+
+    def finish(self, job_id, worker, result):
+        """
+        Record the result of a job run by worker and drop its checkpoints.
+        Returns False, recording nothing, if the job has since been claimed
+        by another worker.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result, default=str), datetime.now().isoformat(), job_id, worker)
+            )
+            if cursor.rowcount == 1:
+                self._conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error, retry=False):
+        """
+        Record an error of a job run by worker; with retry the job goes back
+        to the queue, keeping its checkpoints. Returns False, recording
+        nothing, if the job has since been claimed by another worker.
+        """
+        with self._lock, self._conn:
+            if retry:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker = NULL, error = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'running'",
+                    (error, job_id, worker)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'running'",
+                    (error, datetime.now().isoformat(), job_id, worker)
+                )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id):
+        """Cancel a queued job; returns whether it was still queued"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (datetime.now().isoformat(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        """Return the job as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row)
+
+    def list_jobs(self, status=None):
+        """Return the jobs, optionally only those in one status, oldest first"""
+        sql = "SELECT * FROM jobs"
+        params = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            params.append(status)
+        with self._lock:
+            return [_row_to_job(row) for row in self._conn.execute(sql + " ORDER BY id", params)]
+
+    def pending_count(self):
+        """Number of jobs queued or running"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def pending_needs_google(self):
+        """Whether a queued or running job converts a Google Doc or uploads to Drive"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM jobs WHERE status IN ('queued', 'running') "
+                "AND (is_google_doc OR save_to_drive))"
+            ).fetchone()[0] == 1
+
+    def add_checkpoint(self, job_id, fingerprint, path, length):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, fingerprint, path, length) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, fingerprint, path, length)
+            )
+
+    def checkpoints(self, job_id):
+        """Return {fingerprint: (path, length)} of the chunks a job has finished"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, path, length FROM checkpoints WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {row['fingerprint']: (row['path'], row['length']) for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobCheckpoints:
+    """
+    Cache-compatible record of the chunks a job has synthesized. Every
+    chunk is written to the job directory and committed to the store before
+    it counts as done, so a job resumed after a crash only synthesizes the
+    chunks that had not finished. Misses go to the fallback cache, if any.
+    """
+    def __init__(self, store, job_id, job_dir, fallback=None):
+        self.store = store
+        self.job_id = job_id
+        self.job_dir = job_dir
+        self.fallback = fallback
+        self.resumed = 0
+        self._done = store.checkpoints(job_id)
+        self._lock = threading.Lock()
+        os.makedirs(job_dir, exist_ok=True)
+
+    def make_key(self, text, language, backend):
+        return make_cache_key(text, language, backend)
+
+    def _lookup(self, key):
+        entry = self._done.get(key)
+        if entry is None:
+            return None
+        path, length = entry
+        try:
+            if os.path.getsize(path) != length:
+                return None
+        except OSError:
+            return None
+        with self._lock:
+            self.resumed += 1
+        return path, length
+
+    def get(self, key):
+        entry = self._lookup(key)
+        if entry is None:
+            return self.fallback.get(key) if self.fallback else None
+        with open(entry[0], 'rb') as f:
+            return f.read()
+
+    def get_range(self, key, link_path):
+        entry = self._lookup(key)
+        if entry is None:
+            return self.fallback.get_range(key, link_path) if self.fallback else None
+        # The job directory outlives the assembly, so the chunk is used in place
+        return entry[0], 0, entry[1]
+
+    def put(self, key, data):
+        path = os.path.join(self.job_dir, key + '.mp3')
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        self.store.add_checkpoint(self.job_id, key, path, len(data))
+        with self._lock:
+            self._done[key] = (path, len(data))
+        if self.fallback:
+            self.fallback.put(key, data)
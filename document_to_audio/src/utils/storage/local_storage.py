@@ -1,10 +1,25 @@
 """
 Local storage utilities for audio files.
 """
+import hashlib
 import os
 import shutil
+import threading
 from datetime import datetime
 from pathlib import Path
+from .metadata_index import MetadataIndex
+
+INDEX_FILENAME = 'index.sqlite3'
+BLOB_DIR = '.blobs'
+
+
+def hash_file(file_path, block_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
 class LocalStorage:
     def __init__(self, base_dir=None):
@@ -16,6 +31,13 @@ class LocalStorage:
         self.base_dir = base_dir
         self._ensure_storage_exists()
 
+        index_path = os.path.join(self.base_dir, INDEX_FILENAME)
+        is_new_index = not os.path.exists(index_path)
+        self.index = MetadataIndex(index_path)
+        if is_new_index:
+            # Pick up files stored before the index existed
+            self.reconcile_index()
+
     def _ensure_storage_exists(self):
         """Create storage directory if it doesn't exist"""
         os.makedirs(self.base_dir, exist_ok=True)
@@ -32,9 +54,51 @@ class LocalStorage:
         os.makedirs(storage_path, exist_ok=True)
         return os.path.join(storage_path, filename)
 
-    def save_file(self, file_path, original_doc_path=None, doc_type=None):
+    def _blob_path(self, content_hash):
+        return os.path.join(self.base_dir, BLOB_DIR, content_hash[:2], content_hash + '.blob')
+
+    def _store_blob(self, file_path, content_hash, move=False):
+        """
+        Make sure the content-addressed blob for content_hash exists and
+        return its path. With move=True the source is renamed into place
+        (or discarded if the blob already exists) instead of copied.
+        """
+        blob_path = self._blob_path(content_hash)
+        if os.path.exists(blob_path):
+            if move:
+                os.remove(file_path)
+            return blob_path
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if move:
+            # shutil.move renames when possible and copies across devices
+            shutil.move(file_path, blob_path)
+        else:
+            temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            shutil.copy2(file_path, temp_path)
+            os.replace(temp_path, blob_path)
+        return blob_path
+
+    def _link_blob(self, blob_path, storage_path):
+        """Point storage_path at the blob, copying only if hard links are unsupported"""
+        if os.path.lexists(storage_path):
+            os.remove(storage_path)
+        try:
+            os.link(blob_path, storage_path)
+        except OSError:
+            shutil.copy2(blob_path, storage_path)
+
+    def save_file(self, file_path, original_doc_path=None, doc_type=None, move=False,
+                  revision_id=None):
         """
-        Save a file to local storage with organized structure
+        Save a file to local storage with organized structure.
+        Identical audio is stored once and each entry is a hard link to it.
+        Args:
+            file_path: Audio file to store
+            original_doc_path: Document the audio was converted from
+            doc_type: Storage category, derived from original_doc_path if omitted
+            move: Move file_path into storage instead of copying it
+            revision_id: Revision of the source document the audio was made from
         Returns the new file path
         """
         # Determine document type
@@ -59,34 +123,158 @@ class LocalStorage:
         # Get storage path
         storage_path = self._get_storage_path(filename, doc_type)
         
-        # Copy file to storage
-        shutil.copy2(file_path, storage_path)
-        
+        # Store the content once and link the entry to it
+        content_hash = hash_file(file_path)
+        blob_path = self._store_blob(file_path, content_hash, move)
+        self._link_blob(blob_path, storage_path)
+        created = datetime.now().isoformat()
+
         # Create metadata file
         metadata_path = storage_path + '.meta'
         with open(metadata_path, 'w') as f:
             f.write(f"Original Document: {original_doc_path}\n")
-            f.write(f"Creation Date: {datetime.now().isoformat()}\n")
+            f.write(f"Creation Date: {created}\n")
             f.write(f"Document Type: {doc_type}\n")
+            f.write(f"Content Hash: {content_hash}\n")
+            if revision_id:
+                f.write(f"Revision ID: {revision_id}\n")
+
+        self.index.add(
+            self._relative(storage_path),
+            doc_type,
+            original_doc=original_doc_path,
+            created=created,
+            content_hash=content_hash,
+            size=os.path.getsize(storage_path),
+            revision_id=revision_id
+        )
 
         return storage_path
 
-    def list_files(self, doc_type=None):
-        """List all audio files in storage, optionally filtered by document type"""
-        files = []
-        search_dir = self.base_dir if doc_type is None else os.path.join(self.base_dir, doc_type)
-        
-        for root, _, filenames in os.walk(search_dir):
-            for filename in filenames:
-                if filename.endswith('.mp3'):
-                    files.append(os.path.join(root, filename))
-        
-        return files
+    def _relative(self, file_path):
+        return os.path.relpath(file_path, self.base_dir)
+
+    def list_files(self, doc_type=None, since=None, until=None, original_doc=None,
+                   content_hash=None):
+        """
+        List audio files in storage, oldest first, answered from the index
+        Args:
+            doc_type: Only files converted from this document type
+            since: Only files created at or after this date/datetime
+            until: Only files created before this date/datetime
+            original_doc: Only files converted from this source document
+            content_hash: Only files whose audio has this SHA-256
+        """
+        entries = self.index.query(
+            doc_type=doc_type,
+            since=since,
+            until=until,
+            original_doc=original_doc,
+            content_hash=content_hash
+        )
+        return [os.path.join(self.base_dir, entry['path']) for entry in entries]
+
+    def latest_entry(self, original_doc):
+        """
+        Return the index entry of the newest audio converted from original_doc,
+        with an absolute 'path', or None
+        """
+        entries = self.index.query(original_doc=original_doc)
+        if not entries:
+            return None
+        entry = entries[-1]
+        entry['path'] = os.path.join(self.base_dir, entry['path'])
+        return entry
+
+    def original_documents(self, doc_type=None):
+        """Return every source document that has audio in storage"""
+        return self.index.original_docs(doc_type)
+
+    def _read_meta_file(self, metadata_path):
+        with open(metadata_path, 'r') as f:
+            return dict(line.strip().split(': ', 1) for line in f.readlines() if ': ' in line)
 
     def get_file_info(self, file_path):
         """Get metadata for a stored file"""
+        entry = self.index.get(self._relative(file_path))
+        if entry is not None:
+            info = {
+                'Original Document': str(entry['original_doc']),
+                'Creation Date': entry['created'],
+                'Document Type': entry['doc_type'],
+                'Content Hash': entry['content_hash']
+            }
+            if entry['revision_id']:
+                info['Revision ID'] = entry['revision_id']
+            return info
+
         metadata_path = file_path + '.meta'
         if os.path.exists(metadata_path):
-            with open(metadata_path, 'r') as f:
-                return dict(line.strip().split(': ', 1) for line in f.readlines())
+            return self._read_meta_file(metadata_path)
         return None
+
+    def reconcile_index(self):
+        """
+        Bring the index in line with the files on disk: index audio files
+        that have a .meta sidecar but no entry, and drop entries whose file
+        is gone. Returns the number of entries added and removed.
+        """
+        indexed = set(self.index.paths())
+        on_disk = set()
+        new_entries = []
+
+        for root, dirnames, filenames in os.walk(self.base_dir):
+            # Skip the blob store and caches; only linked entries are indexed
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for filename in filenames:
+                if not filename.endswith('.mp3'):
+                    continue
+                file_path = os.path.join(root, filename)
+                relative_path = self._relative(file_path)
+                on_disk.add(relative_path)
+                if relative_path in indexed:
+                    continue
+
+                metadata_path = file_path + '.meta'
+                meta = self._read_meta_file(metadata_path) if os.path.exists(metadata_path) else {}
+                original_doc = meta.get('Original Document')
+                created = meta.get('Creation Date') or datetime.fromtimestamp(
+                    os.path.getmtime(file_path)
+                ).isoformat()
+                new_entries.append({
+                    'path': relative_path,
+                    'doc_type': meta.get('Document Type') or relative_path.split(os.sep)[0],
+                    'original_doc': None if original_doc in (None, 'None') else original_doc,
+                    'created': created,
+                    'content_hash': meta.get('Content Hash') or hash_file(file_path),
+                    'size': os.path.getsize(file_path),
+                    'revision_id': meta.get('Revision ID')
+                })
+        # One transaction instead of one per file
+        self.index.add_many(new_entries)
+
+        removed = 0
+        for relative_path in indexed - on_disk:
+            self.index.remove(relative_path)
+            removed += 1
+
+        return {'added': len(new_entries), 'removed': removed}
+
+    def prune_blobs(self):
+        """Delete blobs no stored entry links to any more; returns the count"""
+        removed = 0
+        blob_root = os.path.join(self.base_dir, BLOB_DIR)
+        referenced = None
+        for root, _, filenames in os.walk(blob_root):
+            for filename in filenames:
+                blob_path = os.path.join(root, filename)
+                if os.stat(blob_path).st_nlink > 1:
+                    continue
+                # Without a second link, fall back to the index in case the
+                # entries are copies made on a filesystem without hard links
+                if referenced is None:
+                    referenced = {entry['content_hash'] for entry in self.index.query()}
+                if filename[:-len('.blob')] not in referenced:
+                    os.remove(blob_path)
+                    removed += 1
+        return removed
@@ -0,0 +1,139 @@
+"""
+SQLite index of the audio files kept in local storage.
+"""
+import sqlite3
+import threading
+from datetime import date, datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    doc_type TEXT NOT NULL,
+    original_doc TEXT,
+    created TEXT NOT NULL,
+    content_hash TEXT,
+    size INTEGER,
+    revision_id TEXT
+);
+CREATE INDEX IF NOT EXISTS files_doc_type ON files (doc_type, created);
+CREATE INDEX IF NOT EXISTS files_created ON files (created);
+CREATE INDEX IF NOT EXISTS files_original_doc ON files (original_doc);
+CREATE INDEX IF NOT EXISTS files_content_hash ON files (content_hash);
+"""
+
+_COLUMNS = ('path', 'doc_type', 'original_doc', 'created', 'content_hash', 'size',
+            'revision_id')
+_INSERT = (f"INSERT OR REPLACE INTO files ({', '.join(_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(_COLUMNS))})")
+
+
+def _as_timestamp(value):
+    """Convert a date, datetime or ISO string into a comparable ISO string"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class MetadataIndex:
+    def __init__(self, db_path):
+        """Open (and create if needed) the index database at db_path"""
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after an index was created"""
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(files)")}
+        if 'revision_id' not in existing:
+            self._conn.execute("ALTER TABLE files ADD COLUMN revision_id TEXT")
+
+    def add(self, path, doc_type, original_doc=None, created=None,
+            content_hash=None, size=None, revision_id=None):
+        """Insert or replace the entry for path"""
+        created = _as_timestamp(created or datetime.now())
+        with self._lock, self._conn:
+            self._conn.execute(
+                _INSERT,
+                (path, doc_type, original_doc, created, content_hash, size, revision_id)
+            )
+
+    def add_many(self, entries):
+        """
+        Insert or replace many entries in a single transaction
+        Args:
+            entries: Dicts with the keyword arguments of add
+        """
+        rows = [
+            (entry['path'], entry['doc_type'], entry.get('original_doc'),
+             _as_timestamp(entry.get('created') or datetime.now()),
+             entry.get('content_hash'), entry.get('size'), entry.get('revision_id'))
+            for entry in entries
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT, rows)
+
+    def remove(self, path):
+        """Remove the entry for path"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def get(self, path):
+        """Return the entry for path as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def query(self, doc_type=None, since=None, until=None, original_doc=None,
+              content_hash=None):
+        """
+        Return matching entries, oldest first
+        Args:
+            doc_type: Only entries of this document type
+            since: Only entries created at or after this date/datetime
+            until: Only entries created before this date/datetime
+            original_doc: Only entries converted from this source document
+            content_hash: Only entries whose audio has this SHA-256
+        """
+        clauses, params = [], []
+        for column, op, value in (('doc_type', '=', doc_type),
+                                  ('created', '>=', _as_timestamp(since)),
+                                  ('created', '<', _as_timestamp(until)),
+                                  ('original_doc', '=', original_doc),
+                                  ('content_hash', '=', content_hash)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+
+        sql = "SELECT * FROM files"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created, path"
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def original_docs(self, doc_type=None):
+        """Return every distinct source document, optionally of one type"""
+        sql = "SELECT DISTINCT original_doc FROM files WHERE original_doc IS NOT NULL"
+        params = []
+        if doc_type is not None:
+            sql += " AND doc_type = ?"
+            params.append(doc_type)
+        with self._lock:
+            return [row['original_doc'] for row in self._conn.execute(sql + " ORDER BY 1", params)]
+
+    def paths(self):
+        """Return every indexed path"""
+        with self._lock:
+            return [row['path'] for row in self._conn.execute("SELECT path FROM files")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
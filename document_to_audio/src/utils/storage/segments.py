@@ -0,0 +1,75 @@
+"""
+Segment manifests that let a re-conversion reuse unchanged audio.
+"""
+import json
+import os
+import threading
+from .tts_cache import make_cache_key
+
+SEGMENTS_SUFFIX = '.segments.json'
+
+
+def write_manifest(manifest_path, segments):
+    """Write the fingerprint and byte range of each audio segment"""
+    with open(manifest_path, 'w') as f:
+        json.dump({'version': 1, 'segments': segments}, f)
+
+
+def read_manifest(manifest_path):
+    """Return the segments recorded in a manifest, or None if there is none"""
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)['segments']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+class PreviousSegments:
+    """
+    Cache-compatible view of an earlier conversion: chunks whose fingerprint
+    appears in the old manifest are read back from the old audio file.
+    Anything else goes to the fallback cache, if there is one.
+    """
+    def __init__(self, audio_path, segments, fallback=None):
+        self.audio_path = audio_path
+        self.fallback = fallback
+        self.reused = 0
+        self._ranges = {s['fingerprint']: (s['offset'], s['length']) for s in segments}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_stored_audio(cls, audio_path, fallback=None):
+        """Load the manifest stored next to audio_path; None if it has none"""
+        segments = read_manifest(audio_path + SEGMENTS_SUFFIX)
+        if segments is None or not os.path.exists(audio_path):
+            return None
+        return cls(audio_path, segments, fallback)
+
+    def make_key(self, text, language, backend):
+        return make_cache_key(text, language, backend)
+
+    def get(self, key):
+        byte_range = self._ranges.get(key)
+        if byte_range is None:
+            return self.fallback.get(key) if self.fallback else None
+
+        offset, length = byte_range
+        with open(self.audio_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        with self._lock:
+            self.reused += 1
+        return data
+
+    def get_range(self, key, link_path):
+        byte_range = self._ranges.get(key)
+        if byte_range is None:
+            return self.fallback.get_range(key, link_path) if self.fallback else None
+
+        with self._lock:
+            self.reused += 1
+        return (self.audio_path,) + byte_range
+
+    def put(self, key, data):
+        if self.fallback:
+            self.fallback.put(key, data)
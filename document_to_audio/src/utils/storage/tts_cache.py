@@ -0,0 +1,193 @@
+"""
+On-disk cache of synthesized audio segments.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from ..instrumentation import NULL_INSTRUMENTATION
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+SEGMENT_EXTENSION = '.seg'
+
+
+def normalize_text(text):
+    """Normalize text so that whitespace-only differences share a cache entry"""
+    return ' '.join(text.split())
+
+
+def make_cache_key(text, language, backend):
+    """Fingerprint a chunk of text as synthesized by backend"""
+    payload = json.dumps(
+        [normalize_text(text), language, backend.name, backend.settings()],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, instrumentation=None):
+        """
+        Initialize the cache
+        Args:
+            cache_dir: Directory holding the cached segments
+            max_bytes: Total size above which least recently used segments are evicted
+            instrumentation: Receives hit, miss and eviction counts
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_entries()
+
+    def _load_entries(self):
+        """Rebuild the LRU order from the segments already on disk"""
+        found = []
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(SEGMENT_EXTENSION):
+                    stat = os.stat(os.path.join(root, filename))
+                    key = filename[:-len(SEGMENT_EXTENSION)]
+                    found.append((stat.st_mtime, key, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size += size
+
+        with self._lock:
+            self._evict()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + SEGMENT_EXTENSION)
+
+    def make_key(self, text, language, backend):
+        """Build the cache key for a chunk of text synthesized by backend"""
+        return make_cache_key(text, language, backend)
+
+    def get(self, key):
+        """Return the cached audio for key, or None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                self.instrumentation.count('tts_cache_misses')
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Keep the on-disk order in sync for the next process
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+                self.instrumentation.count('tts_cache_misses')
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.instrumentation.count('tts_cache_hits')
+        return data
+
+    def get_range(self, key, link_path):
+        """
+        Hard-link the cached audio for key to link_path and return its
+        (path, offset, length), or None on a miss. The audio is not read, and
+        the link keeps it intact if the entry is evicted in the meantime.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                self.instrumentation.count('tts_cache_misses')
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path_for(key)
+        try:
+            try:
+                os.link(path, link_path)
+            except FileNotFoundError:
+                raise
+            except OSError:
+                shutil.copyfile(path, link_path)
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+                self.instrumentation.count('tts_cache_misses')
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.instrumentation.count('tts_cache_hits')
+        return link_path, 0, os.path.getsize(link_path)
+
+    def put(self, key, data):
+        """Store audio for key, evicting old entries if the cache is full"""
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            self.instrumentation.count('tts_cache_evictions')
+            try:
+                os.remove(self._path_for(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Remove every cached segment"""
+        with self._lock:
+            while self._entries:
+                key, _ = self._entries.popitem()
+                try:
+                    os.remove(self._path_for(key))
+                except FileNotFoundError:
+                    pass
+            self._size = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current cache size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,246 @@
+"""
+Text clean-up between extraction and synthesis.
+
+Extracted PDF text carries line-break hyphens, hard line wraps, running
+headers and footers and page numbers, all of which the TTS engine would
+read out. Every pass is a single scan with precompiled patterns, so the
+cost stays linear in the length of the text.
+"""
+import re
+from collections import Counter, deque
+
+# Pages looked at together when deciding whether an edge line repeats
+DEFAULT_FURNITURE_WINDOW = 8
+# Edge lines considered at the top and at the bottom of each page
+EDGE_LINES = 2
+# Share of the pages in the window an edge line must appear on
+FURNITURE_MIN_SHARE = 0.5
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e',
+    'fig', 'figs', 'no', 'vol', 'pp', 'p', 'ch', 'sec', 'approx', 'inc', 'ltd',
+    'co', 'corp', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept',
+    'oct', 'nov', 'dec'
+})
+
+_LINE_BREAK_HYPHEN = re.compile(r'(?<=[^\W\d_])-[ \t]*\r?\n[ \t]*(?=[^\W\d_])')
+_HORIZONTAL_SPACE = re.compile(r'[^\S\n]+')
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n\s*')
+_LINE_BREAK = re.compile(r'[ \t]*\n[ \t]*')
+# Roman numerals up to 399; a bare one only counts when lowercase, since
+# "I", "C" or "MIX" on a line of their own are more likely words or headings
+_ROMAN = r'(?=[ivxlc])c{0,3}(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})'
+_PAGE_NUMBER = re.compile(
+    rf'(?:(?i:page)\s+)?(?:\d+|{_ROMAN})(?:\s*(?:(?i:of)|/)\s*\d+)?'
+    rf'|(?i:page\s+{_ROMAN})(?:\s*(?:(?i:of)|/)\s*\d+)?'
+    r'|[-–—]\s*(?:\d+|(?i:[ivxlcdm]+))\s*[-–—]'
+)
+_DIGITS = re.compile(r'\d+')
+_SENTENCE_PUNCTUATION = re.compile(r'[.!?…]["\'”’)\]]*$')
+# Matches start only at word starts, so each word is scanned once
+_SENTENCE_END = re.compile(r'(?<!\S)(\S*?)([.!?…]+)["\'”’)\]]*(?:\s+|$)')
+
+
+def dehyphenate(text):
+    """Join words split by a hyphen at the end of a line"""
+    # Only lowercase continuations are joined, so "Jean-\nPaul" keeps its hyphen
+    def join(match):
+        end = match.end()
+        return '' if text[end].islower() else '-'
+
+    return _LINE_BREAK_HYPHEN.sub(join, text)
+
+
+def collapse_whitespace(text):
+    """
+    Collapse runs of spaces, join hard-wrapped lines and keep blank lines
+    as paragraph breaks; returns the paragraphs separated by '\\n\\n'
+    """
+    text = _HORIZONTAL_SPACE.sub(' ', text)
+    paragraphs = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = _LINE_BREAK.sub(' ', paragraph).strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+    return '\n\n'.join(paragraphs)
+
+
+def is_page_number(line):
+    """
+    Whether a line holds nothing but a page number, e.g. 'Page 3 of 10',
+    'xii' or '- IV -'. Uppercase roman numerals on their own are left to
+    the running header check, which requires them to repeat.
+    """
+    return _PAGE_NUMBER.fullmatch(line.strip()) is not None
+
+
+def _edge_lines(lines):
+    """Indices of the non-blank lines at the top and bottom of a page"""
+    filled = [index for index, line in enumerate(lines) if line]
+    return set(filled[:EDGE_LINES] + filled[-EDGE_LINES:])
+
+
+def iter_without_page_furniture(pages, window=DEFAULT_FURNITURE_WINDOW,
+                                min_share=FURNITURE_MIN_SHARE):
+    """
+    Yield each page with its page numbers and running headers and footers
+    removed. A header or footer is a line at the top or bottom of a page
+    that, with digits masked, repeats on at least min_share of the pages
+    of a sliding window centred on the page, so only window pages are held
+    at a time.
+
+    Args:
+        pages: Iterable of page texts
+        window: Number of neighbouring pages compared
+        min_share: Share of the window a repeated line must cover
+    """
+    buffered = deque()
+    counts = Counter()
+    decided = 0
+
+    def strip(lines, keys):
+        # A line must repeat on at least two pages, however short the document
+        needed = max(2, min_share * len(buffered))
+        return '\n'.join(
+            line for index, line in enumerate(lines)
+            if index not in keys or not (
+                is_page_number(line) or counts[keys[index]] >= needed)
+        )
+
+    for page in pages:
+        # Blank lines are kept, they separate paragraphs
+        lines = [line.strip() for line in page.splitlines()]
+        keys = {index: _DIGITS.sub('#', lines[index]) for index in _edge_lines(lines)}
+        counts.update(set(keys.values()))
+        buffered.append((lines, keys))
+        # A page is decided once the pages after it are in the window too
+        if len(buffered) - decided > window // 2:
+            yield strip(*buffered[decided])
+            decided += 1
+            if len(buffered) > window:
+                _, dropped = buffered.popleft()
+                counts.subtract(set(dropped.values()))
+                decided -= 1
+
+    while decided < len(buffered):
+        yield strip(*buffered[decided])
+        decided += 1
+
+
+def normalize_pieces(pieces, pages=False):
+    """
+    Yield the extracted text cleaned up for speech, one paragraph per
+    piece with a trailing paragraph break.
+
+    Args:
+        pieces: A string, or an iterable of strings (pages, paragraphs)
+        pages: Whether the pieces are pages; enables header, footer and
+            page number removal and rejoins words and sentences split
+            across pages
+    """
+    pieces = [pieces] if isinstance(pieces, str) else pieces
+    if pages:
+        pieces = iter_without_page_furniture(pieces)
+
+    carry = ''
+    for piece in pieces:
+        text = piece
+        if carry:
+            # Rejoin a word or sentence cut at the foot of the previous page
+            text = text.lstrip()
+            text = carry + ('\n' if text[:1].islower() else '\n\n') + text
+            carry = ''
+        if pages:
+            # Hold back the last paragraph if it ends mid-sentence or in a hyphen
+            stripped = text.rstrip()
+            if stripped and not _SENTENCE_PUNCTUATION.search(stripped):
+                # Page lines are stripped, so paragraph breaks are plain '\n\n'
+                cut = stripped.rfind('\n\n') + 1
+                text, carry = stripped[:cut], stripped[cut:].lstrip()
+
+        text = collapse_whitespace(dehyphenate(text))
+        for paragraph in text.split('\n\n'):
+            if paragraph:
+                yield paragraph + '\n\n'
+
+    if carry.strip():
+        yield collapse_whitespace(carry) + '\n\n'
+
+
+def iter_sentences(text):
+    """
+    Yield the sentences of text. Periods after abbreviations, initials
+    and acronyms, or followed by a lowercase word, don't end a sentence.
+    """
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        if match.group(2) == '.':
+            word = match.group(1).lower()
+            if (word in ABBREVIATIONS or '.' in word or (len(word) == 1 and word.isalpha())
+                    or text[end:end + 1].islower()):
+                continue
+        sentence = text[start:end].strip()
+        start = end
+        if sentence:
+            yield sentence
+
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
+
+
+def _split_long_sentence(sentence, limit):
+    """Cut a sentence longer than limit at the last space before each cut"""
+    start = 0
+    while len(sentence) - start > limit:
+        cut = sentence.rfind(' ', start, start + limit + 1)
+        if cut <= start:
+            cut = start + limit
+        yield sentence[start:cut].strip()
+        start = cut
+    rest = sentence[start:].strip()
+    if rest:
+        yield rest
+
+
+def iter_sentence_chunks(pieces, max_chars, first_chunk_chars=None, per_piece=False):
+    """
+    Pack whole sentences into chunks of at most max_chars characters; only
+    sentences longer than that are cut, at a space.
+
+    Args:
+        pieces: A string, or an iterable of strings
+        max_chars: Maximum length of a single chunk
+        first_chunk_chars: Smaller limit for the first chunk only
+        per_piece: Never let a chunk span two pieces, so an edit to one
+            piece doesn't shift the chunk boundaries of the others
+    """
+    pieces = [pieces] if isinstance(pieces, str) else pieces
+    limit = first_chunk_chars or max_chars
+    parts = []
+    size = 0
+
+    for piece in pieces:
+        separator = '\n\n'
+        for sentence in iter_sentences(piece):
+            for part in _split_long_sentence(sentence, limit):
+                joined = size + len(separator) + len(part) if parts else len(part)
+                if parts and joined > limit:
+                    yield ''.join(parts)
+                    limit = max_chars
+                    parts, size = [], 0
+                    joined = len(part)
+                if parts:
+                    parts.append(separator)
+                parts.append(part)
+                size = joined
+                separator = ' '
+        if per_piece and parts:
+            yield ''.join(parts)
+            limit = max_chars
+            parts, size = [], 0
+
+    if parts:
+        yield ''.join(parts)
@@ -0,0 +1,61 @@
+"""
+Compare two benchmark result files and report timing regressions.
+
+Usage: python compare.py BASELINE.json CURRENT.json [--threshold 0.2]
+Exits with status 1 if any timing got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+# Timings this short are dominated by noise
+MIN_SECONDS = 0.005
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Return (name, metric, old, new, change, regressed) for every timing
+    present in both reports; regressed marks slowdowns above threshold
+    that aren't too short to measure
+    """
+    rows = []
+    for name, metrics in sorted(current['results'].items()):
+        old_metrics = baseline['results'].get(name)
+        if old_metrics is None:
+            continue
+        for metric, new in sorted(metrics.items()):
+            old = old_metrics.get(metric)
+            if not metric.endswith('_seconds') or old is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold and max(old, new) >= MIN_SECONDS
+            rows.append((name, metric, old, new, change, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare benchmark results")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"baseline {baseline['meta'].get('commit')}  current {current['meta'].get('commit')}")
+    regressions = 0
+    for name, metric, old, new, change, regressed in compare(baseline, current, args.threshold):
+        regressions += regressed
+        flag = 'REGRESSION' if regressed else ''
+        print(f"{name:40} {metric:26} {old:10.4f} {new:10.4f} {change:+8.1%} {flag}")
+
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
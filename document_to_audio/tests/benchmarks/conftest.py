@@ -0,0 +1,124 @@
+"""
+Benchmark fixtures for the document_to_audio package.
+
+Benchmarks are skipped unless DOC_TO_AUDIO_BENCH is set:
+    DOC_TO_AUDIO_BENCH=quick   1-100 pages, 1k-10k storage entries
+    DOC_TO_AUDIO_BENCH=full    1-2000 pages, 10k-100k storage entries
+Results are written as JSON to DOC_TO_AUDIO_BENCH_OUTPUT (default
+benchmark-results.json) and can be compared with compare.py.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+import pytest
+
+BENCH_SCALE = os.environ.get('DOC_TO_AUDIO_BENCH')
+BENCH_OUTPUT = os.environ.get('DOC_TO_AUDIO_BENCH_OUTPUT', 'benchmark-results.json')
+
+SCALES = {
+    'quick': {'pages': [1, 10, 100], 'entries': [1000, 10000]},
+    'full': {'pages': [1, 10, 100, 500, 2000], 'entries': [10000, 100000]},
+}
+SCALE = SCALES.get(BENCH_SCALE, SCALES['quick'])
+
+PARAGRAPHS_PER_PAGE = 4
+_SENTENCE = "The quick brown fox jumps over the lazy dog near the river bank"
+
+
+def page_paragraphs(page):
+    """Synthetic text of one page, a few short paragraphs"""
+    return [f"Page {page}, paragraph {index}. " + ". ".join([_SENTENCE] * 3) + "."
+            for index in range(PARAGRAPHS_PER_PAGE)]
+
+
+def make_pdf(path, pages):
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(path)
+    for page in range(pages):
+        y = 780
+        for paragraph in page_paragraphs(page):
+            # reportlab doesn't wrap; split each paragraph over a few lines
+            for start in range(0, len(paragraph), 90):
+                c.drawString(40, y, paragraph[start:start + 90])
+                y -= 14
+            y -= 10
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_docx(path, pages):
+    from docx import Document
+    doc = Document()
+    for page in range(pages):
+        for paragraph in page_paragraphs(page):
+            doc.add_paragraph(paragraph)
+        if page < pages - 1:
+            doc.add_page_break()
+    doc.save(path)
+    return path
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCH_SCALE:
+        return
+    skip = pytest.mark.skip(reason="set DOC_TO_AUDIO_BENCH=quick|full to run benchmarks")
+    here = os.path.dirname(os.path.abspath(__file__))
+    for item in items:
+        if str(item.fspath).startswith(here):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def bench_results():
+    """Collects named measurements and writes them as JSON at the end of the session"""
+    results = {}
+    yield results
+    if not results:
+        return
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'scale': BENCH_SCALE,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'timestamp': datetime.now().isoformat()
+        },
+        'results': results
+    }
+    with open(BENCH_OUTPUT, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope='session')
+def bench_dir():
+    """Scratch directory shared by all benchmarks"""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield tmpdirname
+
+
+@pytest.fixture(scope='session')
+def synthetic_document(bench_dir):
+    """Return a factory building (and reusing) a synthetic PDF or DOCX of a given page count"""
+    built = {}
+
+    def build(doc_type, pages):
+        key = (doc_type, pages)
+        if key not in built:
+            path = os.path.join(bench_dir, f"synthetic_{pages}.{doc_type}")
+            built[key] = make_pdf(path, pages) if doc_type == 'pdf' else make_docx(path, pages)
+        return built[key]
+
+    return build
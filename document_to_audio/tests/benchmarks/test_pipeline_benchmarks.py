@@ -0,0 +1,61 @@
+"""
+Per-stage timings of the document to audio pipeline with an offline backend.
+"""
+import os
+import time
+import pytest
+from document_to_audio.src.core.converter import DocumentToAudio
+from document_to_audio.src.services.tts_backends import LocalTTSBackend
+from document_to_audio.src.utils.document_utils import iter_docx_paragraphs
+from .conftest import SCALE
+
+@pytest.mark.parametrize('pages', SCALE['pages'])
+@pytest.mark.parametrize('doc_type', ['pdf', 'docx'])
+def test_process_document_stages(doc_type, pages, synthetic_document, bench_dir, bench_results):
+    """Time extraction, synthesis and storage the way process_document runs them"""
+    input_path = synthetic_document(doc_type, pages)
+    backend = LocalTTSBackend()
+    converter = DocumentToAudio(
+        storage_dir=os.path.join(bench_dir, f"storage_{doc_type}_{pages}"),
+        tts_backend=backend,
+        use_tts_cache=False
+    )
+
+    start = time.perf_counter()
+    pieces = list(converter.iter_document_text(input_path))
+    extracted = time.perf_counter()
+    output_path = converter.default_output_path(input_path, output_dir=bench_dir)
+    converter.synthesize(pieces, output_path, input_path=input_path)
+    synthesized = time.perf_counter()
+    audio_bytes = os.path.getsize(output_path)
+    result = converter.store(output_path, input_path)
+    stored = time.perf_counter()
+
+    assert os.path.exists(result['audio_path'])
+    bench_results[f"process_document[{doc_type}-{pages}]"] = {
+        'pages': pages,
+        'input_bytes': os.path.getsize(input_path),
+        'chars': sum(len(piece) for piece in pieces),
+        'chunks': backend.calls,
+        'audio_bytes': audio_bytes,
+        'extract_seconds': extracted - start,
+        'synthesize_seconds': synthesized - extracted,
+        'store_seconds': stored - synthesized,
+        'total_seconds': stored - start
+    }
+
+@pytest.mark.parametrize('pages', SCALE['pages'])
+@pytest.mark.parametrize('backend', ['python-docx', 'xml'])
+def test_docx_extraction_backends(backend, pages, synthetic_document, bench_results):
+    """Time DOCX extraction with each backend"""
+    input_path = synthetic_document('docx', pages)
+    start = time.perf_counter()
+    chars = sum(len(piece) for piece in iter_docx_paragraphs(input_path, backend=backend))
+    elapsed = time.perf_counter() - start
+
+    bench_results[f"extract_docx[{backend}-{pages}]"] = {
+        'pages': pages,
+        'input_bytes': os.path.getsize(input_path),
+        'chars': chars,
+        'extract_seconds': elapsed
+    }
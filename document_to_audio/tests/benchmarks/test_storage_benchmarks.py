@@ -0,0 +1,60 @@
+"""
+Query timings of LocalStorage with a large index.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from document_to_audio.src.utils.storage.local_storage import LocalStorage
+from .conftest import SCALE
+
+DOC_TYPES = ['pdf', 'docx', 'google_docs']
+REPEATS = 5
+
+def _best_of(func):
+    """Run func REPEATS times; return the fastest time and the last result"""
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+@pytest.mark.parametrize('entries', SCALE['entries'])
+def test_list_files(entries, bench_dir, bench_results):
+    """Time list_files queries against an index of the given size"""
+    storage = LocalStorage(os.path.join(bench_dir, f"list_files_{entries}"))
+    origin = datetime(2024, 1, 1)
+    start = time.perf_counter()
+    storage.index.add_many(
+        {
+            'path': os.path.join(DOC_TYPES[i % 3], f"doc_{i}.mp3"),
+            'doc_type': DOC_TYPES[i % 3],
+            'original_doc': f"/docs/doc_{i % 1000}.pdf",
+            'created': origin + timedelta(minutes=i),
+            'content_hash': f"{i:064x}",
+            'size': 1024
+        }
+        for i in range(entries)
+    )
+    populate_seconds = time.perf_counter() - start
+
+    all_seconds, files = _best_of(storage.list_files)
+    assert len(files) == entries
+    by_type_seconds, _ = _best_of(lambda: storage.list_files(doc_type='pdf'))
+    recent_seconds, _ = _best_of(
+        lambda: storage.list_files(since=origin + timedelta(minutes=entries - 100))
+    )
+    by_original_seconds, _ = _best_of(
+        lambda: storage.list_files(original_doc="/docs/doc_7.pdf")
+    )
+
+    bench_results[f"list_files[{entries}]"] = {
+        'entries': entries,
+        'populate_seconds': populate_seconds,
+        'all_seconds': all_seconds,
+        'by_doc_type_seconds': by_type_seconds,
+        'recent_100_seconds': recent_seconds,
+        'by_original_doc_seconds': by_original_seconds
+    }
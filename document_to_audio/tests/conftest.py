@@ -3,10 +3,11 @@ Test fixtures for the document_to_audio package.
 """
 import os
 import json
+import time
 import pytest
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from google.oauth2.credentials import Credentials
 
 @pytest.fixture
@@ -25,6 +26,19 @@ def sample_pdf(sample_text):
         yield f.name
     os.unlink(f.name)
 
+@pytest.fixture
+def multi_page_pdf():
+    """Create a PDF with one numbered line per page"""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        from reportlab.pdfgen import canvas
+        c = canvas.Canvas(f.name)
+        for page in range(5):
+            c.drawString(100, 750, f"Content of page {page}.")
+            c.showPage()
+        c.save()
+        yield f.name
+    os.unlink(f.name)
+
 @pytest.fixture
 def sample_docx(sample_text):
     """Create a sample DOCX file for testing"""
@@ -36,6 +50,12 @@ def sample_docx(sample_text):
         yield f.name
     os.unlink(f.name)
 
+@pytest.fixture
+def local_tts_backend():
+    """Offline text-to-speech backend for testing"""
+    from document_to_audio.src.services.tts_backends import LocalTTSBackend
+    return LocalTTSBackend()
+
 @pytest.fixture
 def temp_dir():
     """Create a temporary directory for test outputs"""
@@ -103,3 +123,229 @@ def mock_google_services():
             return 'mock_file_id'
 
     return MockGoogleServices()
+
+class FakeDriveHttp:
+    """
+    In-process stand-in for the Drive upload endpoint that speaks the
+    resumable upload protocol and can inject failures
+    """
+    def __init__(self, create_failures=(), chunk_failures=(), base_url='https://fake-drive.local'):
+        self.base_url = base_url
+        self.create_failures = list(create_failures)
+        self.chunk_failures = list(chunk_failures)
+        self.sessions = {}
+        self.files = {}
+        self.requests = []
+
+    def _response(self, status, content=b'', **headers):
+        import httplib2
+        headers['status'] = str(status)
+        return httplib2.Response(headers), content
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.requests.append((method, uri))
+
+        if method == 'POST' and 'uploadType=resumable' in uri:
+            if self.create_failures:
+                return self._response(self.create_failures.pop(0))
+            session = f"{self.base_url}/upload/session/{len(self.sessions)}"
+            name = json.loads(body)['name'] if body else None
+            self.sessions[session] = {'name': name, 'data': b''}
+            return self._response(200, location=session)
+
+        if method == 'PUT' and uri in self.sessions:
+            upload = self.sessions[uri]
+            content_range = headers['content-range']
+            if content_range.startswith('bytes */'):
+                return self._committed(upload)
+
+            data = body.read() if hasattr(body, 'read') else body
+            first, rest = content_range[len('bytes '):].split('-')
+            last, total = rest.split('/')
+            assert int(first) == len(upload['data']), "chunk does not resume at the committed byte"
+
+            if self.chunk_failures:
+                # Commit half the chunk before failing, like an interrupted transfer
+                upload['data'] += data[:len(data) // 2]
+                return self._response(self.chunk_failures.pop(0))
+
+            upload['data'] += data
+            if total != '*' and int(last) + 1 == int(total):
+                file_id = f"file_{len(self.files)}"
+                self.files[file_id] = upload
+                return self._response(200, json.dumps({'id': file_id}).encode())
+            return self._committed(upload)
+
+        return self._response(404)
+
+    def _committed(self, upload):
+        if not upload['data']:
+            return self._response(308)
+        return self._response(308, range=f"bytes=0-{len(upload['data']) - 1}")
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def fake_drive():
+    """Google services stub whose Drive service talks to a FakeDriveHttp"""
+    from googleapiclient.discovery import build
+
+    class FakeDriveServices:
+        def __init__(self):
+            self.http = FakeDriveHttp()
+            self.service = build('drive', 'v3', http=self.http)
+
+        def get_drive_service(self):
+            return self.service
+
+    return FakeDriveServices()
+
+class FakeDriveServer:
+    """
+    FakeDriveHttp served over a local HTTP socket, so uploads go through a
+    real httplib2 transport, redirect handling included
+    """
+    def __init__(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+        # FakeDriveHttp isn't thread-safe; concurrent uploads take turns
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def _forward(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with lock:
+                    response, content = server.http.request(
+                        server.url + self.path, self.command, body, dict(self.headers))
+                self.send_response(response.status)
+                for name, value in response.items():
+                    if name not in ('status', 'content-length'):
+                        self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_POST = do_PUT = _forward
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self.http = FakeDriveHttp(base_url=self.url)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,),
+                                       daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def fake_drive_server():
+    """
+    Local HTTP server speaking the Drive resumable upload protocol; every
+    httplib2 request for googleapis.com is sent to it instead
+    """
+    import httplib2
+    server = FakeDriveServer()
+    request = httplib2.Http.request
+
+    def routed(http, uri, *args, **kwargs):
+        return request(http, uri.replace('https://www.googleapis.com', server.url, 1),
+                       *args, **kwargs)
+
+    with patch.object(httplib2.Http, 'request', routed):
+        yield server
+    server.close()
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+class RecordedDocsService:
+    """Docs service stub replaying documents.get responses recorded as JSON fixtures"""
+    def __init__(self, *fixture_names):
+        self.documents_by_id = {}
+        for name in fixture_names:
+            with open(FIXTURES_DIR / name) as f:
+                document = json.load(f)
+            self.documents_by_id[document['documentId']] = document
+        self.requests = []
+
+    def documents(self):
+        return self
+
+    def get(self, **kwargs):
+        self.requests.append(kwargs)
+        document = self.documents_by_id[kwargs['documentId']]
+        return MagicMock(execute=MagicMock(return_value=document))
+
+@pytest.fixture
+def recorded_docs_service():
+    """Docs service replaying the recorded Google Docs fixtures"""
+    return RecordedDocsService('google_doc_report.json')
+
+class FakeTTSServer:
+    """
+    Local HTTP text-to-speech service that answers POST /synthesize with
+    MP3 frames and can inject error responses and latency
+    """
+    def __init__(self, latency=0.0):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+        self.latency = latency
+        # (status, headers) to answer the next requests with, in order
+        self.failures = []
+        self.statuses = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        encoder = LocalTTSBackend()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                text = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+                with server._lock:
+                    status, headers = server.failures.pop(0) if server.failures else (200, {})
+                    server.statuses.append(status)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    body = encoder.synthesize(text) if status == 200 else b'error'
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/synthesize"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,),
+                                       daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def fake_tts_server():
+    """Local TTS service that can answer with 429s and other errors"""
+    server = FakeTTSServer()
+    yield server
+    server.close()
@@ -0,0 +1,107 @@
+"""
+Integration tests for the asyncio converter.
+"""
+import asyncio
+import os
+import pytest
+from document_to_audio.src.core.async_converter import AsyncDocumentToAudio
+from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+@pytest.mark.asyncio
+async def test_async_pdf_conversion(sample_pdf, temp_dir, local_tts_backend):
+    """Test converting a PDF without blocking the event loop"""
+    converter = AsyncDocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend)
+
+    result = await converter.process_document(
+        sample_pdf, output_path=os.path.join(temp_dir, "async.mp3")
+    )
+
+    assert os.path.exists(result['audio_path'])
+    with open(result['audio_path'], 'rb') as f:
+        assert b'test document' in f.read()
+
+@pytest.mark.asyncio
+async def test_concurrent_conversions_overlap(temp_dir):
+    """Test that many conversions share one event loop concurrently"""
+    backend = LocalTTSBackend(latency=0.1)
+    converter = AsyncDocumentToAudio(
+        storage_dir=temp_dir, tts_backend=backend, use_tts_cache=False
+    )
+    texts = [f"Document {i} sentence one. Sentence two." for i in range(10)]
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    paths = await asyncio.gather(*(
+        converter.synthesize(text, os.path.join(temp_dir, f"doc_{i}.mp3"))
+        for i, text in enumerate(texts)
+    ))
+
+    assert loop.time() - start < 0.5
+    assert all(os.path.getsize(path) > 0 for path in paths)
+
+@pytest.mark.asyncio
+async def test_cancellation_removes_partial_output(temp_dir):
+    """Test that cancelling a conversion stops synthesis and cleans up"""
+    backend = LocalTTSBackend(latency=0.05)
+    converter = AsyncDocumentToAudio(
+        storage_dir=temp_dir, tts_backend=backend, use_tts_cache=False,
+        max_concurrent_chunks=2, max_chunk_chars=20
+    )
+    output_path = os.path.join(temp_dir, "cancelled.mp3")
+    text = " ".join(f"Sentence {i}." for i in range(200))
+
+    task = asyncio.ensure_future(converter.synthesize(text, output_path))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    calls = backend.calls
+    await asyncio.sleep(0.2)
+    assert backend.calls == calls
+    assert calls < 100
+    assert not os.path.exists(output_path)
+
+@pytest.mark.asyncio
+async def test_extraction_errors_propagate(temp_dir, local_tts_backend):
+    """Test that a failure while extracting surfaces from synthesize"""
+    converter = AsyncDocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend)
+
+    def pieces():
+        yield "First page. "
+        raise RuntimeError("corrupt page")
+
+    with pytest.raises(RuntimeError):
+        await converter.synthesize(pieces(), os.path.join(temp_dir, "broken.mp3"))
+    assert not os.path.exists(os.path.join(temp_dir, "broken.mp3"))
+
+@pytest.mark.asyncio
+async def test_async_stream_document(sample_docx, temp_dir, local_tts_backend):
+    """Test streaming a document's audio from the event loop"""
+    converter = AsyncDocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend)
+
+    segments = [segment async for segment in converter.stream_document(sample_docx)]
+
+    assert segments
+    assert b'test document' in b"".join(segments)
+
+@pytest.mark.asyncio
+async def test_normalized_audio_matches_sync_converter(temp_dir, local_tts_backend):
+    """Test that a normalizing converter makes the same audio from either API"""
+    from document_to_audio.src.core.converter import DocumentToAudio
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend,
+                                normalize_text=True)
+    text = ["A sentence that runs over a hyphen-\n", "ated break. Dr. Smith agreed. "] * 40
+
+    sync_path = converter.synthesize(text, os.path.join(temp_dir, "sync.mp3"))
+    async_path = await AsyncDocumentToAudio(converter).synthesize(
+        text, os.path.join(temp_dir, "async.mp3"))
+
+    with open(sync_path, 'rb') as a, open(async_path, 'rb') as b:
+        assert a.read() == b.read()
+
+def test_incremental_converter_is_rejected(temp_dir, local_tts_backend):
+    """Test that options the async API can't honor are refused"""
+    with pytest.raises(ValueError):
+        AsyncDocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend,
+                             incremental=True)
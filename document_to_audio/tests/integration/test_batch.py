@@ -0,0 +1,92 @@
+"""
+Integration tests for batch conversion.
+"""
+import os
+import json
+import pytest
+from unittest.mock import patch
+from docx import Document
+from document_to_audio.src import cli
+from document_to_audio.src.core.batch import collect_inputs
+from document_to_audio.src.core.converter import DocumentToAudio
+
+@pytest.fixture
+def document_dir(temp_dir):
+    """Create a directory of DOCX files plus one corrupt PDF"""
+    source_dir = os.path.join(temp_dir, 'documents')
+    os.makedirs(os.path.join(source_dir, 'nested'))
+    for i in range(4):
+        doc = Document()
+        doc.add_paragraph(f"Batch document number {i}.")
+        subdir = 'nested' if i == 3 else ''
+        doc.save(os.path.join(source_dir, subdir, f"doc_{i}.docx"))
+    with open(os.path.join(source_dir, 'broken.pdf'), 'w') as f:
+        f.write("not a pdf")
+    with open(os.path.join(source_dir, 'notes.txt'), 'w') as f:
+        f.write("ignored")
+    return source_dir
+
+def test_collect_inputs(document_dir):
+    """Test expanding directories, globs and manifests"""
+    from_dir = collect_inputs(document_dir)
+    assert len(from_dir) == 5
+    assert not any(path.endswith('.txt') for path in from_dir)
+
+    from_glob = collect_inputs(os.path.join(document_dir, '*.docx'))
+    assert [os.path.basename(path) for path in from_glob] == ['doc_0.docx', 'doc_1.docx', 'doc_2.docx']
+
+    manifest = os.path.join(document_dir, 'manifest.lst')
+    with open(manifest, 'w') as f:
+        f.write("# nightly run\ndoc_1.docx\n\nhttps://docs.google.com/document/d/abc/edit\ndoc_1.docx\n")
+    assert collect_inputs(manifest) == [
+        os.path.join(document_dir, 'doc_1.docx'),
+        'https://docs.google.com/document/d/abc/edit'
+    ]
+
+    with pytest.raises(ValueError):
+        collect_inputs(os.path.join(document_dir, '*.odt'))
+
+@pytest.mark.integration
+def test_process_batch_reports_each_document(document_dir, temp_dir, local_tts_backend):
+    """Test that a batch converts what it can and reports the rest"""
+    converter = DocumentToAudio(
+        storage_dir=os.path.join(temp_dir, 'storage'),
+        tts_backend=local_tts_backend
+    )
+
+    inputs = collect_inputs(document_dir)
+    results = converter.process_batch(document_dir, synthesize_workers=3)
+
+    assert [result['input'] for result in results] == inputs
+    failed = [result for result in results if result['status'] == 'error']
+    assert len(failed) == 1
+    assert failed[0]['input'].endswith('broken.pdf')
+    assert failed[0]['failed_stage'] in ('extract', 'synthesize')
+
+    for result in results:
+        if result['status'] == 'ok':
+            assert os.path.exists(result['audio_path'])
+            assert result['metadata']['Original Document'] == result['input']
+            assert 'text' not in result
+
+@pytest.mark.integration
+def test_cli_writes_report(document_dir, temp_dir, local_tts_backend):
+    """Test the command-line entry point"""
+    report_path = os.path.join(temp_dir, 'report.json')
+    storage_dir = os.path.join(temp_dir, 'storage')
+
+    with patch('document_to_audio.src.cli.DocumentToAudio') as mock_converter:
+        mock_converter.return_value = DocumentToAudio(
+            storage_dir=storage_dir, tts_backend=local_tts_backend
+        )
+        exit_code = cli.main([
+            os.path.join(document_dir, '*.docx'),
+            '--storage-dir', storage_dir,
+            '--report', report_path
+        ])
+
+    assert exit_code == 0
+    with open(report_path) as f:
+        report = json.load(f)
+    assert len(report) == 3
+    assert all(entry['status'] == 'ok' for entry in report)
@@ -9,7 +9,7 @@ from unittest.mock import patch
 @pytest.mark.integration
 def test_pdf_conversion_workflow(sample_pdf, temp_dir, mock_google_services):
     """Test complete PDF to audio conversion workflow"""
-    with patch('document_to_audio.src.core.converter.GoogleServices') as mock_gs:
+    with patch('document_to_audio.src.services.google_services.GoogleServices') as mock_gs:
         mock_gs.return_value = mock_google_services
         
         converter = DocumentToAudio()
@@ -27,7 +27,7 @@ def test_pdf_conversion_workflow(sample_pdf, temp_dir, mock_google_services):
 @pytest.mark.integration
 def test_docx_conversion_workflow(sample_docx, temp_dir, mock_google_services):
     """Test complete DOCX to audio conversion workflow"""
-    with patch('document_to_audio.src.core.converter.GoogleServices') as mock_gs:
+    with patch('document_to_audio.src.services.google_services.GoogleServices') as mock_gs:
         mock_gs.return_value = mock_google_services
         
         converter = DocumentToAudio()
@@ -45,7 +45,7 @@ def test_docx_conversion_workflow(sample_docx, temp_dir, mock_google_services):
 @pytest.mark.integration
 def test_google_doc_conversion_workflow(temp_dir, mock_google_services):
     """Test complete Google Doc to audio conversion workflow"""
-    with patch('document_to_audio.src.core.converter.GoogleServices') as mock_gs:
+    with patch('document_to_audio.src.services.google_services.GoogleServices') as mock_gs:
         mock_gs.return_value = mock_google_services
         
         converter = DocumentToAudio()
@@ -64,7 +64,7 @@ def test_google_doc_conversion_workflow(temp_dir, mock_google_services):
 @pytest.mark.integration
 def test_error_handling(mock_google_services):
     """Test error handling in the conversion workflow"""
-    with patch('document_to_audio.src.core.converter.GoogleServices') as mock_gs:
+    with patch('document_to_audio.src.services.google_services.GoogleServices') as mock_gs:
         mock_gs.return_value = mock_google_services
         
         converter = DocumentToAudio()
@@ -81,3 +81,109 @@ def test_error_handling(mock_google_services):
                 is_google_doc=True
             )
         assert "Invalid Google Docs URL format" in str(exc_info.value)
+
+@pytest.mark.integration
+def test_offline_pdf_conversion(sample_pdf, temp_dir, local_tts_backend):
+    """Test PDF conversion end to end with the offline backend"""
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend)
+
+    result = converter.process_document(
+        input_path=sample_pdf,
+        output_path=os.path.join(temp_dir, "offline.mp3")
+    )
+
+    assert os.path.exists(result['audio_path'])
+    assert result['metadata']['Document Type'] == 'pdf'
+    with open(result['audio_path'], 'rb') as f:
+        assert b'test document' in f.read()
+
+@pytest.mark.integration
+def test_incremental_reconversion(temp_dir):
+    """Test that only edited paragraphs are synthesized again"""
+    from docx import Document
+    from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+    backend = LocalTTSBackend()
+    converter = DocumentToAudio(
+        storage_dir=os.path.join(temp_dir, 'storage'),
+        tts_backend=backend,
+        use_tts_cache=False,
+        incremental=True
+    )
+    docx_path = os.path.join(temp_dir, 'living.docx')
+
+    def write_doc(paragraphs):
+        doc = Document()
+        for paragraph in paragraphs:
+            doc.add_paragraph(paragraph)
+        doc.save(docx_path)
+
+    paragraphs = [f"Paragraph {i} of the living document." for i in range(10)]
+    write_doc(paragraphs)
+    first = converter.process_document(docx_path, output_path=os.path.join(temp_dir, 'v1.mp3'))
+    assert backend.calls == 10
+
+    paragraphs[4] = "Paragraph 4 was rewritten today."
+    write_doc(paragraphs)
+    second = converter.process_document(docx_path, output_path=os.path.join(temp_dir, 'v2.mp3'))
+    assert backend.calls == 11
+
+    with open(second['audio_path'], 'rb') as f:
+        audio = f.read()
+    positions = [audio.find(paragraph.encode()) for paragraph in paragraphs]
+    assert all(pos >= 0 for pos in positions)
+    assert positions == sorted(positions)
+    assert b'Paragraph 4 of the living' not in audio
+    assert os.path.exists(second['audio_path'] + '.segments.json')
+    assert first['audio_path'] != second['audio_path']
+
+@pytest.mark.integration
+def test_stream_document(sample_pdf, temp_dir, local_tts_backend):
+    """Test that a document can be consumed as a stream of MP3 bytes"""
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend)
+
+    audio = b"".join(converter.stream_document(sample_pdf))
+
+    assert b'test document' in audio
+    assert converter.storage.list_files() == []
+
+@pytest.mark.integration
+def test_unchanged_google_doc_is_not_reconverted(temp_dir, recorded_docs_service):
+    """Test that a Google Doc is only re-converted when its revision changes"""
+    from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+    class FakeGoogleServices:
+        def get_docs_service(self):
+            return recorded_docs_service
+
+    backend = LocalTTSBackend()
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend=backend, use_tts_cache=False)
+    converter.google_services = FakeGoogleServices()
+    url = "https://docs.google.com/document/d/1aBcD_report/edit"
+    _, revision_id = converter.read_document(url, is_google_doc=True)
+    assert revision_id == 'ALm37BVx9rKqA1'
+
+    first = converter.process_document(url, output_path=os.path.join(temp_dir, 'v1.mp3'),
+                                       is_google_doc=True)
+    assert first['metadata']['Revision ID'] == 'ALm37BVx9rKqA1'
+    calls = backend.calls
+
+    second = converter.process_document(url, is_google_doc=True)
+    assert second['unchanged'] is True
+    assert second['audio_path'] == first['audio_path']
+    assert backend.calls == calls
+    assert recorded_docs_service.requests[-1]['fields'] == 'revisionId'
+
+    document = recorded_docs_service.documents_by_id['1aBcD_report']
+    document['revisionId'] = 'ALm37BWq2'
+    document['body']['content'][1]['paragraph']['elements'][1]['textRun']['content'] = 'ten percent'
+    results = converter.refresh_google_docs(extract_workers=1, synthesize_workers=1)
+    assert [r['status'] for r in results] == ['ok']
+    with open(results[0]['audio_path'], 'rb') as f:
+        assert b'ten percent' in f.read()
+
+    assert [r['status'] for r in converter.refresh_google_docs()] == ['unchanged']
+    assert [r['status'] for r in converter.refresh_google_docs(force=True)] == ['ok']
+    forced = converter.process_document(url, output_path=os.path.join(temp_dir, 'v3.mp3'),
+                                        is_google_doc=True, force=True)
+    assert 'unchanged' not in forced
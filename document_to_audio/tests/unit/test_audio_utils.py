@@ -2,6 +2,8 @@
 Unit tests for audio utilities.
 """
 import os
+import time
+import pytest
 from document_to_audio.src.utils import audio_utils
 
 def test_convert_text_to_audio(temp_dir, sample_text):
@@ -24,3 +26,130 @@ def test_convert_text_to_audio(temp_dir, sample_text):
     assert os.path.getsize(result_path_es) > 0
     # Files should be different due to different languages
     assert os.path.getsize(result_path) != os.path.getsize(result_path_es)
+
+def test_split_text_prefers_sentence_boundaries():
+    """Test that chunks break at sentence ends and respect the size limit"""
+    text = " ".join(f"Sentence number {i} is here." for i in range(50))
+    chunks = audio_utils.split_text(text, max_chars=100)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith('.') for chunk in chunks)
+    assert " ".join(chunks) == text
+
+def test_split_text_prefers_paragraph_breaks():
+    """Test that paragraph breaks win over sentence ends"""
+    text = "First paragraph. Still first.\n\nSecond paragraph. Still second."
+    chunks = audio_utils.split_text(text, max_chars=50)
+    assert chunks == ["First paragraph. Still first.", "Second paragraph. Still second."]
+
+def test_split_text_accepts_iterable_of_pieces():
+    """Test chunking text that arrives in pieces"""
+    pages = ["Page one text. ", "Page two text. ", "Page three text."]
+    assert audio_utils.split_text(pages, max_chars=1000) == ["".join(pages).strip()]
+    assert audio_utils.split_text(pages, max_chars=20) == [
+        "Page one text.", "Page two text.", "Page three text."
+    ]
+
+def test_split_text_hard_splits_long_words():
+    """Test that text without whitespace is still split"""
+    chunks = audio_utils.split_text("x" * 250, max_chars=100)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+def test_parallel_synthesis_preserves_order(temp_dir, local_tts_backend):
+    """Test that segments are stitched in chunk order"""
+    text = "\n\n".join(f"Paragraph {i} of the document." for i in range(20))
+    output_path = os.path.join(temp_dir, "ordered.mp3")
+
+    audio_utils.convert_text_to_audio(
+        text, output_path, backend=local_tts_backend, max_workers=4, max_chunk_chars=40
+    )
+
+    with open(output_path, 'rb') as f:
+        audio = f.read()
+    positions = [audio.find(f"Paragraph {i} of".encode()) for i in range(20)]
+    assert all(pos >= 0 for pos in positions)
+    assert positions == sorted(positions)
+    assert local_tts_backend.calls == 20
+
+def test_parallel_synthesis_scales_with_workers(temp_dir):
+    """Test that wall-clock time drops as workers are added"""
+    from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+    text = " ".join(f"Sentence {i}." for i in range(16))
+    timings = {}
+    for workers in (1, 8):
+        start = time.perf_counter()
+        audio_utils.convert_text_to_audio(
+            text,
+            os.path.join(temp_dir, f"workers_{workers}.mp3"),
+            backend=LocalTTSBackend(latency=0.05),
+            max_workers=workers,
+            max_chunk_chars=15
+        )
+        timings[workers] = time.perf_counter() - start
+
+    assert timings[8] < timings[1] / 3
+
+def test_convert_empty_text_raises(temp_dir, local_tts_backend):
+    """Test that converting empty text fails and leaves no output behind"""
+    output_path = os.path.join(temp_dir, "empty.mp3")
+    with pytest.raises(ValueError):
+        audio_utils.convert_text_to_audio("   ", output_path, backend=local_tts_backend)
+    assert not os.path.exists(output_path)
+
+def test_synthesis_starts_before_text_is_exhausted(temp_dir, local_tts_backend):
+    """Test that chunks are synthesized while later pieces are still produced"""
+    synthesized_early = []
+
+    def pages():
+        for i in range(10):
+            if i == 9:
+                deadline = time.perf_counter() + 2
+                while not local_tts_backend.calls and time.perf_counter() < deadline:
+                    time.sleep(0.01)
+                synthesized_early.append(local_tts_backend.calls > 0)
+            yield f"Page {i} text. " * 5
+
+    audio_utils.convert_text_to_audio(
+        pages(), os.path.join(temp_dir, "streamed.mp3"),
+        backend=local_tts_backend, max_chunk_chars=60
+    )
+    assert synthesized_early == [True]
+
+def test_first_chunk_can_be_shorter():
+    """Test the separate limit for the first chunk"""
+    text = " ".join(f"Sentence {i} here." for i in range(40))
+    chunks = audio_utils.split_text(text, max_chars=200)
+    streamed = list(audio_utils.iter_text_chunks(text, 200, first_chunk_chars=40))
+
+    assert len(streamed[0]) <= 40
+    assert all(len(chunk) <= 200 for chunk in streamed)
+    assert " ".join(streamed) == " ".join(chunks) == text
+
+def test_stream_text_to_audio_yields_progressively(temp_dir):
+    """Test that the first segment arrives long before the last"""
+    from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+    output_path = os.path.join(temp_dir, "growing.mp3")
+    text = " ".join(f"Sentence {i} of a long chapter." for i in range(60))
+    stream = audio_utils.stream_text_to_audio(
+        text,
+        backend=LocalTTSBackend(latency=0.05),
+        max_workers=2,
+        max_chunk_chars=100,
+        first_chunk_chars=30,
+        output_path=output_path
+    )
+
+    start = time.perf_counter()
+    first = next(stream)
+    time_to_first = time.perf_counter() - start
+    assert os.path.getsize(output_path) == len(first)
+
+    rest = list(stream)
+    total = time.perf_counter() - start
+    assert time_to_first < total / 4
+
+    with open(output_path, 'rb') as f:
+        assert f.read() == first + b"".join(rest)
@@ -1,8 +1,10 @@
 """
 Unit tests for document utilities.
 """
+import os
+import zipfile
 import pytest
-from document_to_audio.src.utils import document_utils
+from document_to_audio.src.utils import document_utils, docx_xml
 
 def test_extract_text_from_pdf(sample_pdf, sample_text):
     """Test PDF text extraction"""
@@ -14,6 +16,101 @@ def test_extract_text_from_docx(sample_docx, sample_text):
     extracted_text = document_utils.extract_text_from_docx(sample_docx)
     assert sample_text in extracted_text
 
+def test_iter_pdf_pages_is_lazy(multi_page_pdf):
+    """Test that PDF pages are yielded one at a time in order"""
+    pages = document_utils.iter_pdf_pages(multi_page_pdf)
+    assert "Content of page 0." in next(pages)
+    remaining = list(pages)
+    assert len(remaining) == 4
+    assert "Content of page 4." in remaining[-1]
+    assert document_utils.extract_text_from_pdf(multi_page_pdf) == "".join(
+        document_utils.iter_pdf_pages(multi_page_pdf)
+    )
+
+def test_parallel_pdf_extraction_matches_serial(multi_page_pdf):
+    """Test that multi-process extraction returns pages in order"""
+    serial = list(document_utils.iter_pdf_pages(multi_page_pdf))
+    parallel = list(document_utils.iter_pdf_pages(
+        multi_page_pdf, workers=2, parallel_min_pages=1
+    ))
+    assert parallel == serial
+    assert document_utils.extract_text_from_pdf(
+        multi_page_pdf, workers=3, parallel_min_pages=1
+    ) == "".join(serial)
+
+def test_iter_docx_paragraphs(temp_dir):
+    """Test that DOCX paragraphs join back to the full text"""
+    import os
+    from docx import Document
+    path = os.path.join(temp_dir, "paragraphs.docx")
+    doc = Document()
+    for i in range(3):
+        doc.add_paragraph(f"Paragraph {i}.")
+    doc.save(path)
+
+    assert list(document_utils.iter_docx_paragraphs(path)) == [
+        "Paragraph 0.", " Paragraph 1.", " Paragraph 2."
+    ]
+    assert document_utils.extract_text_from_docx(path) == "Paragraph 0. Paragraph 1. Paragraph 2."
+
+FOOTNOTES_XML = (
+    '<w:footnotes xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+    '<w:footnote w:id="1"><w:p><w:r><w:t>See the appendix.</w:t></w:r></w:p></w:footnote>'
+    '</w:footnotes>'
+)
+
+@pytest.fixture
+def structured_docx(temp_dir):
+    """DOCX with a header, a table, a footer and a footnote"""
+    from docx import Document
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Quarterly Report"
+    doc.sections[0].footer.paragraphs[0].text = "Confidential"
+    intro = doc.add_paragraph("Revenue grew.")
+    intro._p.append(parse_xml(f'<w:r {nsdecls("w")}><w:footnoteReference w:id="1"/></w:r>'))
+    table = doc.add_table(rows=2, cols=2)
+    for row, cells in enumerate([("Region", "Sales"), ("North", "42")]):
+        for col, text in enumerate(cells):
+            table.cell(row, col).text = text
+    doc.add_page_break()
+    doc.add_paragraph("Outlook is stable.")
+    path = os.path.join(temp_dir, "structured.docx")
+    doc.save(path)
+
+    # python-docx cannot author footnotes; add the part directly
+    with zipfile.ZipFile(path, 'a') as archive:
+        archive.writestr('word/footnotes.xml', FOOTNOTES_XML)
+    return path
+
+def test_xml_docx_backend_reading_order(structured_docx):
+    """Test that the streaming backend reads tables, headers, footers and notes"""
+    assert list(docx_xml.iter_docx_text(structured_docx)) == [
+        "Quarterly Report", "Revenue grew.", "Region", "Sales", "North", "42",
+        "Outlook is stable.", "Confidential", "See the appendix."
+    ]
+    assert list(docx_xml.iter_docx_text(structured_docx, workers=3)) == list(
+        docx_xml.iter_docx_text(structured_docx))
+    assert list(docx_xml.iter_docx_text(structured_docx, include_headers_footers=False,
+                                        include_notes=False)) == [
+        "Revenue grew.", "Region", "Sales", "North", "42", "Outlook is stable."
+    ]
+
+def test_docx_backends(structured_docx, monkeypatch):
+    """Test backend selection in iter_docx_paragraphs"""
+    # python-docx keeps the empty page break paragraph but skips the rest
+    assert "".join(document_utils.iter_docx_paragraphs(structured_docx)) == (
+        "Revenue grew.  Outlook is stable.")
+    assert document_utils.extract_text_from_docx(structured_docx, backend='xml').startswith(
+        "Quarterly Report Revenue grew. Region Sales")
+
+    monkeypatch.setattr(document_utils, 'DOCX_STREAMING_MIN_BYTES', 0)
+    assert "Confidential" in document_utils.extract_text_from_docx(structured_docx, 'auto')
+    with pytest.raises(ValueError):
+        list(document_utils.iter_docx_paragraphs(structured_docx, backend='lxml'))
+
 def test_get_google_doc_id_from_url():
     """Test Google Doc ID extraction from URL"""
     # Test valid URL
@@ -36,3 +133,35 @@ def test_extract_text_from_google_doc(mock_google_services):
     service = mock_google_services.get_docs_service()
     text = document_utils.extract_text_from_google_doc(service, "test_doc_id")
     assert "This is a test Google Doc." in text
+
+def test_google_doc_requests_only_text_fields(recorded_docs_service):
+    """Test that the fetch uses a field mask rather than the full resource"""
+    document_utils.extract_text_from_google_doc(recorded_docs_service, "1aBcD_report")
+
+    fields = recorded_docs_service.requests[0]['fields']
+    assert fields == document_utils.GOOGLE_DOC_FIELDS
+    assert 'textRun/content' in fields
+    assert 'revisionId' in fields
+    assert 'Style' not in fields and 'inlineObjects' not in fields
+
+def test_google_doc_text_reading_order(recorded_docs_service):
+    """Test that headers, tables, footers and referenced footnotes are read in order"""
+    text = document_utils.extract_text_from_google_doc(recorded_docs_service, "1aBcD_report")
+
+    assert text == (
+        "ACME Confidential\n"
+        "Revenue grew twelve percent.\n"
+        "Region\nGrowth\nNorth\nNested cell\n"
+        "Costs fell.\n"
+        "Prepared by the finance team.\n"
+        "Unaudited figures.\nExcluding one-off costs.\n"
+    )
+
+def test_google_doc_text_body_only(recorded_docs_service):
+    """Test leaving out headers, footers and footnotes"""
+    document = document_utils.fetch_google_doc(recorded_docs_service, "1aBcD_report")
+    text = document_utils.google_doc_text(
+        document, include_headers_footers=False, include_footnotes=False
+    )
+    assert text.startswith("Revenue grew")
+    assert "ACME" not in text and "Unaudited" not in text
@@ -0,0 +1,90 @@
+"""
+Unit tests for the Drive upload manager.
+"""
+import os
+import pytest
+from document_to_audio.src.services.drive_uploader import DriveUploadManager, CHUNK_SIZE_UNIT
+
+@pytest.fixture
+def audio_files(temp_dir):
+    """Create a few audio-sized files with distinct content"""
+    paths = []
+    for i in range(4):
+        path = os.path.join(temp_dir, f"audio_{i}.mp3")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(CHUNK_SIZE_UNIT * 3 + 1000 * i))
+        paths.append(path)
+    return paths
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_chunk_size_must_match_drive_granularity(fake_drive):
+    """Test chunk size validation"""
+    with pytest.raises(ValueError):
+        DriveUploadManager(fake_drive, chunk_size=1000)
+
+def test_upload_in_chunks(fake_drive, audio_files):
+    """Test a chunked resumable upload"""
+    manager = DriveUploadManager(fake_drive, chunk_size=CHUNK_SIZE_UNIT)
+    result = manager.upload(audio_files[0], 'chapter.mp3')
+
+    uploaded = fake_drive.http.files[result['file_id']]
+    assert uploaded['name'] == 'chapter.mp3'
+    assert uploaded['data'] == _read(audio_files[0])
+    assert result['bytes'] == len(uploaded['data'])
+    assert result['retries'] == 0
+    assert result['throughput'] > 0
+
+def test_upload_resumes_after_errors(fake_drive, audio_files):
+    """Test that 5xx/429 failures are retried from the last committed byte"""
+    fake_drive.http.create_failures = [503]
+    fake_drive.http.chunk_failures = [429, 500]
+    manager = DriveUploadManager(fake_drive, chunk_size=CHUNK_SIZE_UNIT, backoff_base=0.01)
+
+    result = manager.upload(audio_files[1])
+
+    assert fake_drive.http.files[result['file_id']]['data'] == _read(audio_files[1])
+    assert result['retries'] == 3
+
+def test_upload_gives_up_after_max_retries(fake_drive, audio_files):
+    """Test that persistent failures are raised"""
+    from googleapiclient.errors import HttpError
+    fake_drive.http.chunk_failures = [503] * 10
+    manager = DriveUploadManager(
+        fake_drive, chunk_size=CHUNK_SIZE_UNIT, max_retries=2, backoff_base=0.01
+    )
+    with pytest.raises(HttpError):
+        manager.upload(audio_files[0])
+
+def test_upload_many_reports_each_file(fake_drive, audio_files, temp_dir):
+    """Test concurrent uploads and the aggregate report"""
+    manager = DriveUploadManager(fake_drive, max_concurrent=3, chunk_size=CHUNK_SIZE_UNIT)
+    missing = os.path.join(temp_dir, 'missing.mp3')
+
+    report = manager.upload_many(audio_files + [missing])
+
+    assert [u['file_path'] for u in report['uploads']] == audio_files + [missing]
+    assert report['failed'] == 1
+    assert report['uploads'][-1]['status'] == 'error'
+    for path, upload in zip(audio_files, report['uploads']):
+        assert fake_drive.http.files[upload['file_id']]['data'] == _read(path)
+    assert report['bytes'] == sum(os.path.getsize(path) for path in audio_files)
+
+def test_upload_through_google_services(fake_drive_server, audio_files):
+    """Test chunked uploads on the shared service and per-thread transports of GoogleServices"""
+    from google.auth.credentials import AnonymousCredentials
+    from document_to_audio.src.services.google_services import GoogleServices
+    services = GoogleServices()
+    services.credentials = AnonymousCredentials()
+    fake_drive_server.http.chunk_failures = [503]
+    manager = services.get_upload_manager(max_concurrent=3, chunk_size=CHUNK_SIZE_UNIT,
+                                          backoff_base=0.01)
+
+    report = manager.upload_many(audio_files)
+
+    assert report['failed'] == 0
+    assert report['retries'] == 1
+    for path, upload in zip(audio_files, report['uploads']):
+        assert fake_drive_server.http.files[upload['file_id']]['data'] == _read(path)
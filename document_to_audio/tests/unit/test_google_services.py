@@ -44,3 +44,69 @@ def test_get_docs_service(mock_google_services):
     # Verify the service can get document content
     doc = docs_service.documents().get(documentId="test_id").execute()
     assert "content" in doc["body"]
+
+def test_services_are_built_once():
+    """Test that service objects are cached per credentials"""
+    service = GoogleServices()
+    service.credentials = MagicMock()
+
+    with patch('document_to_audio.src.services.google_services.build') as mock_build:
+        mock_build.side_effect = lambda api, version, http: MagicMock(api=api)
+        drive = service.get_drive_service()
+        assert service.get_drive_service() is drive
+        assert service.get_docs_service() is not drive
+        assert mock_build.call_count == 2
+
+        # Replacing the credentials rebuilds the services
+        service.credentials = MagicMock()
+        assert service.get_drive_service() is not drive
+        assert mock_build.call_count == 3
+
+def test_cached_service_builds_offline():
+    """Test that the shared transport works with the real discovery build"""
+    service = GoogleServices()
+    service.credentials = MagicMock()
+    drive = service.get_drive_service()
+    assert drive.files() is not None
+    assert service.get_drive_service() is drive
+
+def test_thread_local_http_per_thread():
+    """Test that each thread gets its own HTTP transport"""
+    import threading
+    from document_to_audio.src.services.google_services import ThreadLocalHttp
+
+    transport = ThreadLocalHttp(MagicMock())
+    main_http = transport.get_http()
+    assert transport.get_http() is main_http
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(transport.get_http()))
+    thread.start()
+    thread.join()
+    assert seen[0] is not main_http
+    assert seen[0].credentials is transport.credentials
+
+def test_thread_local_http_completes_chunked_upload(fake_drive_server, temp_dir):
+    """Test that the 308 after each resumable chunk isn't followed as a redirect"""
+    import os
+    from google.auth.credentials import AnonymousCredentials
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaFileUpload
+    from document_to_audio.src.services.drive_uploader import CHUNK_SIZE_UNIT
+    from document_to_audio.src.services.google_services import ThreadLocalHttp
+
+    path = os.path.join(temp_dir, 'audio.mp3')
+    data = os.urandom(CHUNK_SIZE_UNIT * 2 + 100)
+    with open(path, 'wb') as f:
+        f.write(data)
+    drive = build('drive', 'v3', http=ThreadLocalHttp(AnonymousCredentials()))
+    media = MediaFileUpload(path, mimetype='audio/mpeg', chunksize=CHUNK_SIZE_UNIT,
+                            resumable=True)
+    request = drive.files().create(body={'name': 'audio.mp3'}, media_body=media, fields='id')
+
+    response = None
+    while response is None:
+        _, response = request.next_chunk()
+
+    assert fake_drive_server.http.files[response['id']]['data'] == data
+    assert [method for method, _ in fake_drive_server.http.requests] == ['POST'] + ['PUT'] * 3
@@ -0,0 +1,64 @@
+"""
+Import-time regression tests; each runs in a fresh interpreter.
+"""
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+HEAVY_MODULES = ['gtts', 'PyPDF2', 'docx', 'googleapiclient', 'google_auth_oauthlib',
+                 'google.oauth2', 'httplib2']
+# Cumulative import time of the CLI module; the eager imports took ~0.6s
+IMPORT_TIME_BUDGET = 0.3
+
+def _run(code, *options):
+    result = subprocess.run(
+        [sys.executable, *options, '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return result
+
+@pytest.mark.parametrize('module', [
+    'document_to_audio.src',
+    'document_to_audio.src.cli',
+    'document_to_audio.src.core.converter',
+])
+def test_import_skips_heavy_dependencies(module):
+    """Test that importing the package loads no format or service libraries"""
+    result = _run(f"import sys, {module}; "
+                  f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    assert result.stdout.split() == []
+
+def test_heavy_dependency_loaded_on_first_use():
+    """Test that using a format imports its library"""
+    result = _run("import sys\n"
+                  "from document_to_audio.src.utils import document_utils\n"
+                  "try:\n"
+                  "    document_utils.extract_text_from_docx('missing.docx')\n"
+                  "except Exception:\n"
+                  "    pass\n"
+                  "print('docx' in sys.modules)")
+    assert result.stdout.strip() == 'True'
+
+def test_transformers_backend_skips_torch():
+    """Test that creating the offline backend doesn't import torch or transformers"""
+    result = _run("import sys\n"
+                  "from document_to_audio.src.services.tts_backends import create_backend\n"
+                  "create_backend('transformers').model_name('en')\n"
+                  "print(' '.join(m for m in ('torch', 'transformers') if m in sys.modules))")
+    assert result.stdout.split() == []
+
+# Wall-clock timings are noisy on shared machines; like the benchmarks,
+# the budget is only checked when DOC_TO_AUDIO_BENCH is set
+@pytest.mark.skipif(not os.environ.get('DOC_TO_AUDIO_BENCH'),
+                    reason="timing checks run only with DOC_TO_AUDIO_BENCH set")
+def test_cli_import_time():
+    """Test that the CLI module imports within the time budget"""
+    result = _run("import document_to_audio.src.cli", '-X', 'importtime')
+    match = re.search(r'\|\s*(\d+)\s*\|\s*document_to_audio\.src\.cli\s*$',
+                      result.stderr, re.MULTILINE)
+    assert match, result.stderr[-500:]
+    assert int(match.group(1)) / 1e6 < IMPORT_TIME_BUDGET
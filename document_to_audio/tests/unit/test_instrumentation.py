@@ -0,0 +1,96 @@
+"""
+Unit tests for pipeline instrumentation.
+"""
+import json
+import os
+from document_to_audio.src.core.converter import DocumentToAudio
+from document_to_audio.src.services.drive_uploader import DriveUploadManager, CHUNK_SIZE_UNIT
+from document_to_audio.src.utils.mp3_assembly import build_id3v2_tag
+from document_to_audio.src.utils.instrumentation import (
+    NULL_INSTRUMENTATION, Instrumentation, to_json, to_prometheus
+)
+
+def test_null_instrumentation_is_a_no_op():
+    """Test that disabled instrumentation passes iterables through untouched"""
+    pieces = ['a', 'b']
+    assert NULL_INSTRUMENTATION.timed_iter('extract', pieces) is pieces
+    with NULL_INSTRUMENTATION.span('stage') as span:
+        span.set(size=1)
+    NULL_INSTRUMENTATION.count('chunks')
+    assert not NULL_INSTRUMENTATION.enabled
+
+def test_spans_nest_and_reach_sinks():
+    """Test span aggregation, parent tracking and sink events"""
+    events = []
+    instrumentation = Instrumentation(sinks=[events.append])
+
+    with instrumentation.span('outer'):
+        with instrumentation.span('inner', size=3) as span:
+            span.set(done=True)
+        instrumentation.count('chunks', 2)
+
+    assert [e['name'] for e in events] == ['inner', 'chunks', 'outer']
+    assert events[0]['parent'] == 'outer'
+    assert events[0]['attributes'] == {'size': 3, 'done': True}
+    assert events[2]['parent'] is None
+    snapshot = instrumentation.snapshot()
+    assert snapshot['counters'] == {'chunks': 2}
+    assert snapshot['timings']['inner']['count'] == 1
+
+def test_timed_iter_counts_items():
+    """Test that a wrapped iterable records its production time and size"""
+    instrumentation = Instrumentation()
+    assert list(instrumentation.timed_iter('extract', ['abc', 'de'], 'chars')) == ['abc', 'de']
+    snapshot = instrumentation.snapshot()
+    assert snapshot['counters'] == {'chars': 5}
+    assert snapshot['timings']['extract']['count'] == 1
+
+def test_exporters():
+    """Test the Prometheus text and JSON exports"""
+    instrumentation = Instrumentation()
+    instrumentation.count('tts_chunks', 4)
+    instrumentation.gauge('tts_cache_hit_ratio', 0.5)
+    instrumentation.observe('synthesize', 1.5)
+
+    text = to_prometheus(instrumentation)
+    assert "# TYPE doc_to_audio_tts_chunks_total counter\ndoc_to_audio_tts_chunks_total 4" in text
+    assert "doc_to_audio_tts_cache_hit_ratio 0.5" in text
+    assert 'doc_to_audio_stage_seconds_sum{stage="synthesize"} 1.5' in text
+    assert 'doc_to_audio_stage_seconds_count{stage="synthesize"} 1' in text
+    assert json.loads(to_json(instrumentation))['counters'] == {'tts_chunks': 4}
+
+def test_converter_records_stages(sample_pdf, temp_dir, local_tts_backend):
+    """Test that a conversion reports every stage, its sizes and cache use"""
+    instrumentation = Instrumentation()
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend,
+                                instrumentation=instrumentation)
+    converter.process_document(sample_pdf, output_path=os.path.join(temp_dir, 'out.mp3'))
+    converter.process_document(sample_pdf, output_path=os.path.join(temp_dir, 'again.mp3'))
+
+    snapshot = instrumentation.snapshot()
+    assert {'process_document', 'extract', 'synthesize', 'assemble', 'store'} <= set(
+        snapshot['timings'])
+    counters = snapshot['counters']
+    assert counters['extracted_chars'] > 0
+    assert counters['tts_chunks'] == 2
+    assert counters['tts_cache_misses'] == 1
+    assert counters['tts_cache_hits'] == 1
+    # Stored files add an ID3 tag, titled after the document, to the audio
+    tag = build_id3v2_tag(title=os.path.splitext(os.path.basename(sample_pdf))[0])
+    assert counters['stored_bytes'] == counters['audio_bytes'] + 2 * len(tag)
+    assert snapshot['gauges']['tts_cache_hit_ratio'] == 0.5
+
+def test_upload_retries_are_counted(fake_drive, temp_dir):
+    """Test that Drive retries and uploaded bytes are counted"""
+    path = os.path.join(temp_dir, 'audio.mp3')
+    with open(path, 'wb') as f:
+        f.write(os.urandom(CHUNK_SIZE_UNIT * 2))
+    fake_drive.http.chunk_failures = [503]
+    instrumentation = Instrumentation()
+    manager = DriveUploadManager(fake_drive, chunk_size=CHUNK_SIZE_UNIT, backoff_base=0.01,
+                                 instrumentation=instrumentation)
+
+    manager.upload(path)
+
+    counters = instrumentation.snapshot()['counters']
+    assert counters == {'drive_upload_retries': 1, 'drive_upload_bytes': CHUNK_SIZE_UNIT * 2}
@@ -0,0 +1,180 @@
+"""
+Unit tests for the durable job queue.
+"""
+import os
+import pytest
+from unittest.mock import patch
+from document_to_audio.src import cli
+from document_to_audio.src.core.converter import DocumentToAudio
+from document_to_audio.src.core.jobs import JobQueue, queue_needs_google
+from document_to_audio.src.services.tts_backends import LocalTTSBackend
+from document_to_audio.src.utils.audio_utils import split_text
+
+class FailingBackend(LocalTTSBackend):
+    """Backend that fails once on the given call, like a dropped connection"""
+    def __init__(self, fail_on_call):
+        super().__init__()
+        self.fail_on_call = fail_on_call
+        self.succeeded = 0
+
+    def synthesize(self, text, language='en'):
+        audio = super().synthesize(text, language)
+        if self.calls == self.fail_on_call:
+            raise ConnectionError("connection reset")
+        self.succeeded += 1
+        return audio
+
+@pytest.fixture
+def long_docx(temp_dir):
+    """DOCX long enough to be synthesized in several chunks"""
+    from docx import Document
+    path = os.path.join(temp_dir, "long.docx")
+    doc = Document()
+    for i in range(40):
+        doc.add_paragraph(f"Paragraph {i} of a long document. " * 4)
+    doc.save(path)
+    return path
+
+def _queue(temp_dir, backend, **kwargs):
+    converter = DocumentToAudio(storage_dir=os.path.join(temp_dir, 'storage'),
+                                tts_backend=backend, max_workers=1, use_tts_cache=False)
+    return JobQueue(converter, workers=1, **kwargs)
+
+def test_submissions_are_deduplicated_and_prioritized(sample_pdf, sample_docx, temp_dir):
+    """Test that identical submissions share a job and priorities order the queue"""
+    jobs = _queue(temp_dir, LocalTTSBackend())
+    low = jobs.submit(sample_pdf)
+    high = jobs.submit(sample_docx, priority=5)
+    assert jobs.submit(sample_pdf) == low
+    assert jobs.submit(sample_pdf, language='fr') != low
+
+    results = jobs.run()
+
+    assert [result['job_id'] for result in results] == [high, low, low + 2]
+    assert all(result['status'] == 'ok' for result in results)
+    assert all(os.path.exists(result['audio_path']) for result in results)
+    # A finished job absorbs resubmissions too
+    assert jobs.submit(sample_pdf) == low
+    assert jobs.run() == []
+
+def test_failed_job_resumes_from_checkpoints(long_docx, temp_dir):
+    """Test that a retried job only synthesizes the chunks it hadn't finished"""
+    backend = FailingBackend(fail_on_call=3)
+    jobs = _queue(temp_dir, backend, max_attempts=2)
+    job_id = jobs.submit(long_docx)
+
+    [result] = jobs.run()
+
+    assert result['status'] == 'ok'
+    assert result['attempts'] == 2
+    assert result['resumed_chunks'] == 2
+    # Every chunk was synthesized exactly once
+    chunks = split_text(list(jobs.converter.iter_document_text(long_docx)))
+    assert len(chunks) > 2
+    assert backend.succeeded == len(chunks)
+    assert not os.path.exists(jobs._job_dir(job_id))
+    assert jobs.store.checkpoints(job_id) == {}
+
+def test_failed_job_keeps_checkpoints_for_resubmission(long_docx, temp_dir):
+    """Test that resubmitting a failed job queues it again with its progress"""
+    backend = FailingBackend(fail_on_call=3)
+    jobs = _queue(temp_dir, backend, max_attempts=1)
+    job_id = jobs.submit(long_docx)
+
+    [result] = jobs.run()
+    assert result['status'] == 'error'
+    assert "connection reset" in result['error']
+    assert len(jobs.store.checkpoints(job_id)) == 2
+
+    assert jobs.submit(long_docx) == job_id
+    [result] = jobs.run()
+    assert result['status'] == 'ok'
+    assert result['resumed_chunks'] == 2
+
+def test_abandoned_job_is_taken_over(sample_pdf, temp_dir):
+    """Test that a running job whose worker stopped renewing its lease is run again"""
+    jobs = _queue(temp_dir, LocalTTSBackend(), lease_seconds=60)
+    job_id = jobs.submit(sample_pdf)
+    assert jobs.store.claim('crashed-worker', lease_seconds=60)['id'] == job_id
+
+    # Still leased to the crashed worker
+    assert jobs.run() == []
+
+    jobs.lease_seconds = 0
+    [result] = jobs.run()
+    assert result['status'] == 'ok'
+    assert jobs.get(job_id)['worker'] == jobs.worker_id
+
+def test_abandoned_job_fails_after_max_attempts(sample_pdf, temp_dir):
+    """Test that a job whose workers keep crashing is failed instead of claimed forever"""
+    jobs = _queue(temp_dir, LocalTTSBackend(), lease_seconds=0, max_attempts=2)
+    job_id = jobs.submit(sample_pdf)
+    assert jobs.store.claim('crashed-worker', 0, max_attempts=2)['id'] == job_id
+    assert jobs.store.claim('crashed-worker', 0, max_attempts=2)['id'] == job_id
+
+    assert jobs.run() == []
+    job = jobs.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 2
+    assert "stopped responding" in job['error']
+
+def test_stale_worker_cannot_finish_job(sample_pdf, temp_dir):
+    """Test that a worker whose job was taken over can't record its outcome"""
+    jobs = _queue(temp_dir, LocalTTSBackend())
+    job_id = jobs.submit(sample_pdf)
+    jobs.store.claim('slow-worker', lease_seconds=60)
+    jobs.store.claim('new-worker', lease_seconds=0)
+
+    assert not jobs.store.finish(job_id, 'slow-worker', {'audio_path': 'stale.mp3'})
+    assert not jobs.store.fail(job_id, 'slow-worker', "timed out", retry=True)
+    assert jobs.get(job_id)['status'] == 'running'
+    assert jobs.store.finish(job_id, 'new-worker', {'audio_path': 'report.mp3'})
+    assert jobs.get(job_id)['result'] == {'audio_path': 'report.mp3'}
+
+def test_cancel(sample_pdf, temp_dir):
+    """Test that a cancelled job isn't run"""
+    jobs = _queue(temp_dir, LocalTTSBackend())
+    job_id = jobs.submit(sample_pdf)
+    assert jobs.cancel(job_id)
+    assert jobs.run() == []
+    assert jobs.get(job_id)['status'] == 'cancelled'
+
+def test_done_google_doc_job_is_run_again(temp_dir):
+    """Test that resubmitting a converted Google Doc queues it to check for edits"""
+    jobs = _queue(temp_dir, LocalTTSBackend())
+    url = "https://docs.google.com/document/d/1aBcD_report/edit"
+    job_id = jobs.submit(url)
+    assert jobs.store.claim('worker', lease_seconds=60)['id'] == job_id
+    jobs.store.finish(job_id, 'worker', {'audio_path': 'report.mp3'})
+
+    assert jobs.submit(url) == job_id
+    assert jobs.get(job_id)['status'] == 'queued'
+    assert jobs.store.claim('worker', lease_seconds=60)['id'] == job_id
+
+def test_drive_upload_fails_without_google_services(sample_pdf, temp_dir):
+    """Test that a job asking for an upload fails rather than finishing without it"""
+    jobs = _queue(temp_dir, LocalTTSBackend(), max_attempts=1)
+    jobs.submit(sample_pdf, save_to_drive=True)
+
+    [result] = jobs.run()
+
+    assert result['status'] == 'error'
+    assert "Google Services not enabled" in result['error']
+
+def test_resuming_queue_enables_google_services(sample_pdf, temp_dir):
+    """Test that the CLI sets up Google services for queued jobs that need them"""
+    storage_dir = os.path.join(temp_dir, 'storage')
+    jobs = _queue(temp_dir, LocalTTSBackend())
+    jobs.submit(sample_pdf)
+    jobs.close()
+    assert not queue_needs_google(storage_dir)
+
+    jobs = _queue(temp_dir, LocalTTSBackend())
+    jobs.submit("https://docs.google.com/document/d/1aBcD_report/edit")
+    jobs.close()
+    assert queue_needs_google(storage_dir)
+
+    with patch('document_to_audio.src.cli.DocumentToAudio') as mock_converter, \
+            patch('document_to_audio.src.cli.JobQueue'):
+        cli.main(['--queue', '--storage-dir', storage_dir])
+    assert mock_converter.call_args.kwargs['use_google_services'] is True
@@ -0,0 +1,119 @@
+"""
+Unit tests for local storage and its metadata index.
+"""
+import os
+from datetime import datetime, timedelta
+from document_to_audio.src.utils.storage.local_storage import LocalStorage, INDEX_FILENAME
+
+def _make_audio(temp_dir, name, content=b'audio'):
+    path = os.path.join(temp_dir, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+def test_save_file_indexes_metadata(temp_dir):
+    """Test that saved files are queryable through the index"""
+    storage = LocalStorage(os.path.join(temp_dir, 'store'))
+    pdf_audio = storage.save_file(_make_audio(temp_dir, 'a.mp3', b'one'), 'report.pdf')
+    docx_audio = storage.save_file(_make_audio(temp_dir, 'b.mp3', b'two'), 'notes.docx')
+
+    assert storage.list_files() == [pdf_audio, docx_audio]
+    assert storage.list_files(doc_type='pdf') == [pdf_audio]
+    assert storage.list_files(original_doc='notes.docx') == [docx_audio]
+
+    info = storage.get_file_info(pdf_audio)
+    assert info['Document Type'] == 'pdf'
+    assert info['Original Document'] == 'report.pdf'
+    assert storage.list_files(content_hash=info['Content Hash']) == [pdf_audio]
+
+    tomorrow = datetime.now() + timedelta(days=1)
+    assert storage.list_files(until=tomorrow) == [pdf_audio, docx_audio]
+    assert storage.list_files(since=tomorrow) == []
+
+def test_list_files_does_not_walk_storage(temp_dir, monkeypatch):
+    """Test that listing is answered from the index alone"""
+    storage = LocalStorage(os.path.join(temp_dir, 'store'))
+    stored = storage.save_file(_make_audio(temp_dir, 'a.mp3'), 'report.pdf')
+
+    def fail(*args, **kwargs):
+        raise AssertionError("filesystem accessed")
+    monkeypatch.setattr(os, 'walk', fail)
+    monkeypatch.setattr('builtins.open', fail)
+
+    assert storage.list_files(doc_type='pdf') == [stored]
+    assert storage.get_file_info(stored)['Document Type'] == 'pdf'
+
+def test_reconcile_existing_meta_tree(temp_dir):
+    """Test that a store created before the index gets indexed"""
+    store_dir = os.path.join(temp_dir, 'store')
+    storage = LocalStorage(store_dir)
+    stored = storage.save_file(_make_audio(temp_dir, 'a.mp3'), 'report.pdf')
+    removed = storage.save_file(_make_audio(temp_dir, 'b.mp3'), 'old.pdf')
+    storage.index.close()
+    os.remove(os.path.join(store_dir, INDEX_FILENAME))
+
+    reopened = LocalStorage(store_dir)
+    assert reopened.list_files(original_doc='report.pdf') == [stored]
+
+    os.remove(removed)
+    assert reopened.reconcile_index() == {'added': 0, 'removed': 1}
+    assert reopened.list_files() == [stored]
+
+def test_identical_audio_is_stored_once(temp_dir):
+    """Test that duplicate content shares one blob through hard links"""
+    storage = LocalStorage(os.path.join(temp_dir, 'store'))
+    first = storage.save_file(_make_audio(temp_dir, 'first.mp3', b'same audio'), 'a.pdf')
+    second = storage.save_file(_make_audio(temp_dir, 'second.mp3', b'same audio'), 'b.pdf')
+    other = storage.save_file(_make_audio(temp_dir, 'other.mp3', b'different'), 'c.pdf')
+
+    assert os.path.samefile(first, second)
+    assert not os.path.samefile(first, other)
+    info = storage.get_file_info(first)
+    assert storage.list_files(content_hash=info['Content Hash']) == [first, second]
+
+def test_save_file_move(temp_dir):
+    """Test that move=True renames the source into storage"""
+    storage = LocalStorage(os.path.join(temp_dir, 'store'))
+    source = _make_audio(temp_dir, 'temp.mp3', b'fresh audio')
+    stored = storage.save_file(source, 'a.pdf', move=True)
+
+    assert not os.path.exists(source)
+    with open(stored, 'rb') as f:
+        assert f.read() == b'fresh audio'
+
+    duplicate = _make_audio(temp_dir, 'temp2.mp3', b'fresh audio')
+    storage.save_file(duplicate, 'b.pdf', move=True)
+    assert not os.path.exists(duplicate)
+
+def test_prune_blobs(temp_dir):
+    """Test that unreferenced blobs are removed"""
+    storage = LocalStorage(os.path.join(temp_dir, 'store'))
+    kept = storage.save_file(_make_audio(temp_dir, 'a.mp3', b'kept'), 'a.pdf')
+    dropped = storage.save_file(_make_audio(temp_dir, 'b.mp3', b'dropped'), 'b.pdf')
+
+    os.remove(dropped)
+    storage.reconcile_index()
+
+    assert storage.prune_blobs() == 1
+    assert storage.prune_blobs() == 0
+    with open(kept, 'rb') as f:
+        assert f.read() == b'kept'
+
+def test_index_migrates_revision_column(temp_dir):
+    """Test that an index created before revision tracking gains the column"""
+    import sqlite3
+    store_dir = os.path.join(temp_dir, 'store')
+    os.makedirs(store_dir)
+    conn = sqlite3.connect(os.path.join(store_dir, INDEX_FILENAME))
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, doc_type TEXT NOT NULL, "
+                 "original_doc TEXT, created TEXT NOT NULL, content_hash TEXT, size INTEGER)")
+    conn.commit()
+    conn.close()
+
+    storage = LocalStorage(store_dir)
+    audio = storage.save_file(_make_audio(temp_dir, 'doc.mp3'), 'https://docs/d/1',
+                              doc_type='google_docs', revision_id='rev1')
+
+    assert storage.latest_entry('https://docs/d/1')['revision_id'] == 'rev1'
+    assert storage.latest_entry('https://docs/d/1')['path'] == audio
+    assert storage.original_documents(doc_type='google_docs') == ['https://docs/d/1']
@@ -0,0 +1,85 @@
+"""
+Unit tests for backend selection and batched synthesis.
+"""
+import os
+import pytest
+from document_to_audio.src.core.converter import DocumentToAudio
+from document_to_audio.src.services.local_tts import TransformersTTSBackend
+from document_to_audio.src.services.tts_backends import LocalTTSBackend, create_backend
+from document_to_audio.src.services.tts_scheduler import ScheduledTTSBackend
+from document_to_audio.src.utils import audio_utils
+from document_to_audio.src.utils.storage.tts_cache import TTSCache
+
+class BatchingBackend(LocalTTSBackend):
+    """Offline backend recording the size of every batch it is given"""
+    def __init__(self, batch_size):
+        super().__init__()
+        self.max_batch_size = batch_size
+        self.batches = []
+
+    def synthesize_batch(self, texts, language='en'):
+        self.batches.append(len(texts))
+        return super().synthesize_batch(texts, language)
+
+def test_create_backend():
+    """Test that backends are created by name with their options"""
+    backend = create_backend('local', id3_tags=True)
+    assert isinstance(backend, LocalTTSBackend)
+    assert backend.id3_tags
+    with pytest.raises(ValueError):
+        create_backend('unknown')
+
+def test_transformers_backend_is_lazy():
+    """Test that the offline backend resolves model names without loading a model"""
+    backend = create_backend('transformers', batch_size=8)
+    assert isinstance(backend, TransformersTTSBackend)
+    assert backend.max_batch_size == 8
+    assert backend.model_name('en') == 'facebook/mms-tts-eng'
+    assert backend.model_name('fra') == 'facebook/mms-tts-fra'
+    with pytest.raises(ValueError):
+        backend.model_name('zz')
+    assert backend.settings()['model_template'] == 'facebook/mms-tts-{language}'
+
+def test_chunks_are_synthesized_in_batches(temp_dir):
+    """Test that a batching backend gets several chunks per call, in order"""
+    backend = BatchingBackend(batch_size=4)
+    text = " ".join(f"Sentence number {i} is here." for i in range(40))
+    output_path = os.path.join(temp_dir, 'batched.mp3')
+    reference_path = os.path.join(temp_dir, 'single.mp3')
+
+    audio_utils.convert_text_to_audio(text, output_path, backend=backend, max_chunk_chars=100)
+    audio_utils.convert_text_to_audio(text, reference_path, backend=LocalTTSBackend(),
+                                      max_chunk_chars=100)
+
+    chunks = audio_utils.split_text(text, max_chars=100)
+    assert sum(backend.batches) == len(chunks)
+    assert max(backend.batches) == 4
+    assert len(backend.batches) == -(-len(chunks) // 4)
+    with open(output_path, 'rb') as a, open(reference_path, 'rb') as b:
+        assert a.read() == b.read()
+
+def test_batches_only_synthesize_cache_misses(temp_dir):
+    """Test that cached chunks are left out of the batch sent to the backend"""
+    backend = BatchingBackend(batch_size=8)
+    cache = TTSCache(os.path.join(temp_dir, 'cache'))
+    chunks = [f"Chunk {i}." for i in range(8)]
+    list(audio_utils.iter_synthesized_segments(chunks[:3], backend, cache=cache))
+
+    segments = list(audio_utils.iter_synthesized_segments(chunks, backend, cache=cache))
+
+    assert backend.batches == [3, 5]
+    assert segments == [LocalTTSBackend().synthesize(chunk) for chunk in chunks]
+
+def test_scheduled_backend_passes_batches_through():
+    """Test that the scheduler sends a batch as a single request"""
+    inner = BatchingBackend(batch_size=4)
+    backend = ScheduledTTSBackend(inner)
+    segments = list(audio_utils.iter_synthesized_segments(
+        [f"Chunk {i}." for i in range(6)], backend))
+    assert len(segments) == 6
+    assert inner.batches == [4, 2]
+
+def test_converter_accepts_backend_name(temp_dir):
+    """Test that the converter resolves a backend given by name"""
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend='local')
+    assert isinstance(converter.tts_backend, LocalTTSBackend)
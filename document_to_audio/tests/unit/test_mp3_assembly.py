@@ -0,0 +1,86 @@
+"""
+Unit tests for MP3 segment assembly.
+"""
+import errno
+import os
+from unittest.mock import patch
+from document_to_audio.src.utils import audio_utils, mp3_assembly
+from document_to_audio.src.utils.storage.tts_cache import TTSCache
+from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def test_strip_id3_tags():
+    """Test that leading ID3v2 and trailing ID3v1 tags are removed"""
+    frames = LocalTTSBackend().synthesize("Hello")
+    tagged = LocalTTSBackend(id3_tags=True).synthesize("Hello")
+
+    assert tagged != frames
+    assert mp3_assembly.strip_id3_tags(tagged) == frames
+    assert mp3_assembly.strip_id3_tags(frames) is frames
+
+def test_build_id3v2_tag_round_trips_length():
+    """Test that the built tag declares its own length"""
+    tag = mp3_assembly.build_id3v2_tag(title="Report")
+    assert tag.startswith(b'ID3')
+    assert mp3_assembly.id3v2_length(tag) == len(tag)
+    assert "Report".encode('utf-16')[2:] in tag
+    assert mp3_assembly.build_id3v2_tag() == b''
+
+def test_assemble_segments(temp_dir):
+    """Test that segments are joined without their tags under a single file tag"""
+    backend = LocalTTSBackend(id3_tags=True)
+    first = _write(os.path.join(temp_dir, 'a.mp3'), backend.synthesize("First"))
+    second = _write(os.path.join(temp_dir, 'b.mp3'),
+                    b'junk' + backend.synthesize("Second") + b'junk')
+    output_path = os.path.join(temp_dir, 'out.mp3')
+    tag = mp3_assembly.build_id3v2_tag(title="Doc")
+
+    layout = mp3_assembly.assemble_segments(
+        [(first, 0, None), (second, 4, os.path.getsize(second) - 8)], output_path, tag
+    )
+
+    plain = LocalTTSBackend()
+    with open(output_path, 'rb') as f:
+        data = f.read()
+    assert data == tag + plain.synthesize("First") + plain.synthesize("Second")
+    assert data.count(b'ID3') == 1
+    assert b'TAG' not in data
+    assert [data[o:o + n] for o, n in layout] == [plain.synthesize("First"),
+                                                  plain.synthesize("Second")]
+
+def test_copy_range_falls_back_without_kernel_copy(temp_dir):
+    """Test the memory-mapped copy used where no in-kernel copy is available"""
+    source = _write(os.path.join(temp_dir, 'src'), bytes(range(256)) * 64)
+    output_path = os.path.join(temp_dir, 'out.mp3')
+
+    unsupported = OSError(errno.ENOSYS, "not supported")
+    with patch.object(mp3_assembly.os, 'copy_file_range', side_effect=unsupported, create=True), \
+            patch.object(mp3_assembly.os, 'sendfile', side_effect=unsupported, create=True):
+        mp3_assembly.assemble_segments([(source, 100, 5000)], output_path)
+
+    with open(output_path, 'rb') as f:
+        assert f.read() == (bytes(range(256)) * 64)[100:5100]
+
+def test_convert_links_cached_segments(temp_dir):
+    """Test that cache hits are linked into the spool rather than re-synthesized"""
+    backend = LocalTTSBackend(id3_tags=True)
+    cache = TTSCache(os.path.join(temp_dir, 'cache'))
+    text = "Alpha beta gamma. " * 20
+    first_path = os.path.join(temp_dir, 'first.mp3')
+    second_path = os.path.join(temp_dir, 'second.mp3')
+
+    audio_utils.convert_text_to_audio(text, first_path, backend=backend,
+                                      max_chunk_chars=100, cache=cache)
+    calls = backend.calls
+    with patch.object(cache, 'get', side_effect=AssertionError("audio read into memory")):
+        audio_utils.convert_text_to_audio(text, second_path, backend=backend,
+                                          max_chunk_chars=100, cache=cache)
+
+    assert backend.calls == calls
+    with open(first_path, 'rb') as a, open(second_path, 'rb') as b:
+        assert a.read() == b.read()
+    assert not [name for name in os.listdir(temp_dir) if name.startswith('.segments-')]
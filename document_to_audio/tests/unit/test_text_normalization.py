@@ -0,0 +1,120 @@
+"""
+Unit tests for text normalization and sentence chunking.
+"""
+import os
+from document_to_audio.src.core.converter import DocumentToAudio
+from document_to_audio.src.utils import text_normalization
+
+BODIES = ["Alpha", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot"]
+
+def _page(number, body):
+    return f"ACME Corp Annual Report\n{body}\nConfidential\nPage {number} of 6"
+
+def test_dehyphenate_and_collapse_whitespace():
+    """Test that wrapped lines are joined and blank lines kept as paragraph breaks"""
+    text = "A well-known  exam-\nple of line\n wrapping.\n\n\n  Jean-\nPaul\tagreed."
+    assert text_normalization.collapse_whitespace(text_normalization.dehyphenate(text)) == (
+        "A well-known example of line wrapping.\n\nJean-Paul agreed."
+    )
+
+def test_page_numbers():
+    """Test page number detection"""
+    for line in ["12", "Page 3 of 10", "- 4 -", "xii", "7/20", "- IV -", "Page IV"]:
+        assert text_normalization.is_page_number(line)
+    for line in ["12 apples", "Chapter 3", "did", "I", "C", "MIX", "mix"]:
+        assert not text_normalization.is_page_number(line)
+
+def test_roman_chapter_heading_is_kept():
+    """Test that a roman numeral heading at the top of a page isn't taken for a page number"""
+    pages = ["I\n\nThe beginning.", "It goes on.", "II\n\nThe middle.", "It ends."]
+    assert list(text_normalization.iter_without_page_furniture(pages)) == pages
+    # Uppercase numerals that repeat at a page edge are still running headers
+    pages = [f"IV\n{body}." for body in BODIES]
+    assert list(text_normalization.iter_without_page_furniture(pages)) == [
+        f"{body}." for body in BODIES
+    ]
+
+def test_page_furniture_is_removed():
+    """Test that running headers, footers and page numbers are dropped"""
+    pages = [_page(i, f"{body} section.") for i, body in enumerate(BODIES, 1)]
+    assert list(text_normalization.iter_without_page_furniture(pages, window=4)) == [
+        f"{body} section." for body in BODIES
+    ]
+    # A single page has nothing to compare its lines with
+    assert list(text_normalization.iter_without_page_furniture([_page(1, "Body.")])) == [
+        "ACME Corp Annual Report\nBody.\nConfidential"
+    ]
+
+def test_normalize_pages():
+    """Test that a word hyphenated across pages is rejoined"""
+    pages = [_page(1, "First paragraph.\n\nIt continues on the next pa-"),
+             _page(2, "ge of the report."),
+             _page(3, "Last page.")]
+    assert list(text_normalization.normalize_pieces(pages, pages=True)) == [
+        "First paragraph.\n\n",
+        "It continues on the next page of the report.\n\n",
+        "Last page.\n\n"
+    ]
+
+def test_sentence_across_pages_is_rejoined():
+    """Test that a sentence cut by a page break is kept in one paragraph"""
+    pages = [_page(1, "Revenue for the\nquarter was"),
+             _page(2, "up ten percent.\n\nCosts fell"),
+             _page(3, "Outlook\n\nSteady.")]
+    assert list(text_normalization.normalize_pieces(pages, pages=True)) == [
+        "Revenue for the quarter was up ten percent.\n\n",
+        "Costs fell\n\n",
+        "Outlook\n\n",
+        "Steady.\n\n"
+    ]
+
+def test_iter_sentences():
+    """Test that abbreviations, initials and acronyms don't end sentences"""
+    text = "Dr. Smith met J. R. Doe in the U.S. Army. They talked, e.g. about cats! Really? Yes."
+    assert list(text_normalization.iter_sentences(text)) == [
+        "Dr. Smith met J. R. Doe in the U.S. Army.",
+        "They talked, e.g. about cats!",
+        "Really?",
+        "Yes."
+    ]
+
+def test_sentence_chunks():
+    """Test that chunks hold whole sentences within the size limit"""
+    sentences = [f"Sentence number {i} is here." for i in range(20)]
+    chunks = list(text_normalization.iter_sentence_chunks(" ".join(sentences), 100, 30))
+    assert len(chunks[0]) <= 30
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks) == " ".join(sentences)
+
+    long_sentence = "word " * 100
+    chunks = list(text_normalization.iter_sentence_chunks(long_sentence, 50))
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks) == long_sentence.strip()
+
+    pieces = ["One. Two.", "Three."]
+    assert list(text_normalization.iter_sentence_chunks(pieces, 100)) == ["One. Two.\n\nThree."]
+    assert list(text_normalization.iter_sentence_chunks(pieces, 100, per_piece=True)) == [
+        "One. Two.", "Three."
+    ]
+
+def test_converter_normalizes_text(temp_dir, local_tts_backend):
+    """Test that the converter synthesizes the cleaned-up sentences"""
+    from reportlab.pdfgen import canvas
+    path = os.path.join(temp_dir, "report.pdf")
+    pdf = canvas.Canvas(path)
+    for number in range(1, 4):
+        for line, y in zip(["ACME Corp Annual Report", f"{BODIES[number]} section.",
+                            f"Page {number} of 3"], (800, 400, 40)):
+            pdf.drawString(72, y, line)
+        pdf.showPage()
+    pdf.save()
+
+    converter = DocumentToAudio(storage_dir=temp_dir, tts_backend=local_tts_backend,
+                                use_tts_cache=False, normalize_text=True)
+    assert "".join(converter.iter_document_text(path)) == (
+        "Bravo section.\n\nCharlie section.\n\nDelta section.\n\n"
+    )
+    result = converter.process_document(path, output_path=os.path.join(temp_dir, "report.mp3"))
+    assert local_tts_backend.calls == 1
+    with open(result['audio_path'], 'rb') as f:
+        assert b"en:Bravo section.\n\nCharlie section.\n\nDelta section.\x00" in f.read()
@@ -0,0 +1,62 @@
+"""
+Unit tests for the synthesized audio cache.
+"""
+import os
+from document_to_audio.src.utils import audio_utils
+from document_to_audio.src.utils.storage.tts_cache import TTSCache
+from document_to_audio.src.services.tts_backends import LocalTTSBackend
+
+def test_cache_key_normalizes_whitespace(temp_dir, local_tts_backend):
+    """Test that keys ignore whitespace but not language or backend settings"""
+    cache = TTSCache(temp_dir)
+    key = cache.make_key("Legal  footer\ntext", 'en', local_tts_backend)
+
+    assert key == cache.make_key(" Legal footer text ", 'en', local_tts_backend)
+    assert key != cache.make_key("Legal footer text", 'es', local_tts_backend)
+
+def test_cache_hits_and_misses(temp_dir):
+    """Test hit/miss counters and persistence across instances"""
+    cache = TTSCache(temp_dir)
+    assert cache.get('a' * 64) is None
+    cache.put('a' * 64, b'audio')
+    assert cache.get('a' * 64) == b'audio'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+    reopened = TTSCache(temp_dir)
+    assert reopened.get('a' * 64) == b'audio'
+    assert reopened.stats()['size_bytes'] == 5
+
+def test_cache_evicts_least_recently_used(temp_dir):
+    """Test that the size cap evicts the least recently used entry"""
+    cache = TTSCache(temp_dir, max_bytes=10)
+    cache.put('a' * 64, b'1111')
+    cache.put('b' * 64, b'2222')
+    cache.get('a' * 64)
+    cache.put('c' * 64, b'3333')
+
+    assert cache.get('b' * 64) is None
+    assert cache.get('a' * 64) == b'1111'
+    assert cache.get('c' * 64) == b'3333'
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size_bytes'] == 8
+
+def test_repeated_content_skips_backend(temp_dir):
+    """Test that shared boilerplate is synthesized only once"""
+    cache = TTSCache(os.path.join(temp_dir, 'cache'))
+    backend = LocalTTSBackend()
+    footer = "This document is confidential."
+
+    first = os.path.join(temp_dir, 'first.mp3')
+    second = os.path.join(temp_dir, 'second.mp3')
+    audio_utils.convert_text_to_audio(
+        f"Report one.\n\n{footer}", first, backend=backend, max_chunk_chars=30, cache=cache
+    )
+    audio_utils.convert_text_to_audio(
+        f"Report two.\n\n{footer}", second, backend=backend, max_chunk_chars=30, cache=cache
+    )
+
+    assert backend.calls == 3
+    assert cache.stats()['hits'] == 1
+    with open(second, 'rb') as f:
+        assert footer.encode() in f.read()
@@ -0,0 +1,156 @@
+"""
+Unit tests for the rate-limit-aware TTS scheduler.
+"""
+import time
+import urllib.request
+import pytest
+from document_to_audio.src.services.tts_backends import TTSBackend
+from document_to_audio.src.services.tts_scheduler import (
+    AdaptiveLimiter, CircuitBreaker, CircuitOpenError, ScheduledTTSBackend, TokenBucket,
+    is_retryable
+)
+from document_to_audio.src.utils.audio_utils import iter_synthesized_segments
+from document_to_audio.src.utils.instrumentation import Instrumentation
+
+class HTTPBackend(TTSBackend):
+    """Backend posting text to the fake TTS server"""
+    name = 'http'
+
+    def __init__(self, url):
+        self.url = url
+
+    def synthesize(self, text, language='en'):
+        request = urllib.request.Request(self.url, data=text.encode('utf-8'), method='POST')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.read()
+
+def test_token_bucket_limits_rate():
+    """Test that requests beyond the burst are spread out at the rate"""
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # 5 immediately, then 10 at 50 per second
+    assert time.monotonic() - start >= 0.18
+
+def test_adaptive_limiter_aimd():
+    """Test additive increase on success and one halving per congestion event"""
+    limiter = AdaptiveLimiter(initial=4, maximum=8)
+    for _ in range(4):
+        limiter.release(limiter.acquire(), congested=False)
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    started = [limiter.acquire() for _ in range(3)]
+    for value in started:
+        limiter.release(value, congested=True)
+    assert limiter.limit == pytest.approx(2.5, abs=0.1)
+
+    limiter.release(limiter.acquire(), congested=True)
+    assert limiter.limit == pytest.approx(1.25, abs=0.1)
+    limiter.release(limiter.acquire(), congested=True)
+    assert limiter.limit == 1
+
+def test_latency_above_target_is_congestion():
+    """Test that slow successes reduce the limit"""
+    limiter = AdaptiveLimiter(initial=4, latency_target=0.01)
+    started = limiter.acquire()
+    time.sleep(0.02)
+    limiter.release(started, congested=False)
+    assert limiter.limit == 2
+
+def test_circuit_breaker():
+    """Test that the circuit opens, fails fast and closes after a good probe"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record(success=False)
+    breaker.before_call()
+    breaker.record(success=False)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(success=True)
+    assert breaker.state == 'closed'
+
+def test_throttled_requests_are_retried(fake_tts_server):
+    """Test that 429s are retried after Retry-After and shrink concurrency"""
+    fake_tts_server.latency = 0.01
+    fake_tts_server.failures = [(429, {'Retry-After': '0.05'})] * 3
+    events = []
+    instrumentation = Instrumentation(sinks=[events.append])
+    backend = ScheduledTTSBackend(HTTPBackend(fake_tts_server.url), rate=200,
+                                  initial_concurrency=4, instrumentation=instrumentation)
+
+    chunks = [f"Chunk {i}." for i in range(12)]
+    segments = list(iter_synthesized_segments(chunks, backend, max_workers=4))
+
+    assert len(segments) == 12
+    assert all(segment for segment in segments)
+    assert fake_tts_server.statuses.count(429) == 3
+    assert fake_tts_server.statuses.count(200) == 12
+    assert fake_tts_server.max_in_flight <= 4
+    counters = instrumentation.snapshot()['counters']
+    assert counters['tts_throttled'] == 3
+    assert counters['tts_retries'] == 3
+    limits = [event['value'] for event in events if event['name'] == 'tts_concurrency_limit']
+    assert min(limits) < 4
+
+def test_client_errors_are_not_retried(fake_tts_server):
+    """Test that a rejected request fails at once without tripping the breaker"""
+    fake_tts_server.failures = [(400, {})]
+    backend = ScheduledTTSBackend(HTTPBackend(fake_tts_server.url), failure_threshold=1)
+    with pytest.raises(urllib.error.HTTPError):
+        backend.synthesize("Hello.")
+    assert fake_tts_server.statuses == [400]
+    assert backend.breaker.state == 'closed'
+
+def test_failing_service_opens_the_circuit(fake_tts_server):
+    """Test that repeated server errors stop further requests"""
+    fake_tts_server.failures = [(500, {})] * 10
+    backend = ScheduledTTSBackend(HTTPBackend(fake_tts_server.url), backoff_base=0.001,
+                                  failure_threshold=3, reset_timeout=60)
+    with pytest.raises(CircuitOpenError):
+        backend.synthesize("Hello.")
+    with pytest.raises(CircuitOpenError):
+        backend.synthesize("Hello again.")
+    assert fake_tts_server.statuses == [500] * 3
+
+def _raised(error, wrapper=None):
+    """Return error as raised, or the wrapper raised while handling it"""
+    try:
+        try:
+            raise error
+        except Exception:
+            if wrapper is None:
+                raise
+            raise wrapper
+    except Exception as e:
+        return e
+
+def test_requests_network_errors_are_retryable():
+    """Test that requests' connection errors and timeouts are retried"""
+    requests = pytest.importorskip('requests')
+    assert is_retryable(_raised(requests.exceptions.ConnectionError("connection reset")))
+    assert is_retryable(_raised(requests.exceptions.ReadTimeout("read timed out")))
+    assert not is_retryable(_raised(requests.exceptions.InvalidURL("no host")))
+
+def test_gtts_network_errors_are_retryable():
+    """Test that a gTTS error raised from a network error is retried"""
+    requests = pytest.importorskip('requests')
+    gtts = pytest.importorskip('gtts')
+    # gTTS raises its error, without a response, while handling the requests one
+    error = _raised(requests.exceptions.ConnectionError("unreachable"),
+                    gtts.gTTSError("Failed to connect"))
+    assert is_retryable(error)
+    assert not is_retryable(_raised(gtts.gTTSError("No audio stream in response")))
+
+def test_cache_keys_are_unchanged():
+    """Test that scheduling doesn't change which cache entries a backend uses"""
+    from document_to_audio.src.services.tts_backends import LocalTTSBackend
+    from document_to_audio.src.utils.storage.tts_cache import make_cache_key
+    inner = LocalTTSBackend(id3_tags=True)
+    assert make_cache_key("Hi", 'en', ScheduledTTSBackend(inner)) == make_cache_key(
+        "Hi", 'en', inner)
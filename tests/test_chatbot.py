@@ -0,0 +1,160 @@
+"""
+Tests for the chatbot's request batching and conversation sessions. The
+model itself isn't loaded; stand-ins take the place of it and its tokenizer.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chatbot import Chatbot, ChatSession, RequestBatcher
+
+class EchoChatbot:
+    """Answers every input in upper case, recording each batch it is given"""
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def generate_responses(self, user_inputs, max_length=100):
+        self.batches.append((list(user_inputs), max_length))
+        if self.fail:
+            raise RuntimeError("out of memory")
+        return [user_input.upper() for user_input in user_inputs]
+
+class CharTokenizer:
+    """One token per character; token 2 is the end of sequence"""
+    eos_token_id = 2
+    pad_token_id = 1
+
+    def __call__(self, text, add_special_tokens=True):
+        ids = ([self.eos_token_id] if add_special_tokens else []) + _encode(text)
+        return type('Encoding', (), {'input_ids': ids})()
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids if i != self.eos_token_id)
+
+def _encode(text):
+    return [ord(c) for c in text]
+
+def _chatbot(max_context_tokens=20, cache_budget_bytes=10, max_sessions=100):
+    """Chatbot with session settings but without a model"""
+    chatbot = object.__new__(Chatbot)
+    chatbot.tokenizer = CharTokenizer()
+    chatbot.max_context_tokens = max_context_tokens
+    chatbot.cache_budget_bytes = cache_budget_bytes
+    chatbot.max_sessions = max_sessions
+    chatbot.sessions = OrderedDict()
+    chatbot._lock = threading.Lock()
+    return chatbot
+
+def test_batches_are_grouped_by_max_length():
+    """Test that requests in one window share a generate call per max_length"""
+    backend = EchoChatbot()
+    batcher = RequestBatcher(backend, max_batch_size=16, batch_window=0.2)
+    futures = [batcher.submit(f"short {i}", 50) for i in range(4)]
+    futures += [batcher.submit(f"long {i}", 80) for i in range(2)]
+
+    results = [future.result(timeout=5) for future in futures]
+
+    assert results == [f"SHORT {i}" for i in range(4)] + [f"LONG {i}" for i in range(2)]
+    assert sorted(backend.batches, key=lambda batch: batch[1]) == [
+        ([f"short {i}" for i in range(4)], 50),
+        ([f"long {i}" for i in range(2)], 80),
+    ]
+
+def test_batch_size_is_capped():
+    """Test that a full batch is sent without waiting for the window"""
+    backend = EchoChatbot()
+    batcher = RequestBatcher(backend, max_batch_size=3, batch_window=5)
+    start = time.monotonic()
+    futures = [batcher.submit(f"q{i}") for i in range(3)]
+    assert [future.result(timeout=5) for future in futures] == ["Q0", "Q1", "Q2"]
+    assert time.monotonic() - start < 5
+    assert [len(inputs) for inputs, _ in backend.batches] == [3]
+
+def test_batch_errors_reach_every_caller():
+    """Test that a failed generate call fails each request of its batch"""
+    batcher = RequestBatcher(EchoChatbot(fail=True), batch_window=0.1)
+    futures = [batcher.submit(f"q{i}") for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+def test_response_is_cut_at_next_user_turn():
+    """Test that the response stops where the model starts the user's next turn"""
+    chatbot = _chatbot()
+    new_ids = _encode("Hi there\nUser: more")
+    length = chatbot._response_length(new_ids)
+    assert chatbot.tokenizer.decode(new_ids[:length]) == "Hi there\n"
+    assert chatbot._response_length(_encode("Done") + [2] + _encode("x")) == 4
+    assert chatbot._response_length(_encode("All of it")) == 9
+
+def test_window_drops_oldest_turns_to_half_the_context():
+    """Test that overflowing history is trimmed by whole turns and the cache rebuilt"""
+    chatbot = _chatbot(max_context_tokens=40)
+    session = ChatSession([2])
+    for turn in range(5):
+        session.token_ids += [10 + turn] * 6
+        session.turn_lengths.append(6)
+    session.past_key_values = 'cache'
+
+    chatbot._fit_window(session, 9)
+    assert len(session.turn_lengths) == 5
+    assert session.past_key_values == 'cache'
+
+    chatbot._fit_window(session, 10)
+    # Trimmed to half the context rather than just below the limit
+    assert session.token_ids == [2] + [14] * 6
+    assert session.turn_lengths == [6]
+    assert session.past_key_values is None
+
+    chatbot._fit_window(session, 35)
+    assert session.token_ids == [2]
+    assert session.turn_lengths == []
+
+def test_least_recently_used_caches_are_evicted():
+    """Test that caches are dropped oldest first until they fit the budget"""
+    chatbot = _chatbot(cache_budget_bytes=10)
+    for session_id in 'abc':
+        session = chatbot._session(session_id)
+        session.past_key_values = 'cache'
+        session.cache_bytes = 6
+    # Using a makes b the least recently used
+    chatbot._session('a')
+    chatbot._session('c')
+
+    chatbot._evict()
+
+    assert {key: s.cache_bytes for key, s in chatbot.sessions.items()} == {
+        'b': 0, 'a': 0, 'c': 6}
+    assert chatbot.sessions['b'].token_ids == [2]
+
+def test_sessions_are_capped():
+    """Test that the least recently used session is forgotten past max_sessions"""
+    chatbot = _chatbot(max_sessions=2)
+    for session_id in 'abc':
+        chatbot._session(session_id)
+    assert list(chatbot.sessions) == ['b', 'c']
+
+def test_failed_turn_drops_the_cache():
+    """Test that a turn whose generate call fails leaves no stale cache behind"""
+    pytest.importorskip('torch')
+
+    class FailingModel:
+        def generate(self, *args, **kwargs):
+            raise RuntimeError("out of memory")
+
+    chatbot = _chatbot(max_context_tokens=200, cache_budget_bytes=100)
+    chatbot.model = FailingModel()
+    session = chatbot._session('s')
+    session.past_key_values = 'cache'
+    session.cache_bytes = 6
+
+    with pytest.raises(RuntimeError):
+        chatbot.chat('s', "Hello")
+    assert session.past_key_values is None
+    assert session.token_ids == [2]
+    assert session.turn_lengths == []